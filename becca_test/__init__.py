@@ -5,5 +5,9 @@ These are toy worlds, but they are diverse.
 Their purpose is to push the limits of typical learning agents
 in as simple a manner as possible.
 """
-import matplotlib
-matplotlib.use("agg")
+try:
+    import matplotlib
+    matplotlib.use("agg")
+except ImportError:
+    # The worlds that don't read images run without matplotlib.
+    pass
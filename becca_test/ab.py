@@ -0,0 +1,276 @@
+"""
+Compare two builds of Becca, interleaved, on the same worlds and seeds.
+
+Running the suite with one build and then again with the other
+leaves any difference between them mixed up with whatever else changed
+in between, such as thermal throttling or a busy neighbor.
+Here the two builds take turns instead. Each build is a Python
+interpreter, or a virtualenv, with its own becca installed. In each
+round, every world is run once with each build, using the same seed
+for both, and the order alternates (A B, then B A) so that drift
+favors neither. Each run is a fresh brain in a fresh process, and
+only the brain's own run is timed.
+
+The report gives the mean paired difference, B - A, in ms per time
+step and in score for each world, with 95% confidence intervals.
+An interval that doesn't include 0 is a difference that
+the noise can't explain.
+
+Usage
+
+    python3 -m becca_test.ab run venv_a venv_b -w grid_1D fruit --rounds 5
+"""
+import argparse
+import importlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import becca_test.history as history
+
+# t_critical_two_sided : dict of int: float
+#     Two-sided 95% critical values of Student's t distribution,
+#     by degrees of freedom. See history.critical_value().
+t_critical_two_sided = {
+    1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447,
+    7: 2.365, 8: 2.306, 9: 2.262, 10: 2.228, 15: 2.131, 20: 2.086,
+    30: 2.042, 60: 2.000, 120: 1.980,
+}
+# result_marker : str
+#     Marks the line of a trial's output that holds its result.
+result_marker = 'ab_result '
+# package_parent : str
+#     The directory that holds becca_test. Both builds run these worlds.
+package_parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def interpreter(path):
+    """
+    Find the Python interpreter for a build.
+
+    Parameters
+    ----------
+    path : str
+        Either a Python interpreter or a virtualenv directory.
+
+    Returns
+    -------
+    python : str
+    """
+    if os.path.isdir(path):
+        return os.path.join(path, 'bin', 'python')
+    return path
+
+
+def trial(world_name, lifespan, seed):
+    """
+    Run one world with a fresh brain, and print the result.
+
+    This runs in the interpreter of the build being measured.
+    The brain neither restores from nor saves into the build's
+    log directory, so no trial can affect another.
+
+    Parameters
+    ----------
+    world_name : str
+        The name of the world module, such as 'grid_1D'.
+    lifespan : int
+        The number of time steps to run the world.
+    seed : int
+        Seeds the random number generator first.
+    """
+    import becca.brain as becca_brain
+    import becca_test.result_cache as result_cache
+
+    np.random.seed(seed)
+    module = importlib.import_module('becca_test.' + world_name)
+    world = module.World(lifespan=lifespan)
+    log_directory = tempfile.mkdtemp()
+    try:
+        start_time = time.perf_counter()
+        performance = becca_brain.run(world, config={
+            'restore': False, 'log_directory': log_directory})
+        delta_time = time.perf_counter() - start_time
+    finally:
+        shutil.rmtree(log_directory, ignore_errors=True)
+    print(result_marker + json.dumps({
+        'ms_per_step': 1000. * delta_time / lifespan,
+        'score': float(performance),
+        'becca': result_cache.becca_fingerprint(),
+    }))
+
+
+def run_trial(python, world_name, lifespan, seed):
+    """
+    Run a trial in another interpreter and collect its result.
+
+    Parameters
+    ----------
+    python : str
+        The interpreter.
+    See trial() for the others.
+
+    Returns
+    -------
+    result : dict
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [package_parent] + [path for path in
+                            [env.get('PYTHONPATH')] if path])
+    completed = subprocess.run(
+        [python, '-m', 'becca_test.ab', 'trial', world_name,
+         str(int(lifespan)), str(seed)],
+        env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True)
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(result_marker):
+            return json.loads(line[len(result_marker):])
+    raise RuntimeError('The trial of {0} in {1} failed:\n{2}'.format(
+        world_name, python, completed.stderr[-2000:]))
+
+
+def paired_interval(differences):
+    """
+    Find the mean of paired differences, with a 95% confidence interval.
+
+    Parameters
+    ----------
+    differences : array of floats
+
+    Returns
+    -------
+    mean, half_width : float
+        The interval is mean +/- half_width. With fewer than two
+        differences, half_width is infinite.
+    """
+    mean = np.mean(differences)
+    if differences.size < 2:
+        return mean, np.inf
+    half_width = (history.critical_value(
+        differences.size - 1, table=t_critical_two_sided) *
+        np.std(differences, ddof=1) / np.sqrt(differences.size))
+    return mean, half_width
+
+
+def ab(python_a, python_b, world_names, lifespan=1e3, n_rounds=5, seed=0):
+    """
+    Run two builds of Becca in interleaved order and compare them.
+
+    Parameters
+    ----------
+    python_a, python_b : str
+        The two builds, each a Python interpreter or a virtualenv.
+    world_names : list of str
+        The world modules to run.
+    lifespan : int
+        The number of time steps to run each world.
+    n_rounds : int
+        The number of times to run each world with each build.
+    seed : int
+        Round i uses seed + i, for both builds.
+
+    Returns
+    -------
+    results : dict of str: list of (dict, dict)
+        For each world, the results of A and B from each round.
+    """
+    pythons = [interpreter(python_a), interpreter(python_b)]
+    results = {world_name: [] for world_name in world_names}
+    for i_round in range(n_rounds):
+        for i_world, world_name in enumerate(world_names):
+            order = [0, 1] if (i_round + i_world) % 2 == 0 else [1, 0]
+            pair = [None, None]
+            for i_build in order:
+                pair[i_build] = run_trial(
+                    pythons[i_build], world_name, lifespan, seed + i_round)
+            results[world_name].append(tuple(pair))
+            print('Round {0}, {1}: A {2:.3} ms/step, B {3:.3} ms/step'
+                  .format(i_round + 1, world_name, pair[0]['ms_per_step'],
+                          pair[1]['ms_per_step']))
+    report(results, pythons)
+    return results
+
+
+def report(results, pythons):
+    """
+    Print the paired differences between the two builds.
+
+    Parameters
+    ----------
+    results : dict of str: list of (dict, dict)
+        See ab().
+    pythons : list of str
+        The interpreters of A and B.
+    """
+    first_pair = next(iter(results.values()))[0]
+    for label, python, result in zip('AB', pythons, first_pair):
+        print('{0}: {1}, becca {2}'.format(label, python, result['becca']))
+    print('{0:<20}{1:>12}{2:>26}{3:>24}'.format(
+        'world', 'A ms/step', 'B - A ms/step (95% CI)',
+        'B - A score (95% CI)'))
+    log_ratios = []
+    for world_name, pairs in results.items():
+        times = np.array([[a['ms_per_step'], b['ms_per_step']]
+                          for a, b in pairs])
+        scores = np.array([[a['score'], b['score']] for a, b in pairs])
+        log_ratios.extend(np.log(times[:, 1] / times[:, 0]))
+        time_mean, time_width = paired_interval(times[:, 1] - times[:, 0])
+        score_mean, score_width = paired_interval(
+            scores[:, 1] - scores[:, 0])
+        print('{0:<20}{1:>12.3}{2:>26}{3:>24}'.format(
+            world_name, np.mean(times[:, 0]),
+            '{0:+.3} +/- {1:.2}'.format(time_mean, time_width),
+            '{0:+.3} +/- {1:.2}'.format(score_mean, score_width)))
+
+    ratio_mean, ratio_width = paired_interval(np.array(log_ratios))
+    print('Across all worlds, B takes {0:.1%} of the time A does'.format(
+        np.exp(ratio_mean)),
+        '(95% CI {0:.1%} to {1:.1%}).'.format(
+            np.exp(ratio_mean - ratio_width),
+            np.exp(ratio_mean + ratio_width)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Compare two builds of Becca, interleaved.')
+    subparsers = parser.add_subparsers(dest='command')
+    run_parser = subparsers.add_parser(
+        'run', help='Run both builds and compare them.')
+    run_parser.add_argument(
+        'python_a', help='Build A, a Python interpreter or virtualenv.')
+    run_parser.add_argument(
+        'python_b', help='Build B, a Python interpreter or virtualenv.')
+    run_parser.add_argument(
+        '-w', '--worlds', nargs='+', default=['grid_1D', 'fruit'],
+        help='The names of the world modules to run.')
+    run_parser.add_argument(
+        '-n', '--lifespan', type=float, default=1e3,
+        help='The number of time steps to run each world.')
+    run_parser.add_argument(
+        '-r', '--rounds', type=int, default=5,
+        help='The number of times to run each world with each build.')
+    run_parser.add_argument(
+        '-s', '--seed', type=int, default=0,
+        help='The seed for the first round.')
+    trial_parser = subparsers.add_parser(
+        'trial', help='Run one world once. Used by run.')
+    trial_parser.add_argument('world')
+    trial_parser.add_argument('lifespan', type=int)
+    trial_parser.add_argument('seed', type=int)
+    args = parser.parse_args()
+
+    if args.command == 'trial':
+        trial(args.world, args.lifespan, args.seed)
+    elif args.command == 'run':
+        ab(args.python_a, args.python_b, args.worlds,
+           lifespan=args.lifespan, n_rounds=args.rounds, seed=args.seed)
+    else:
+        parser.print_help()
+        sys.exit(1)
@@ -0,0 +1,147 @@
+"""
+Let the brain decide only every few time steps of a world.
+
+Wrapping a world in an ActionRepeat makes each brain decision last
+for several world time steps. The action is repeated for each of them,
+and their rewards and sensors are combined into one.
+This trades control resolution for brain throughput,
+which matters most for the image worlds and for real-time use.
+
+    from becca_test.action_repeat import ActionRepeat
+    from becca_test.image_2D import World
+    becca_brain.run(ActionRepeat(World(lifespan=1e4), repeat=4))
+
+From the command line, use --repeat. See test.py.
+"""
+import numpy as np
+
+from becca_test.base_world import World as BaseWorld
+import becca_test.world_tools as wtools
+
+# reward_modes, sensor_modes : list of str
+#     The ways to combine the rewards and sensors from repeated steps.
+reward_modes = ['mean', 'sum']
+sensor_modes = ['last', 'max']
+
+
+class ActionRepeat(BaseWorld):
+    """
+    A world whose actions are each repeated for several time steps.
+
+    Attributes
+    ----------
+    Most of this world's attributes are defined in base_world.py.
+    n_sensors and n_actions are the same as the wrapped world's.
+    timestep counts brain decisions, not time steps of the wrapped world.
+    """
+    def __init__(self, world, repeat=2, reward_mode='mean',
+                 sensor_mode='last'):
+        """
+        Wrap a world.
+
+        Parameters
+        ----------
+        world : World
+            The world to wrap. It decides how long to keep going.
+        repeat : int
+            The number of world time steps per brain decision.
+        reward_mode : str
+            How to combine the rewards from the repeated steps,
+            'mean' or 'sum'. 'mean' keeps the average reward per decision
+            on the same scale as the wrapped world's, so scores can
+            be compared across different numbers of repeats.
+        sensor_mode : str
+            How to combine the sensors from the repeated steps.
+            'last' passes on the sensors from the final step.
+            'max' passes on the largest value each sensor had during
+            any of the steps, so that nothing brief is missed.
+        """
+        if reward_mode not in reward_modes:
+            raise ValueError('reward_mode needs to be one of {0}'.format(
+                ', '.join(reward_modes)))
+        if sensor_mode not in sensor_modes:
+            raise ValueError('sensor_mode needs to be one of {0}'.format(
+                ', '.join(sensor_modes)))
+        BaseWorld.__init__(self, world.lifespan)
+        # world : World
+        #     The world being wrapped.
+        self.world = world
+        # repeat : int
+        #     The number of world time steps per brain decision.
+        self.repeat = int(repeat)
+        # reward_mode, sensor_mode : str
+        #     How rewards and sensors from the repeated steps are combined.
+        self.reward_mode = reward_mode
+        self.sensor_mode = sensor_mode
+        # Keep the brain for each number of repeats separate.
+        self.name = '{0}_repeat_{1}'.format(world.name, self.repeat)
+        self.n_sensors = world.n_sensors
+        self.n_actions = world.n_actions
+        self.visualize_interval = world.visualize_interval
+
+    def is_alive(self):
+        """
+        The wrapped world decides when to stop.
+        """
+        return self.world.is_alive()
+
+    def step(self, action):
+        """
+        Repeat an action for several time steps of the wrapped world.
+
+        Parameters
+        ----------
+        action : array of floats
+            The set of action commands to execute.
+
+        Returns
+        -------
+        sensors : array of floats
+            The sensors from the repeated steps, combined.
+        reward : float
+            The rewards from the repeated steps, combined.
+        """
+        self.timestep += 1
+        total_reward = 0.
+        n_steps = 0
+        sensors = None
+        for _ in range(self.repeat):
+            # Worlds are allowed to change the action array they're given.
+            step_sensors, reward = self.world.step(np.array(action))
+            if isinstance(step_sensors, tuple):
+                step_sensors = wtools.sparse_to_dense(
+                    step_sensors[0], step_sensors[1], self.n_sensors)
+            if self.sensor_mode == 'last':
+                sensors = step_sensors
+            elif sensors is None:
+                # Some worlds reuse their sensor array from step to step,
+                # so hold on to a copy.
+                sensors = np.array(step_sensors)
+            else:
+                np.maximum(sensors, step_sensors, out=sensors)
+            total_reward += reward
+            n_steps += 1
+            if not self.world.is_alive():
+                break
+
+        if self.reward_mode == 'mean':
+            return sensors, total_reward / n_steps
+        return sensors, total_reward
+
+    def visualize(self, brain):
+        """
+        Let the wrapped world show what's going on.
+        """
+        try:
+            self.world.visualize(brain)
+        except TypeError:
+            self.world.visualize()
+
+    def close_world(self, brain):
+        """
+        Let the wrapped world wrap up.
+        """
+        try:
+            self.world.close_world(brain)
+        except AttributeError:
+            print("Closing", self.world.name)
@@ -0,0 +1,177 @@
+"""
+Step worlds from an asyncio event loop.
+
+A world's step() makes the brain wait until the world is done,
+even when the world is only waiting on a file or a socket.
+An AsyncWorld runs each step in a worker thread instead,
+so one event loop can drive several worlds and brains at once.
+While one brain is choosing its actions, the other worlds
+are stepping.
+
+Worlds can also do some of the next step early. If a world has a
+prefetch() method, it is started in the background as soon as a step
+finishes, and has to finish before the next step starts.
+It should do whatever work the next step needs that doesn't depend on
+the action, like drawing random numbers or reading the next frame.
+See image_1D.py and image_2D.py for examples.
+
+Run Becca on several worlds at once with
+
+    import becca_test.async_world as async_world
+    from becca_test.image_1D import World as World_image_1D
+    from becca_test.image_2D import World as World_image_2D
+    async_world.run([World_image_1D(), World_image_2D()])
+
+Note that all the worlds share numpy's random number generator,
+so seeding it doesn't make a concurrent run repeatable.
+"""
+import asyncio
+import concurrent.futures
+import copy
+
+import numpy as np
+
+import becca.brain as becca_brain
+
+
+class AsyncWorld(object):
+    """
+    Wrap a world so that its steps can be awaited.
+
+    Attributes
+    ----------
+    world : World
+        The world being wrapped. Its name, n_sensors and n_actions
+        are passed straight through.
+    executor : Executor
+        Where the world's steps and prefetches run.
+    pending : Future or None
+        The prefetch for the next step, if one is running.
+    """
+    def __init__(self, world, executor=None):
+        """
+        Parameters
+        ----------
+        world : World
+            Any world. If its step() is already a coroutine,
+            it is awaited directly.
+        executor : Executor, optional
+            Where to run the world's steps. By default, each AsyncWorld
+            gets a thread of its own.
+        """
+        self.world = world
+        if executor is None:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.executor = executor
+        self.pending = None
+        self.name = world.name
+        self.n_sensors = world.n_sensors
+        self.n_actions = world.n_actions
+
+    def is_alive(self):
+        """
+        Check whether the wrapped world is alive.
+        """
+        return self.world.is_alive()
+
+    async def step(self, action):
+        """
+        Advance the world by one time step, without blocking the loop.
+
+        Parameters
+        ----------
+        action : array of floats
+            The set of action commands to execute.
+
+        Returns
+        -------
+        sensors : array of floats
+            The values of each of the sensors.
+        reward : float
+            The amount of reward or punishment given by the world.
+        """
+        if self.pending is not None:
+            await self.pending
+            self.pending = None
+
+        if asyncio.iscoroutinefunction(self.world.step):
+            sensors, reward = await self.world.step(action)
+        else:
+            loop = asyncio.get_running_loop()
+            sensors, reward = await loop.run_in_executor(
+                self.executor, self.world.step, action)
+
+        # Get started on the next step while the brain works on this one.
+        prefetch = getattr(self.world, 'prefetch', None)
+        if prefetch is not None:
+            loop = asyncio.get_running_loop()
+            self.pending = loop.run_in_executor(self.executor, prefetch)
+        return sensors, reward
+
+    def close_world(self, brain):
+        """
+        Close the wrapped world and shut down its thread.
+        """
+        try:
+            self.world.close_world(brain)
+        except AttributeError:
+            print("Closing", self.world.name)
+        self.executor.shutdown(wait=True)
+
+
+async def run_brain(world, config=None):
+    """
+    Run Becca with a world, as a coroutine.
+
+    This steps through the same sense-act loop as becca.brain.run().
+
+    Parameters
+    ----------
+    world : AsyncWorld
+        The world that Becca will learn.
+    config : dict, optional
+        Configurable brain parameters. See becca.brain.Brain.
+
+    Returns
+    -------
+    performance : float
+        The average reward per time step over the world's lifespan.
+    """
+    brain = becca_brain.Brain(world.world, config)
+
+    # Start at a resting state.
+    actions = np.zeros(world.n_actions)
+    sensors, reward = await world.step(actions)
+    while world.is_alive():
+        actions = brain.sense_act_learn(copy.deepcopy(sensors), reward)
+        sensors, reward = await world.step(copy.copy(actions))
+
+    world.close_world(brain)
+    return brain.report_performance()
+
+
+def run(worlds, config=None):
+    """
+    Run a separate brain on each of several worlds, all at once.
+
+    Parameters
+    ----------
+    worlds : list of World
+        The worlds to run. They are wrapped in AsyncWorlds if they
+        aren't already.
+    config : dict, optional
+        Configurable brain parameters, shared by all the brains.
+
+    Returns
+    -------
+    performances : list of floats
+        The performance of each brain, in the same order as the worlds.
+    """
+    async_worlds = [world if isinstance(world, AsyncWorld)
+                    else AsyncWorld(world) for world in worlds]
+
+    async def run_all():
+        return await asyncio.gather(*[
+            run_brain(world, config) for world in async_worlds])
+
+    return list(asyncio.run(run_all()))
@@ -0,0 +1,54 @@
+"""
+The base class that all the worlds are built on.
+
+When Becca is installed, this is Becca's own base World.
+When it isn't, the stand-in below takes its place, so that the worlds
+can still be stepped on their own, as bench.py does. It has the same
+attributes and default values as Becca's.
+"""
+import numpy as np
+
+try:
+    from becca.base_world import World
+except ImportError:
+    class World(object):
+        """
+        A stand-in for Becca's base World.
+
+        See becca/base_world.py for a description of the attributes.
+        """
+        def __init__(self, lifespan=None):
+            if lifespan is None:
+                self.lifespan = int(1e7)
+            else:
+                self.lifespan = lifespan
+            self.timestep = -1
+            self.visualize_interval = 1e6
+            self.name = 'abstract_base_world'
+            self.n_sensors = 0
+            self.n_actions = 0
+            self.sensors = np.zeros(self.n_sensors)
+            self.actions = np.zeros(self.n_actions)
+            self.reward = 0
+
+        def step(self, actions):
+            """
+            Take a time step through an empty world that does nothing.
+            """
+            self.timestep += 1
+            self.sensors = np.ones(self.n_sensors) * actions
+            self.reward = 0
+            return self.sensors, self.reward
+
+        def is_alive(self):
+            """
+            Keep going until lifespan time steps have been completed.
+            """
+            return self.timestep < self.lifespan
+
+        def visualize(self, brain=None):
+            """
+            Show the user the state of the world.
+            """
+            print('{0} is {1} time steps old.'.format(
+                self.name, self.timestep))
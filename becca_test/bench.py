@@ -0,0 +1,253 @@
+"""
+Measure what the worlds themselves cost, with no brain attached.
+
+Each world is driven by a stand-in agent, either random or constant
+actions, chosen ahead of time so that the agent costs nothing while
+the world is being timed. This only needs NumPy. Becca doesn't have
+to be installed (see base_world.py), and neither does matplotlib,
+although without it the image worlds are skipped.
+
+For each world this reports
+    steps/s and ns/step, from a timed run of n_steps time steps.
+    B/step, the bytes allocated during each time step, from the peak
+        memory traced by tracemalloc. Temporary arrays count,
+        even though they are freed before the step ends.
+    kept B/step, the bytes still held after each time step.
+        Anything but 0 means the world grows as it runs.
+
+Usage
+To benchmark every world
+
+    python3 -m becca_test.bench
+
+To benchmark a few worlds with constant actions
+
+    python3 -m becca_test.bench grid_1D image_2D --agent constant
+"""
+import argparse
+import importlib
+import time
+import tracemalloc
+
+import numpy as np
+
+# world_names : list of str
+#     The modules of the worlds to benchmark.
+world_names = [
+    'grid_1D',
+    'grid_1D_cont',
+    'grid_1D_chase',
+    'grid_1D_chase_cont',
+    'grid_1D_delay',
+    'grid_1D_delay_cont',
+    'grid_1D_ms',
+    'grid_1D_ms_cont',
+    'grid_1D_noise',
+    'grid_2D',
+    'grid_2D_dc',
+    'grid_2D_cont',
+    'grid_2D_maze',
+    'grid_2D_maze_dc',
+    'image_1D',
+    'image_2D',
+    'fruit',
+    'vacuum',
+    'synthetic',
+]
+# agents : list of str
+#     The stand-in agents.
+agents = ['random', 'constant']
+# warmup_steps : int
+#     The number of time steps to run each world before timing it.
+warmup_steps = 100
+
+
+def agent_actions(agent, n_steps, n_actions):
+    """
+    Choose all of a stand-in agent's actions ahead of time.
+
+    Parameters
+    ----------
+    agent : str
+        'random' takes each action with probability 1 / n_actions.
+        'constant' never takes any action.
+    n_steps, n_actions : int
+        The number of time steps and actions.
+
+    Returns
+    -------
+    actions : 2D array of floats
+        One row of action commands per time step.
+    """
+    if agent == 'constant':
+        return np.zeros((n_steps, n_actions))
+    return (np.random.random_sample((n_steps, n_actions)) <
+            1. / n_actions).astype(float)
+
+
+def time_steps(world, actions):
+    """
+    Time a world through a sequence of actions.
+
+    Parameters
+    ----------
+    world : World
+        The world to step.
+    actions : 2D array of floats
+        One row of action commands per time step.
+
+    Returns
+    -------
+    seconds : float
+        The total time taken.
+    """
+    step = world.step
+    start_time = time.perf_counter()
+    for action in actions:
+        step(action)
+    return time.perf_counter() - start_time
+
+
+def trace_allocations(world, actions):
+    """
+    Measure the memory a world allocates as it steps.
+
+    Parameters
+    ----------
+    world : World
+        The world to step.
+    actions : 2D array of floats
+        One row of action commands per time step.
+
+    Returns
+    -------
+    allocated, kept : float
+        The bytes allocated during each time step and the bytes
+        still held after it, averaged over the time steps.
+    """
+    tracemalloc.start()
+    start_bytes, _ = tracemalloc.get_traced_memory()
+    allocated = 0
+    for action in actions:
+        before_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        world.step(action)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        allocated += peak_bytes - before_bytes
+    end_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    n_steps = actions.shape[0]
+    return allocated / n_steps, (end_bytes - start_bytes) / n_steps
+
+
+def bench_world(world_name, n_steps=1e4, agent='random', seed=None,
+                trace_steps=1000):
+    """
+    Benchmark a single world.
+
+    Parameters
+    ----------
+    world_name : str
+        The name of the world module, such as 'grid_1D'.
+    n_steps : int
+        The number of time steps to time.
+    agent : str
+        One of agents.
+    seed : int, optional
+        If given, seed the random number generator first.
+    trace_steps : int
+        The number of time steps to trace allocations over. Tracing
+        is slow, so this is done separately from the timed steps.
+
+    Returns
+    -------
+    result : dict
+    """
+    n_steps = int(n_steps)
+    if seed is not None:
+        np.random.seed(seed)
+    module = importlib.import_module('becca_test.' + world_name)
+    world = module.World(
+        lifespan=warmup_steps + n_steps + trace_steps)
+    actions = agent_actions(
+        agent, warmup_steps + n_steps + trace_steps, world.n_actions)
+
+    time_steps(world, actions[:warmup_steps])
+    seconds = time_steps(
+        world, actions[warmup_steps:warmup_steps + n_steps])
+    allocated, kept = trace_allocations(
+        world, actions[warmup_steps + n_steps:])
+    return {
+        'name': world.name,
+        'n_sensors': world.n_sensors,
+        'n_actions': world.n_actions,
+        'steps_per_second': n_steps / seconds,
+        'ns_per_step': 1e9 * seconds / n_steps,
+        'bytes_per_step': allocated,
+        'kept_bytes_per_step': kept,
+    }
+
+
+def bench(names=None, n_steps=1e4, agent='random', seed=None,
+          trace_steps=1000):
+    """
+    Benchmark the worlds and print a table of the results.
+
+    Worlds that can't be imported, because something they need
+    isn't installed, are reported and skipped.
+
+    Parameters
+    ----------
+    names : list of str, optional
+        The world modules to benchmark. Defaults to world_names.
+    See bench_world() for the others.
+
+    Returns
+    -------
+    results : list of dict
+    """
+    if names is None:
+        names = world_names
+    results = []
+    for world_name in names:
+        try:
+            results.append(bench_world(
+                world_name, n_steps=n_steps, agent=agent, seed=seed,
+                trace_steps=trace_steps))
+        except ImportError as error:
+            print('Skipping {0}: {1}'.format(world_name, error))
+
+    print()
+    print('{0:<26}{1:>9}{2:>9}{3:>10}{4:>10}{5:>9}{6:>13}'.format(
+        'world', 'sensors', 'actions', 'steps/s', 'ns/step', 'B/step',
+        'kept B/step'))
+    for result in results:
+        print('{0:<26}{1:>9}{2:>9}{3:>10.0f}{4:>10.0f}{5:>9.0f}{6:>13.1f}'
+              .format(result['name'], result['n_sensors'],
+                      result['n_actions'], result['steps_per_second'],
+                      result['ns_per_step'], result['bytes_per_step'],
+                      result['kept_bytes_per_step']))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Benchmark the worlds, with no brain attached.')
+    parser.add_argument(
+        'worlds', nargs='*', default=None,
+        help='The names of the world modules. Defaults to all of them.')
+    parser.add_argument(
+        '-n', '--steps', type=float, default=1e4,
+        help='The number of time steps to time each world.')
+    parser.add_argument(
+        '-a', '--agent', choices=agents, default='random',
+        help='The stand-in agent that chooses the actions.')
+    parser.add_argument(
+        '--seed', type=int, default=None,
+        help='Seed the random number generator before each world.')
+    parser.add_argument(
+        '--trace', type=int, default=1000,
+        help='The number of time steps to trace allocations over.')
+    args = parser.parse_args()
+    bench(args.worlds or None, n_steps=args.steps, agent=args.agent,
+          seed=args.seed, trace_steps=args.trace)
@@ -0,0 +1,271 @@
+"""
+Save suite progress as it happens, so that an interrupted run can resume.
+
+Each suite run gets its own directory in ``log/runs``, named by its run ID.
+It holds
+    run.json : the settings the run was started with,
+    world_NN.json : the result of each world that has finished,
+    world_NN.checkpoint : a pickle of the world and brain that are
+        currently running, refreshed every ``checkpoint_interval`` steps,
+        and
+    results.json : the settings and all the results, once the run
+        is complete.
+Every file is written to a temporary name first and then moved into
+place, so a crash never leaves a half-written file behind.
+"""
+import copy
+import json
+import os
+import pickle
+import time
+
+import numpy as np
+
+from becca_test.action_repeat import ActionRepeat
+
+# runs_directory : str
+#     The default location of the run directories.
+module_path = os.path.dirname(os.path.abspath(__file__))
+runs_directory = os.path.join(module_path, 'log', 'runs')
+# checkpoint_interval : int
+#     The default number of time steps between checkpoints.
+checkpoint_interval = int(1e4)
+
+
+def new_run_id():
+    """
+    Create a run ID from the current date and time and the process ID.
+
+    Returns
+    -------
+    run_id : str
+    """
+    return '_'.join([time.strftime('%Y%m%d_%H%M%S'), str(os.getpid())])
+
+
+def run_directory(run_id, directory=runs_directory):
+    """
+    Find the directory for a run, creating it if necessary.
+
+    Parameters
+    ----------
+    run_id : str
+        The name of the run.
+    directory : str
+        The location of all the run directories.
+
+    Returns
+    -------
+    run_dir : str
+        The full path of the run directory.
+    """
+    run_dir = os.path.join(directory, run_id)
+    if not os.path.isdir(run_dir):
+        os.makedirs(run_dir)
+    return run_dir
+
+
+def _write_atomic(filename, contents, mode='w'):
+    """
+    Write a file so that it is either complete or not there at all.
+    """
+    temp_filename = filename + '.tmp'
+    with open(temp_filename, mode) as temp_file:
+        temp_file.write(contents)
+        temp_file.flush()
+        os.fsync(temp_file.fileno())
+    os.replace(temp_filename, filename)
+
+
+def save_settings(run_dir, settings):
+    """
+    Record the settings a run was started with.
+
+    Parameters
+    ----------
+    run_dir : str
+        The run directory.
+    settings : dict
+        Anything that can be written as json.
+    """
+    _write_atomic(os.path.join(run_dir, 'run.json'), json.dumps(settings))
+
+
+def load_settings(run_dir):
+    """
+    Retrieve the settings a run was started with.
+
+    Parameters
+    ----------
+    run_dir : str
+        The run directory.
+
+    Returns
+    -------
+    settings : dict or None
+        The saved settings, or None if there aren't any.
+    """
+    try:
+        with open(os.path.join(run_dir, 'run.json'), 'r') as settings_file:
+            return json.load(settings_file)
+    except (OSError, ValueError):
+        return None
+
+
+def result_filename(run_dir, index):
+    """
+    Name the file holding the result of one world in a run.
+    """
+    return os.path.join(run_dir, 'world_{0:02}.json'.format(index))
+
+
+def checkpoint_filename(run_dir, index):
+    """
+    Name the file holding the checkpoint of one world in a run.
+    """
+    return os.path.join(run_dir, 'world_{0:02}.checkpoint'.format(index))
+
+
+def save_result(run_dir, index, result):
+    """
+    Record the result of a world that has finished.
+
+    Parameters
+    ----------
+    run_dir : str
+        The run directory.
+    index : int
+        The position of the world in the suite.
+    result : dict
+        Anything that can be written as json.
+    """
+    _write_atomic(result_filename(run_dir, index), json.dumps(result))
+
+
+def load_result(run_dir, index):
+    """
+    Retrieve the result of a world, if it has finished.
+
+    Parameters
+    ----------
+    run_dir : str
+        The run directory.
+    index : int
+        The position of the world in the suite.
+
+    Returns
+    -------
+    result : dict or None
+        The saved result, or None if the world hasn't finished.
+    """
+    try:
+        with open(result_filename(run_dir, index), 'r') as result_file:
+            return json.load(result_file)
+    except (OSError, ValueError):
+        return None
+
+
+def save_results(run_dir, summary):
+    """
+    Record the settings and results of a completed run.
+
+    Parameters
+    ----------
+    run_dir : str
+        The run directory.
+    summary : dict
+        Anything that can be written as json.
+
+    Returns
+    -------
+    filename : str
+        The full path of the results file.
+    """
+    filename = os.path.join(run_dir, 'results.json')
+    _write_atomic(filename, json.dumps(summary))
+    return filename
+
+
+def run(world_class, lifespan, filename, interval=checkpoint_interval,
+        repeat=1):
+    """
+    Run Becca on a world, saving a checkpoint every so often.
+
+    This steps through the same sense-act loop as becca.brain.run().
+    If a checkpoint is already waiting in ``filename``, the world, the brain
+    and the random number generator pick up where it left off.
+    Once the world is finished, the checkpoint is removed.
+
+    Parameters
+    ----------
+    world_class : World
+        The class of the world to run.
+    lifespan : int
+        The number of time steps to run the world.
+    filename : str
+        Where to save and look for the checkpoint.
+    interval : int
+        The number of time steps between checkpoints.
+    repeat : int, optional
+        If more than 1, wrap the world in an ActionRepeat so that
+        the brain decides only every ``repeat`` time steps.
+
+    Returns
+    -------
+    performance : float
+        The average reward per time step over the world's lifespan.
+    world : World
+        The world that was run.
+    n_steps : int
+        The number of time steps run this time. When resuming, this
+        is only the steps that were left.
+    """
+    import becca.brain as becca_brain
+
+    try:
+        with open(filename, 'rb') as checkpoint_file:
+            checkpoint = pickle.load(checkpoint_file)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        checkpoint = None
+
+    if checkpoint is None:
+        world = world_class(lifespan=lifespan)
+        if repeat != 1:
+            world = ActionRepeat(world, repeat)
+        brain = becca_brain.Brain(world)
+        # Start at a resting state.
+        actions = np.zeros(world.n_actions)
+        sensors, reward = world.step(actions)
+    else:
+        world = checkpoint['world']
+        brain = checkpoint['brain']
+        sensors = checkpoint['sensors']
+        reward = checkpoint['reward']
+        np.random.set_state(checkpoint['random_state'])
+        print('Resuming', world.name, 'at time step', world.timestep)
+
+    # An ActionRepeat counts brain decisions. Count world time steps.
+    inner_world = world.world if isinstance(world, ActionRepeat) else world
+    start_timestep = inner_world.timestep
+    while world.is_alive():
+        actions = brain.sense_act_learn(copy.deepcopy(sensors), reward)
+        sensors, reward = world.step(copy.copy(actions))
+        if world.timestep % interval == 0 and world.is_alive():
+            checkpoint = {
+                'world': world,
+                'brain': brain,
+                'sensors': sensors,
+                'reward': reward,
+                'random_state': np.random.get_state(),
+            }
+            _write_atomic(filename, pickle.dumps(checkpoint), mode='wb')
+
+    try:
+        world.close_world(brain)
+    except AttributeError:
+        print("Closing", world.name)
+    if os.path.isfile(filename):
+        os.remove(filename)
+
+    n_steps = inner_world.timestep - start_timestep
+    return brain.report_performance(), world, n_steps
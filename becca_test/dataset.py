@@ -0,0 +1,351 @@
+"""
+Generate datasets of logged experience for training brains offline.
+
+A scripted policy drives a world, with no brain in the loop, and the
+sensors, actions and rewards from every time step are written to disk.
+The work is split into shards that run in parallel, one process each.
+Each shard writes its experience in chunks of a fixed number of time
+steps, so memory use stays bounded however long the dataset is.
+
+A dataset is a directory in ``log/datasets``. ``manifest.json``
+describes it and lists every chunk. A chunk is three .npy files,
+for the sensors, actions and rewards, one row per time step.
+
+The policies are
+    'random' Each action is taken with probability 1 / n_actions.
+    'greedy' The world's optimal_action(), except for a random action
+        a fraction epsilon of the time. Only worlds that know their
+        optimal action can use this, such as grid_1D and synthetic.
+    'replay' Actions are read from a .npy file, one row per time step,
+        starting over from the top if it runs out.
+
+Usage
+To generate a million time steps of grid_1D in four shards
+
+    python3 -m becca_test.dataset grid_1D -n 1000000 --shards 4
+
+To read a dataset back, a chunk at a time
+
+    import becca_test.dataset as dataset
+    for sensors, actions, rewards in dataset.chunks(dataset_dir):
+        ...
+"""
+import argparse
+import json
+import multiprocessing
+import os
+
+import numpy as np
+
+import becca_test.checkpoint as checkpoint
+import becca_test.world_tools as wtools
+from becca_test.world_tools import world_class
+
+# policies : list of str
+#     The names of the scripted policies.
+policies = ['random', 'greedy', 'replay']
+# datasets_directory : str
+#     The default location of the dataset directories.
+module_path = os.path.dirname(os.path.abspath(__file__))
+datasets_directory = os.path.join(module_path, 'log', 'datasets')
+# chunk_steps : int
+#     The default number of time steps in each chunk.
+chunk_steps = int(1e4)
+
+
+def random_actions(n_steps, n_actions):
+    """
+    Draw random action commands, about one per time step.
+
+    Parameters
+    ----------
+    n_steps, n_actions : int
+        The number of time steps and actions.
+
+    Returns
+    -------
+    actions : 2D array of floats
+        One row of action commands per time step.
+    """
+    return (np.random.random_sample((n_steps, n_actions)) <
+            1. / n_actions).astype(float)
+
+
+def greedy_steps(world, n_steps, epsilon):
+    """
+    Step a world, heading for the optimum most of the time.
+
+    Parameters
+    ----------
+    world : World
+        The world to step. It needs an optimal_action() method.
+    n_steps : int
+        The number of time steps.
+    epsilon : float
+        The fraction of time steps on which to take a random action.
+
+    Returns
+    -------
+    sensors, actions : 2D arrays of floats
+        One row of sensor values and action commands per time step.
+    rewards : array of floats
+        The reward after each time step.
+    """
+    actions = random_actions(n_steps, world.n_actions)
+    explore = np.random.random_sample(n_steps) < epsilon
+    sensors = np.zeros((n_steps, world.n_sensors),
+                       dtype=getattr(world, 'sensor_dtype', np.float64))
+    rewards = np.zeros(n_steps)
+    for i_step in range(n_steps):
+        if not explore[i_step]:
+            actions[i_step] = world.optimal_action()
+        step_sensors, rewards[i_step] = world.step(actions[i_step].copy())
+        if isinstance(step_sensors, tuple):
+            step_sensors = wtools.sparse_to_dense(
+                step_sensors[0], step_sensors[1], world.n_sensors)
+        sensors[i_step] = step_sensors
+    return sensors, actions, rewards
+
+
+def _save_atomic(filename, array):
+    """
+    Save an array so that the file is either complete or not there at all.
+    """
+    temp_filename = filename + '.tmp'
+    with open(temp_filename, 'wb') as temp_file:
+        np.save(temp_file, array)
+    os.replace(temp_filename, filename)
+
+
+def _write_shard(dataset_dir, i_shard, world_name, world_kwargs, policy,
+                 first_step, n_steps, steps_per_chunk, seed, epsilon,
+                 replay_file):
+    """
+    Generate one shard of a dataset, in its own process.
+
+    Returns
+    -------
+    shard : dict
+        The shard's entry in the manifest.
+    """
+    np.random.seed(seed)
+    world = world_class(world_name)(lifespan=n_steps, **world_kwargs)
+    if policy == 'replay':
+        replay_actions = np.load(replay_file, mmap_mode='r')
+
+    chunks = []
+    for chunk_start in range(0, n_steps, steps_per_chunk):
+        n_chunk_steps = min(steps_per_chunk, n_steps - chunk_start)
+        if policy == 'greedy':
+            sensors, actions, rewards = greedy_steps(
+                world, n_chunk_steps, epsilon)
+        else:
+            if policy == 'random':
+                actions = random_actions(n_chunk_steps, world.n_actions)
+            else:
+                rows = (first_step + chunk_start +
+                        np.arange(n_chunk_steps)) % replay_actions.shape[0]
+                actions = np.asarray(replay_actions[rows], dtype=float)
+            sensors, rewards = wtools.step_many(world, actions)
+
+        prefix = 'shard_{0:03}_chunk_{1:05}_'.format(i_shard, len(chunks))
+        chunk = {'n_steps': n_chunk_steps}
+        for part, array in [('sensors', sensors), ('actions', actions),
+                            ('rewards', rewards)]:
+            chunk[part] = prefix + part + '.npy'
+            _save_atomic(os.path.join(dataset_dir, chunk[part]), array)
+        chunks.append(chunk)
+
+    return {
+        'shard': i_shard,
+        'seed': seed,
+        'first_step': first_step,
+        'n_steps': n_steps,
+        'n_sensors': world.n_sensors,
+        'n_actions': world.n_actions,
+        'chunks': chunks,
+    }
+
+
+def generate(world_name, n_steps, policy='random', n_shards=None,
+             steps_per_chunk=chunk_steps, seed=None, epsilon=.1,
+             replay_file=None, dataset_id=None,
+             directory=datasets_directory, **world_kwargs):
+    """
+    Generate a dataset of experience in a world.
+
+    Parameters
+    ----------
+    world_name : str
+        The name of the world module, such as 'grid_1D'.
+    n_steps : int
+        The total number of time steps, across all the shards.
+    policy : str
+        One of policies.
+    n_shards : int, optional
+        The number of shards to generate in parallel.
+        Defaults to the number of CPUs. It has to be given along
+        with seed, since each shard starts its own world.
+    steps_per_chunk : int
+        The number of time steps in each chunk. Each shard holds one
+        chunk in memory at a time.
+    seed : int, optional
+        If given, shard i seeds its random number generator with seed + i,
+        making the dataset reproducible for the same n_shards.
+    epsilon : float
+        For the greedy policy, the fraction of random actions.
+    replay_file : str, optional
+        For the replay policy, a .npy file of actions, one row per
+        time step. The shards replay consecutive stretches of it.
+    dataset_id : str, optional
+        The name of the dataset directory. Defaults to the world
+        and policy names, with the date and time.
+    directory : str
+        The location of all the dataset directories.
+    Any other keyword arguments are passed on to the World.
+
+    Returns
+    -------
+    dataset_dir : str
+        The full path of the new dataset.
+    """
+    if policy not in policies:
+        raise ValueError('policy needs to be one of {0}'.format(
+            ', '.join(policies)))
+    if policy == 'replay' and replay_file is None:
+        raise ValueError('The replay policy needs a replay_file.')
+    if (policy == 'greedy' and
+            not hasattr(world_class(world_name), 'optimal_action')):
+        raise ValueError('{0} has no optimal_action() to be greedy about.'
+                         .format(world_name))
+    if n_shards is None:
+        if seed is not None:
+            raise ValueError(' '.join([
+                'A seeded dataset needs n_shards, so that it is the same',
+                'whatever the number of CPUs. Each shard starts its',
+                'own world, so the split changes the experience.']))
+        n_shards = multiprocessing.cpu_count()
+    n_steps = int(n_steps)
+    n_shards = max(1, min(n_shards, n_steps))
+    if dataset_id is None:
+        dataset_id = '_'.join([world_name, policy, checkpoint.new_run_id()])
+        # Don't overwrite a dataset made earlier in the same second.
+        while os.path.isdir(os.path.join(directory, dataset_id)):
+            dataset_id += '_'
+    dataset_dir = checkpoint.run_directory(dataset_id, directory=directory)
+
+    shard_steps = [len(steps) for steps in
+                   np.array_split(np.arange(n_steps), n_shards)]
+    first_steps = np.cumsum([0] + shard_steps[:-1])
+    shard_args = []
+    for i_shard in range(n_shards):
+        shard_seed = None if seed is None else seed + i_shard
+        shard_args.append((
+            dataset_dir, i_shard, world_name, world_kwargs, policy,
+            int(first_steps[i_shard]), shard_steps[i_shard],
+            int(steps_per_chunk), shard_seed, epsilon, replay_file))
+    if n_shards == 1:
+        shards = [_write_shard(*shard_args[0])]
+    else:
+        with multiprocessing.Pool(n_shards) as pool:
+            shards = pool.starmap(_write_shard, shard_args)
+
+    manifest = {
+        'world': world_name,
+        'world_kwargs': world_kwargs,
+        'policy': policy,
+        'epsilon': epsilon if policy == 'greedy' else None,
+        'replay_file': replay_file,
+        'seed': seed,
+        'n_steps': n_steps,
+        'steps_per_chunk': int(steps_per_chunk),
+        'n_sensors': shards[0]['n_sensors'],
+        'n_actions': shards[0]['n_actions'],
+        'shards': shards,
+    }
+    checkpoint._write_atomic(os.path.join(dataset_dir, 'manifest.json'),
+                             json.dumps(manifest, indent=2))
+    print('Wrote {0} time steps of {1} to {2}'.format(
+        n_steps, world_name, dataset_dir))
+    return dataset_dir
+
+
+def load_manifest(dataset_dir):
+    """
+    Read the description of a dataset.
+
+    Parameters
+    ----------
+    dataset_dir : str
+        The full path of the dataset.
+
+    Returns
+    -------
+    manifest : dict
+    """
+    with open(os.path.join(dataset_dir, 'manifest.json'), 'r') as manifest:
+        return json.load(manifest)
+
+
+def chunks(dataset_dir):
+    """
+    Read a dataset back, one chunk at a time, in order.
+
+    The arrays are memory mapped, so only the parts that are used
+    are read from disk.
+
+    Parameters
+    ----------
+    dataset_dir : str
+        The full path of the dataset.
+
+    Yields
+    ------
+    sensors, actions : 2D arrays of floats
+        One row of sensor values and action commands per time step.
+    rewards : array of floats
+        The reward after each time step.
+    """
+    manifest = load_manifest(dataset_dir)
+    for shard in manifest['shards']:
+        for chunk in shard['chunks']:
+            yield tuple(
+                np.load(os.path.join(dataset_dir, chunk[part]),
+                        mmap_mode='r')
+                for part in ['sensors', 'actions', 'rewards'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Generate a dataset of experience in a world.')
+    parser.add_argument(
+        'world', help='The name of the world module, such as grid_1D.')
+    parser.add_argument(
+        '-n', '--steps', type=float, default=1e5,
+        help='The total number of time steps.')
+    parser.add_argument(
+        '-p', '--policy', choices=policies, default='random',
+        help='The scripted policy that chooses the actions.')
+    parser.add_argument(
+        '-s', '--shards', type=int, default=None,
+        help='The number of shards to generate in parallel.')
+    parser.add_argument(
+        '-c', '--chunk', type=int, default=chunk_steps,
+        help='The number of time steps in each chunk.')
+    parser.add_argument(
+        '--seed', type=int, default=None,
+        help=' '.join(['Seed the shards, to make the dataset',
+                       'reproducible. Needs --shards.']))
+    parser.add_argument(
+        '-e', '--epsilon', type=float, default=.1,
+        help='The fraction of random actions for the greedy policy.')
+    parser.add_argument(
+        '-r', '--replay', default=None,
+        help='The .npy file of actions for the replay policy.')
+    args = parser.parse_args()
+    if args.seed is not None and args.shards is None:
+        parser.error('--seed needs --shards, to make the dataset the same '
+                     'on every machine.')
+    generate(args.world, args.steps, policy=args.policy,
+             n_shards=args.shards, steps_per_chunk=args.chunk,
+             seed=args.seed, epsilon=args.epsilon, replay_file=args.replay)
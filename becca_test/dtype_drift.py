@@ -0,0 +1,122 @@
+"""
+Check that smaller data types don't change what the image worlds sense.
+
+world_tools.set_dtypes() lets the worlds keep their sensors as float32
+and their images as uint8, to save memory traffic. This runs the image
+worlds through the same seeded time steps twice, once with float64
+sensors and images and once with float32 sensors and uint8 images,
+and checks that no sensor ever differs by more than max_drift.
+
+Usage
+
+    python3 -m becca_test.dtype_drift
+
+It exits with a status of 1 if any world drifts too far.
+The check can also be run with pytest.
+
+    python3 -m pytest becca_test/dtype_drift.py
+"""
+import importlib
+import sys
+
+import numpy as np
+
+import becca_test.world_tools as wtools
+
+# world_names : list of str
+#     The modules of the worlds to check.
+world_names = ['image_1D', 'image_2D']
+# max_drift : float
+#     The largest difference allowed between any sensor value
+#     with the small data types and with float64.
+max_drift = 1e-6
+# small_dtypes, full_dtypes : dict
+#     The data types being compared, as arguments to set_dtypes().
+small_dtypes = {'sensors': np.float32, 'images': np.uint8}
+full_dtypes = {'sensors': np.float64, 'images': np.float64}
+
+
+def run_sensors(world_name, dtypes, n_steps, seed):
+    """
+    Run a world with random actions and collect its sensors.
+
+    Parameters
+    ----------
+    world_name : str
+        The name of the world module, such as 'image_2D'.
+    dtypes : dict
+        The arguments to set_dtypes().
+    n_steps : int
+        The number of time steps to run.
+    seed : int
+        Seeds both the world and the actions.
+
+    Returns
+    -------
+    sensors : 2D array of floats
+        One row of sensor values per time step.
+    """
+    saved_dtypes = (wtools.sensor_dtype, wtools.image_dtype)
+    wtools.set_dtypes(**dtypes)
+    try:
+        module = importlib.import_module('becca_test.' + world_name)
+        np.random.seed(seed)
+        world = module.World(lifespan=n_steps)
+    finally:
+        wtools.set_dtypes(*saved_dtypes)
+
+    action_state = np.random.RandomState(seed)
+    sensors = np.zeros((n_steps, world.n_sensors))
+    for i_step in range(n_steps):
+        actions = (action_state.random_sample(world.n_actions) < .2)
+        step_sensors, _ = world.step(actions.astype(float))
+        sensors[i_step] = step_sensors
+    return sensors
+
+
+def sensor_drift(world_name, n_steps=200, seed=0):
+    """
+    Find the largest sensor difference between small and full dtypes.
+
+    Parameters
+    ----------
+    world_name : str
+        The name of the world module.
+    n_steps : int
+        The number of time steps to compare.
+    seed : int
+        The seed for both runs.
+
+    Returns
+    -------
+    drift : float
+        The largest absolute difference in any sensor on any time step.
+    """
+    small = run_sensors(world_name, small_dtypes, n_steps, seed)
+    full = run_sensors(world_name, full_dtypes, n_steps, seed)
+    return float(np.max(np.abs(small - full)))
+
+
+def test_sensor_drift():
+    """
+    Check every world in world_names against max_drift.
+    """
+    for world_name in world_names:
+        drift = sensor_drift(world_name)
+        assert drift <= max_drift, (
+            '{0} sensors drifted by {1:.3} with {2}'.format(
+                world_name, drift, small_dtypes))
+
+
+if __name__ == '__main__':
+    too_far = False
+    for name in world_names:
+        name_drift = sensor_drift(name)
+        print('{0}: largest sensor difference {1:.3}'.format(
+            name, name_drift))
+        if name_drift > max_drift:
+            too_far = True
+    if too_far:
+        print('Some sensors drifted by more than', max_drift)
+        sys.exit(1)
+    print('All within', max_drift)
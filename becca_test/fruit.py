@@ -16,8 +16,8 @@ many machine learning algorithms.
 """
 import numpy as np
 
-import becca.brain as becca_brain
-from becca.base_world import World as BaseWorld
+from becca_test.base_world import World as BaseWorld
+import becca_test.world_tools as wtools
 
 
 class World(BaseWorld):
@@ -60,6 +60,9 @@ class World(BaseWorld):
         #     [1., 0., 1., 0.]
         # indicating a ripe peach.
         self.n_sensors = 4
+        # sensor_dtype : numpy dtype
+        #     The data type of the sensor array. See world_tools.py.
+        self.sensor_dtype = wtools.sensor_dtype
 
         # Break out the actions into
         #     0: eat
@@ -75,6 +78,11 @@ class World(BaseWorld):
         self.acted = False
         self.eat = False
         self.discard = False
+        # sparse_sensors : bool
+        #     If True, step() returns the sensors as a pair of arrays,
+        #     the sorted indices of the active sensors and their values,
+        #     rather than as a dense array. See sense_sparse().
+        self.sparse_sensors = False
 
         # Grab a piece of fruit to get started.
         self.grab_fruit()
@@ -94,7 +102,7 @@ class World(BaseWorld):
         self.edible = ((self.size == 0) and (self.color == 0) or
                        (self.size == 1) and (self.color == 1))
 
-        self.sensors = np.zeros(self.n_sensors)
+        self.sensors = np.zeros(self.n_sensors, dtype=self.sensor_dtype)
         if self.size == 0:
             self.sensors[0] = 1.
         if self.size == 1:
@@ -147,8 +155,89 @@ class World(BaseWorld):
         if self.acted:
             self.grab_fruit()
 
+        if self.sparse_sensors:
+            return self.sense_sparse(), self.reward
         return self.sensors, self.reward
 
+    def step_many(self, actions):
+        """
+        Work through a whole sequence of actions at once.
+
+        This follows the same rules as step(), but the fruit for all
+        the time steps are grabbed together, so a seeded run
+        doesn't follow the same course as calling step() repeatedly.
+
+        Parameters
+        ----------
+        actions : 2D array of floats
+            One row of action commands per time step.
+
+        Returns
+        -------
+        sensors : 2D array of floats
+            One row of sensor values per time step.
+            These are always dense.
+        rewards : array of floats
+            The reward after each time step.
+        """
+        actions = np.asarray(actions, dtype=float).reshape(
+            -1, self.n_actions)
+        n_steps = actions.shape[0]
+        if n_steps == 0:
+            return (np.zeros((0, self.n_sensors), dtype=self.sensor_dtype),
+                    np.zeros(0))
+        eat = actions[:, 0] > .5
+        discard = np.logical_and(np.logical_not(eat), actions[:, 1] > .5)
+        acted = np.logical_or(eat, discard)
+
+        # The fruit in hand, followed by one new one for each action.
+        n_new = int(np.sum(acted))
+        sizes = np.concatenate(([self.size], np.random.randint(2, size=n_new)))
+        colors = np.concatenate(
+            ([self.color], np.random.randint(2, size=n_new)))
+        edible = sizes == colors
+        # Which fruit is in hand before and after each time step.
+        fruit_after = np.cumsum(acted)
+        fruit_before = fruit_after - acted
+
+        rewards = np.full(n_steps, -.1)
+        edible_before = edible[fruit_before]
+        rewards[np.logical_or(np.logical_and(eat, edible_before),
+                              np.logical_and(discard, ~edible_before))] = 1.
+        rewards[np.logical_or(np.logical_and(eat, ~edible_before),
+                              np.logical_and(discard, edible_before))] = -.9
+
+        sensors = np.zeros((n_steps, self.n_sensors), dtype=self.sensor_dtype)
+        sensors[np.arange(n_steps), sizes[fruit_after]] = 1.
+        sensors[np.arange(n_steps), 2 + colors[fruit_after]] = 1.
+
+        self.timestep += n_steps
+        self.actions = actions[-1]
+        self.eat = bool(eat[-1])
+        self.discard = bool(discard[-1])
+        self.acted = bool(acted[-1])
+        self.reward = rewards[-1]
+        self.size = int(sizes[-1])
+        self.color = int(colors[-1])
+        self.edible = bool(edible[-1])
+        self.sensors = sensors[-1].copy()
+        return sensors, rewards
+
+    def sense_sparse(self):
+        """
+        Represent the current fruit as two active sensors.
+
+        Returns
+        -------
+        indices : array of ints
+            The indices of the active sensors, in increasing order.
+            One is size (0 or 1) and the other is color (2 or 3).
+        values : array of floats
+            The values of the active sensors.
+        """
+        return (np.array([self.size, 2 + self.color]),
+                np.ones(2, dtype=self.sensor_dtype))
+
     def visualize(self, brain):
         """
         Show what's going on in the world.
@@ -168,4 +257,5 @@ class World(BaseWorld):
 
 
 if __name__ == "__main__":
+    import becca.brain as becca_brain
     becca_brain.run(World())
@@ -14,8 +14,8 @@ To run this world standalone from the command line
 """
 import numpy as np
 
-import becca.brain as becca_brain
-from becca.base_world import World as BaseWorld
+from becca_test.base_world import World as BaseWorld
+import becca_test.world_tools as wtools
 
 
 class World(BaseWorld):
@@ -23,8 +23,9 @@ class World(BaseWorld):
     One-dimensional grid world.
 
     In this task, the brain steps forward and backward along
-    a nine-position line. The fourth position is rewarded and
-    the ninth position is punished. There is also a slight
+    a line, nine positions long by default. The position a third
+    of the way along (the fourth of nine) is rewarded and
+    the last position is punished. There is also a slight
     punishment for effort expended in taking actions.
     Occasionally the brain will get
     involuntarily bumped to a random position on the line.
@@ -35,7 +36,7 @@ class World(BaseWorld):
     Most of this world's attributes are defined in base_world.py.
     The few that aren't are defined below.
     """
-    def __init__(self, lifespan=None):
+    def __init__(self, lifespan=None, size=9):
         """
         Initialize the world.
 
@@ -43,14 +44,48 @@ class World(BaseWorld):
         ----------
         lifespan : int
             The number of time steps to continue the world.
+        size : int
+            The number of positions in the world.
         """
         BaseWorld.__init__(self, lifespan)
         self.name = 'grid_1D'
         print("Entering", self.name)
 
-        self.n_sensors = 9
+        self.n_sensors = size
+        # sensor_dtype : numpy dtype
+        #     The data type of the sensor array. See world_tools.py.
+        self.sensor_dtype = wtools.sensor_dtype
         self.num_positions = self.n_sensors
-        self.n_actions = 8
+        # max_step : int
+        #     The largest number of positions that a single action can
+        #     move the agent. There is one action for each step size in
+        #     each direction.
+        self.max_step = (self.num_positions - 1) // 2
+        self.n_actions = 2 * self.max_step
+        # target_position, trap_position : int
+        #     The positions that are rewarded and punished, respectively.
+        self.target_position = self.num_positions // 3
+        self.trap_position = self.num_positions - 1
+        # Find the step size as combinations of the action commands.
+        # For the default world, with max_step of 4:
+        #     action[i]     result
+        #            0      1 step to the right
+        #            1      2 steps to the right
+        #            2      3 steps to the right
+        #            3      4 steps to the right
+        #            4      1 step to the left
+        #            5      2 steps to the left
+        #            6      3 steps to the left
+        #            7      4 steps to the left
+        # Action cost is an approximation of metabolic energy.
+        # Action cost is proportional to the number of steps taken.
+        # action_weights : 2D array of floats
+        #     The first column holds each action's contribution to the
+        #     step size and the second holds its contribution to energy.
+        steps = np.arange(1., self.max_step + 1.)
+        step_weights = np.concatenate((steps, -steps))
+        self.action_weights = np.column_stack(
+            (step_weights, np.abs(step_weights)))
         self.action = np.zeros(self.n_actions)
         self.energy = 0.
         # energy_cost : float
@@ -67,6 +102,11 @@ class World(BaseWorld):
         #     The fraction of time steps on which the agent jumps to
         #     a random position.
         self.jump_fraction = 0.1
+        # sparse_sensors : bool
+        #     If True, step() returns the sensors as a pair of arrays,
+        #     the sorted indices of the active sensors and their values,
+        #     rather than as a dense array. See sense_sparse().
+        self.sparse_sensors = False
 
         self.visualize_interval = 1e6
 
@@ -90,34 +130,9 @@ class World(BaseWorld):
         self.action = np.round(self.action)
         self.timestep += 1
 
-        # Find the step size as combinations of the action commands
-        #     action[i]     result
-        #            0      1 step to the right
-        #            1      2 steps to the right
-        #            2      3 steps to the right
-        #            3      4 steps to the right
-        #            4      1 step to the left
-        #            5      2 steps to the left
-        #            6      3 steps to the left
-        #            7      4 steps to the left
-        step_size = (self.action[0] +
-                     self.action[1] * 2 +
-                     self.action[2] * 3 +
-                     self.action[3] * 4 -
-                     self.action[4] -
-                     self.action[5] * 2 -
-                     self.action[6] * 3 -
-                     self.action[7] * 4)
-        # Action cost is an approximation of metabolic energy.
-        # Action cost is proportional to the number of steps taken.
-        self.energy = (self.action[0] +
-                       self.action[1] * 2 +
-                       self.action[2] * 3 +
-                       self.action[3] * 4 +
-                       self.action[4] +
-                       self.action[5] * 2 +
-                       self.action[6] * 3 +
-                       self.action[7] * 4)
+        # Find the step size and the energy expended
+        # as combinations of the action commands.
+        step_size, self.energy = np.dot(self.action, self.action_weights)
 
         self.world_state += step_size
 
@@ -125,17 +140,79 @@ class World(BaseWorld):
         if np.random.random_sample() < self.jump_fraction:
             self.world_state = self.num_positions * np.random.random_sample()
 
-        # Ensure that the world state falls between 0 and 9.
+        # Ensure that the world state falls between 0 and num_positions.
         self.world_state -= self.num_positions * np.floor_divide(
             self.world_state, self.num_positions)
         self.simple_state = int(np.floor(self.world_state))
-        if self.simple_state == 9:
+        if self.simple_state == self.num_positions:
             self.simple_state = 0
 
-        sensors = self.sense()
+        if self.sparse_sensors:
+            sensors = self.sense_sparse()
+        else:
+            sensors = self.sense()
         reward = self.assign_reward()
         return sensors, reward
 
+    def step_many(self, actions):
+        """
+        Advance the world through a whole sequence of actions at once.
+
+        This follows the same rules as step(), but the random numbers
+        are drawn for all the time steps together, so a seeded run
+        doesn't follow the same course as calling step() repeatedly.
+
+        Parameters
+        ----------
+        actions : 2D array of floats
+            One row of action commands per time step.
+
+        Returns
+        -------
+        sensors : 2D array of floats
+            One row of sensor values per time step.
+            These are always dense.
+        rewards : array of floats
+            The reward after each time step.
+        """
+        # Subclasses that step, sense or reward differently
+        # have to be stepped one time step at a time.
+        if (type(self).step is not World.step or
+                type(self).sense is not World.sense or
+                type(self).assign_reward is not World.assign_reward):
+            return wtools.step_sequentially(self, actions)
+
+        actions = np.round(np.asarray(actions, dtype=float).reshape(
+            -1, self.n_actions))
+        n_steps = actions.shape[0]
+        if n_steps == 0:
+            return (np.zeros((0, self.n_sensors), dtype=self.sensor_dtype),
+                    np.zeros(0))
+        step_sizes, energies = np.dot(actions, self.action_weights).T
+        jumps = np.random.random_sample(n_steps) < self.jump_fraction
+        jump_positions = self.num_positions * np.random.random_sample(n_steps)
+        world_states = wtools.accumulate_with_jumps(
+            self.world_state, step_sizes, jumps, jump_positions)
+        world_states -= self.num_positions * np.floor_divide(
+            world_states, self.num_positions)
+        simple_states = np.floor(world_states).astype(int)
+        simple_states[simple_states == self.num_positions] = 0
+
+        sensors = np.zeros((n_steps, self.n_sensors), dtype=self.sensor_dtype)
+        sensors[np.arange(n_steps), simple_states] = 1
+        positions = world_states.astype(int)
+        rewards = ((positions == self.target_position).astype(float) -
+                   (positions == self.trap_position).astype(float) -
+                   energies * self.energy_cost)
+        rewards = np.maximum(rewards, -1.)
+
+        self.timestep += n_steps
+        self.action = actions[-1]
+        self.energy = energies[-1]
+        self.world_state = world_states[-1]
+        self.simple_state = int(simple_states[-1])
+        return sensors, rewards
+
     def sense(self):
         """
         Represent the presence or absence of the current position in the bin.
@@ -145,10 +222,24 @@ class World(BaseWorld):
         sensors : array of float
             The current sensor values.
         """
-        sensors = np.zeros(self.n_sensors)
+        sensors = np.zeros(self.n_sensors, dtype=self.sensor_dtype)
         sensors[self.simple_state] = 1
         return sensors
 
+    def sense_sparse(self):
+        """
+        Represent the current position as a single active sensor.
+
+        Returns
+        -------
+        indices : array of ints
+            The indices of the active sensors, in increasing order.
+        values : array of floats
+            The values of the active sensors.
+        """
+        return (np.array([self.simple_state]),
+                np.ones(1, dtype=self.sensor_dtype))
+
     def assign_reward(self):
         """
         Calculate the total reward corresponding to the current state
@@ -159,9 +250,9 @@ class World(BaseWorld):
             The reward associated the set of input sensors.
         """
         reward = 0.
-        if int(self.world_state) == 3:
+        if int(self.world_state) == self.target_position:
             reward += 1.
-        if int(self.world_state) == 8:
+        if int(self.world_state) == self.trap_position:
             reward -= 1.
         # Punish actions just a little
         reward -= self.energy * self.energy_cost
@@ -169,6 +260,18 @@ class World(BaseWorld):
 
         return reward
 
+    def optimal_action(self):
+        """
+        Choose the action that heads most directly for the target.
+
+        Returns
+        -------
+        action : array of floats
+            The action commands.
+        """
+        return wtools.ring_action(self.simple_state, self.target_position,
+                                  self.num_positions, self.max_step)
+
     def visualize(self):
         """
         Show what's going on in the world.
@@ -184,4 +287,5 @@ class World(BaseWorld):
 
 
 if __name__ == "__main__":
+    import becca.brain as becca_brain
     becca_brain.run(World())
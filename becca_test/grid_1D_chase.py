@@ -9,8 +9,8 @@ to sensory information.
 """
 import numpy as np
 
-import becca.brain as becca_brain
-from becca.base_world import World as BaseWorld
+from becca_test.base_world import World as BaseWorld
+import becca_test.world_tools as wtools
 
 
 class World(BaseWorld):
@@ -26,7 +26,7 @@ class World(BaseWorld):
     Most of this world's attributes are defined in base_world.py.
     The few that aren't are defined below.
     """
-    def __init__(self, lifespan=None):
+    def __init__(self, lifespan=None, size=7):
         """
         Initialize the world.
 
@@ -34,6 +34,8 @@ class World(BaseWorld):
         ----------
         lifespan : int
             The number of time steps to continue the world.
+        size : int
+            The number of positions in the world.
         """
         BaseWorld.__init__(self, lifespan)
         self.name = 'grid_1D_chase'
@@ -41,9 +43,32 @@ class World(BaseWorld):
 
         # size : int
         #     The number of positions in the 1 dimensional grid.
-        self.size = 7
+        self.size = size
         self.n_sensors = self.size + 2 * (self.size - 1)
         self.n_actions = 2 * (self.size - 1)
+        # sensor_dtype : numpy dtype
+        #     The data type of the sensor array. See world_tools.py.
+        self.sensor_dtype = wtools.sensor_dtype
+        # Find the step size as combinations of the action commands.
+        # For world of size 5:
+        #     action[i]     result
+        #            0      1 step to the right
+        #            1      2 steps to the right
+        #            2      3 steps to the right
+        #            3      4 steps to the right
+        #            4      1 step to the left
+        #            5      2 steps to the left
+        #            6      3 steps to the left
+        #            7      4 steps to the left
+        # Action cost is an approximation of metabolic energy.
+        # Action cost is proportional to the number of steps taken.
+        # action_weights : 2D array of floats
+        #     The first column holds each action's contribution to the
+        #     step size and the second holds its contribution to energy.
+        scale = np.arange(self.size - 1) + 1.
+        step_weights = np.concatenate((scale, -scale))
+        self.action_weights = np.column_stack(
+            (step_weights, np.abs(step_weights)))
         self.reward = 0.
         self.action = np.zeros(self.n_actions)
         # jump_fraction : float
@@ -56,13 +81,18 @@ class World(BaseWorld):
         # energy_cost : float
         #     The punishment per position step taken.
         self.energy_cost = 1e-2
-        self.sensors = np.zeros(self.n_sensors)
+        self.sensors = np.zeros(self.n_sensors, dtype=self.sensor_dtype)
         # position : int
         #     The position of the agent in the world.
         self.position = 2
         # target_position : int
         #     The position of the target in the world.
         self.target_position = 1
+        # sparse_sensors : bool
+        #     If True, step() returns the sensors as a pair of arrays,
+        #     the sorted indices of the active sensors and their values,
+        #     rather than as a dense array. See sense_sparse().
+        self.sparse_sensors = False
 
         self.visualize_interval = 1e6
 
@@ -86,26 +116,9 @@ class World(BaseWorld):
         self.action = np.round(self.action)
         self.timestep += 1
 
-        # Find the step size as combinations of the action commands.
-        # For world of size 5:
-        #     action[i]     result
-        #            0      1 step to the right
-        #            1      2 steps to the right
-        #            2      3 steps to the right
-        #            3      4 steps to the right
-        #            4      1 step to the left
-        #            5      2 steps to the left
-        #            6      3 steps to the left
-        #            7      4 steps to the left
-        scale = np.arange(self.size - 1) + 1.
-        step_size = (np.sum(self.action[:self.size - 1] * scale) -
-                     np.sum(self.action[self.size - 1:
-                                        2 * (self.size - 1)] * scale))
-        # Action cost is an approximation of metabolic energy.
-        # Action cost is proportional to the number of steps taken.
-        self.energy = (np.sum(self.action[:self.size - 1] * scale) +
-                       np.sum(self.action[self.size - 1:
-                                          2 * (self.size - 1)] * scale))
+        # Find the step size and the energy expended
+        # as combinations of the action commands.
+        step_size, self.energy = np.dot(self.action, self.action_weights)
 
         self.position += step_size
         self.position = np.minimum(self.position, self.size - 1)
@@ -113,6 +126,8 @@ class World(BaseWorld):
         self.assign_reward()
         self.move_target()
 
+        if self.sparse_sensors:
+            return self.sense_sparse(), self.reward
         self.sensors = self.sense()
 
         return self.sensors, self.reward
@@ -126,7 +141,7 @@ class World(BaseWorld):
         array of floats
             The set of sensor values.
         """
-        sensors = np.zeros(self.n_sensors)
+        sensors = np.zeros(self.n_sensors, dtype=self.sensor_dtype)
         # Sense the agent's presence in each bin.
         sensors[self.position] = 1
         # Sense the relative distance to the target.
@@ -137,6 +152,26 @@ class World(BaseWorld):
             sensors[2 * (self.size - 1) + np.abs(distance)] = 1
         return sensors
 
+    def sense_sparse(self):
+        """
+        Represent the world's internal state as active sensor indices.
+
+        Returns
+        -------
+        indices : array of ints
+            The indices of the active sensors, in increasing order.
+            The position sensors all come before the distance sensors.
+        values : array of floats
+            The values of the active sensors.
+        """
+        distance = self.position - self.target_position
+        if distance < 0:
+            distance_index = self.size - 1 + np.abs(distance)
+        else:
+            distance_index = 2 * (self.size - 1) + np.abs(distance)
+        return (np.array([self.position, distance_index]),
+                np.ones(2, dtype=self.sensor_dtype))
+
     def move_target(self):
         """
         Move the target to a new position that is not already occupied.
@@ -172,4 +207,5 @@ class World(BaseWorld):
 
 
 if __name__ == "__main__":
+    import becca.brain as becca_brain
     becca_brain.run(World())
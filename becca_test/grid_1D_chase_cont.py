@@ -11,8 +11,8 @@ To run this world from the command line
     python3 grid_1D_chase_cont
 
 """
-import becca.brain as becca_brain
 from becca_test.grid_1D_chase import World as Grid_1D_Chase_World
+import becca_test.world_tools as wtools
 
 
 class World(Grid_1D_Chase_World):
@@ -41,6 +41,13 @@ class World(Grid_1D_Chase_World):
         distance = self.position - self.target_position
         return (self.position, distance)
 
+    def sense_sparse(self):
+        """
+        Generate the sensor values as active indices and their values.
+        """
+        return wtools.dense_to_sparse(self.sense())
+
 
 if __name__ == "__main__":
+    import becca.brain as becca_brain
     becca_brain.run(World())
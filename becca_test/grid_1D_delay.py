@@ -7,7 +7,6 @@ makes the task challenging.
 """
 import numpy as np
 
-import becca.brain as becca_brain
 from becca_test.grid_1D import World as Grid_1D_World
 
 
@@ -17,11 +16,14 @@ class World(Grid_1D_World):
 
     This task is identical to the grid_1D task with the
     exception that reward is randomly delayed a few time steps.
+    Delays can be made much longer, up to thousands of time steps,
+    to test credit assignment over long horizons.
 
     Most of this world's attributes are defined in base_world.py.
     The few that aren't are defined below.
     """
-    def __init__(self, lifespan=None):
+    def __init__(self, lifespan=None, max_delay=1,
+                 delay_distribution='uniform', mean_delay=None):
         """
         Initialize the world. Base it on the grid_1D world.
 
@@ -29,19 +31,47 @@ class World(Grid_1D_World):
         ----------
         lifespan : int
             The number of time steps to continue the world.
+        max_delay : int
+            The number of different delays possible. Rewards are
+            delayed anywhere from 0 to max_delay - 1 time steps.
+        delay_distribution : str
+            How the delay for each reward is chosen.
+            'uniform' : equally likely to be any of the possible delays.
+            'geometric' : short delays are more likely than long ones,
+                with an average of ``mean_delay``. Delays that would be
+                too long are cut off at max_delay - 1.
+            'fixed' : always delayed by max_delay - 1 time steps.
+        mean_delay : float, optional
+            The average delay for the 'geometric' distribution.
+            Defaults to half of max_delay - 1.
         """
         Grid_1D_World.__init__(self, lifespan)
         self.name = 'grid_1D_delay'
         print('--delayed')
 
+        if delay_distribution not in ('uniform', 'geometric', 'fixed'):
+            raise ValueError(
+                'Unknown delay distribution: {0}'.format(delay_distribution))
         # max_delay : int
-        #     The maximum number of time steps that the reward may be delayed.
-        self.max_delay = 1
-        # future_reward : list of floats
+        #     The number of different delays possible.
+        self.max_delay = max_delay
+        # delay_distribution : str
+        #     The way the delay for each reward is chosen.
+        self.delay_distribution = delay_distribution
+        # mean_delay : float
+        #     The average delay for the geometric distribution.
+        if mean_delay is None:
+            mean_delay = (self.max_delay - 1) / 2.
+        self.mean_delay = mean_delay
+        # future_reward : array of floats
         #     The reward that has been received, but will not be delivered to
-        #     the agent yet. The index of the list indicates how many time
-        #     steps will pass before delivery occurs.
-        self.future_reward = [0] * self.max_delay
+        #     the agent yet. This is a circular buffer. The reward for
+        #     the current time step is at ``reward_index`` and the reward for
+        #     ``n`` steps in the future is ``n`` positions further along,
+        #     wrapping around at the end. This makes it cheap to schedule
+        #     rewards however far into the future they are delayed.
+        self.future_reward = np.zeros(self.max_delay)
+        self.reward_index = 0
 
         self.visualize_interval = 1e6
 
@@ -56,20 +86,40 @@ class World(Grid_1D_World):
             The reward associated the set of input sensors.
         """
         new_reward = 0
-        if int(self.world_state) == 3:
+        if int(self.world_state) == self.target_position:
             new_reward += 1
-        if int(self.world_state) == 8:
+        if int(self.world_state) == self.trap_position:
             new_reward -= 1
         # Punish actions just a little
         new_reward -= self.energy * self.energy_cost
         # Find the delay for the reward
-        delay = np.random.randint(0, self.max_delay)
-        self.future_reward[delay] += new_reward
-        # Advance the reward future by one time step
-        self.future_reward.append(0)
-        reward = self.future_reward.pop(0)
+        delay = self.choose_delay()
+        self.future_reward[
+            (self.reward_index + delay) % self.max_delay] += new_reward
+        # Deliver this time step's reward and advance
+        # the reward future by one time step.
+        reward = self.future_reward[self.reward_index]
+        self.future_reward[self.reward_index] = 0.
+        self.reward_index = (self.reward_index + 1) % self.max_delay
         return reward
 
+    def choose_delay(self):
+        """
+        Choose how many time steps to delay the reward.
+
+        Returns
+        -------
+        delay : int
+            A delay between 0 and max_delay - 1.
+        """
+        if self.delay_distribution == 'fixed':
+            return self.max_delay - 1
+        if self.delay_distribution == 'geometric':
+            # np.random.geometric counts trials, starting from 1.
+            delay = np.random.geometric(1. / (1. + self.mean_delay)) - 1
+            return min(delay, self.max_delay - 1)
+        return np.random.randint(0, self.max_delay)
+
     def visualize(self, brain=None):
         """
         Show what's going on in the world.
@@ -85,4 +135,5 @@ class World(Grid_1D_World):
 
 
 if __name__ == "__main__":
+    import becca.brain as becca_brain
     becca_brain.run(World())
@@ -12,8 +12,8 @@ To run this world from the command line
     python3 grid_1D_delay_cont
 
 """
-import becca.brain as becca_brain
 from becca_test.grid_1D_delay import World as Grid_1D_Delay_World
+import becca_test.world_tools as wtools
 
 
 class World(Grid_1D_Delay_World):
@@ -30,6 +30,13 @@ class World(Grid_1D_Delay_World):
     def sense(self):
         return [self.world_state]
 
+    def sense_sparse(self):
+        """
+        Generate the sensor values as active indices and their values.
+        """
+        return wtools.dense_to_sparse(self.sense())
+
 
 if __name__ == "__main__":
+    import becca.brain as becca_brain
     becca_brain.run(World())
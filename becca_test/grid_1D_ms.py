@@ -7,8 +7,8 @@ or time-delayed reward assignment for optimal behavior.
 """
 import numpy as np
 
-import becca.brain as becca_brain
-from becca.base_world import World as BaseWorld
+from becca_test.base_world import World as BaseWorld
+import becca_test.world_tools as wtools
 
 
 class World(BaseWorld):
@@ -36,6 +36,9 @@ class World(BaseWorld):
         print("Entering", self.name)
 
         self.n_sensors = 9
+        # sensor_dtype : numpy dtype
+        #     The data type of the sensor array. See world_tools.py.
+        self.sensor_dtype = wtools.sensor_dtype
         self.num_positions = self.n_sensors
         self.n_actions = 2
         self.action = np.zeros(self.n_actions)
@@ -54,6 +57,11 @@ class World(BaseWorld):
         # simple_state : int
         #     The nearest integer position of the agent in the world.
         self.simple_state = 1
+        # sparse_sensors : bool
+        #     If True, step() returns the sensors as a pair of arrays,
+        #     the sorted indices of the active sensors and their values,
+        #     rather than as a dense array. See sense_sparse().
+        self.sparse_sensors = False
 
         self.visualize_interval = 1e6
 
@@ -88,7 +96,10 @@ class World(BaseWorld):
         self.simple_state = int(np.floor(self.world_state))
         if self.simple_state == 9:
             self.simple_state = 0
-        sensors = self.sense()
+        if self.sparse_sensors:
+            sensors = self.sense_sparse()
+        else:
+            sensors = self.sense()
         reward = self.assign_reward()
         return sensors, reward
 
@@ -98,10 +109,24 @@ class World(BaseWorld):
         """
         # Assign sensors as zeros or ones.
         # Represent the presence or absence of the current position in the bin.
-        sensors = np.zeros(self.n_sensors)
+        sensors = np.zeros(self.n_sensors, dtype=self.sensor_dtype)
         sensors[self.simple_state] = 1
         return sensors
 
+    def sense_sparse(self):
+        """
+        Represent the current position as a single active sensor.
+
+        Returns
+        -------
+        indices : array of ints
+            The indices of the active sensors, in increasing order.
+        values : array of floats
+            The values of the active sensors.
+        """
+        return (np.array([self.simple_state]),
+                np.ones(1, dtype=self.sensor_dtype))
+
     def assign_reward(self):
         """
         Calculate the total reward corresponding to the current state
@@ -136,4 +161,5 @@ class World(BaseWorld):
 
 
 if __name__ == "__main__":
+    import becca.brain as becca_brain
     becca_brain.run(World())
@@ -6,11 +6,16 @@ actual informative state sensors, and a comparatively large number
 of sensors that are pure noise distractors. Many learning methods
 make the implicit assumption that all sensors are informative.
 This task is intended to break them.
+
+The number of noise sensors can be scaled up to tens or hundreds of
+thousands. The noise is drawn as packed bits, many time steps at a time,
+so the cost of each time step stays small and grows linearly
+with the number of noise sensors.
 """
 import numpy as np
 
-import becca.brain as becca_brain
-from becca.base_world import World as BaseWorld
+from becca_test.base_world import World as BaseWorld
+import becca_test.world_tools as wtools
 
 
 class World(BaseWorld):
@@ -26,9 +31,27 @@ class World(BaseWorld):
     Most of this world's attributes are defined in base_world.py.
     The few that aren't are defined below.
     """
-    def __init__(self, lifespan=None):
+    def __init__(self, lifespan=None, num_noise_sensors=10,
+                 noise_group_size=1, noise_flip_fraction=.5):
         """
         Set up the world.
+
+        Parameters
+        ----------
+        lifespan : int
+            The number of time steps to continue the world.
+        num_noise_sensors : int
+            The number of distractor sensors.
+        noise_group_size : int
+            The noise sensors are split into groups of this size.
+            All the sensors in a group share the same value, making them
+            perfectly correlated with each other. The default of 1
+            makes every noise sensor independent.
+        noise_flip_fraction : float
+            The probability that each group changes its value
+            on each time step. The default of .5 draws a fresh random
+            value every time step. Smaller values make the noise
+            persist over time.
         """
         BaseWorld.__init__(self, lifespan)
         self.name = 'grid_1D_noise'
@@ -39,8 +62,51 @@ class World(BaseWorld):
         #     These have no basis in the world and are only meant to distract.
         # num_real_sensors : int
         #     Of the sensors, these are the ones that represent position.
-        self.num_noise_sensors = 10
+        self.num_noise_sensors = num_noise_sensors
         self.n_sensors = self.num_noise_sensors + self.num_real_sensors
+        # sensor_dtype : numpy dtype
+        #     The data type of the sensor array. See world_tools.py.
+        self.sensor_dtype = wtools.sensor_dtype
+        # noise_group_size : int
+        #     The number of noise sensors that share each value.
+        # noise_flip_fraction : float
+        #     The probability of each group's value changing on each step.
+        # num_noise_groups : int
+        #     The number of independent noise values.
+        self.noise_group_size = noise_group_size
+        self.noise_flip_fraction = noise_flip_fraction
+        self.num_noise_groups = int(np.ceil(
+            float(self.num_noise_sensors) / self.noise_group_size))
+        # noise_block_size : int
+        #     The approximate number of random noise bits to draw at once.
+        #     Drawing many time steps' worth at a time keeps the overhead of
+        #     calling into numpy low when there are few noise sensors.
+        self.noise_block_size = 2 ** 20
+        # noise_block : 2D array of uint8
+        #     A block of pre-drawn, bit-packed noise flips, one row
+        #     per time step. A bit is set where a group's value changes.
+        # noise_block_index : int
+        #     The row of noise_block to use next.
+        self.noise_block = np.zeros((0, 0), dtype=np.uint8)
+        self.noise_block_index = 0
+        # noise_state : array of uint8
+        #     The current value of each noise group, bit-packed.
+        self.noise_state = np.random.randint(
+            0, 256, size=int(np.ceil(self.num_noise_groups / 8.)),
+            dtype=np.uint8)
+        # sensor_buffer : array of floats
+        #     Preallocated storage for the sensors, with room for a whole
+        #     number of noise groups. ``sensors`` and ``noise_groups`` are
+        #     views into it, so filling them in doesn't allocate a new array.
+        #     The same array is returned on every time step.
+        self.sensor_buffer = np.zeros(
+            self.num_real_sensors +
+            self.num_noise_groups * self.noise_group_size,
+            dtype=self.sensor_dtype)
+        self.sensors = self.sensor_buffer[:self.n_sensors]
+        self.noise_groups = self.sensor_buffer[
+            self.num_real_sensors:].reshape(
+                self.num_noise_groups, self.noise_group_size)
         self.n_actions = 2
         self.action = np.zeros(self.n_actions)
         # energy_cost : float
@@ -75,7 +141,9 @@ class World(BaseWorld):
         reward : float
             The amount of reward or punishment given by the world.
         sensors : array of floats
-            The values of each of the sensors.
+            The values of each of the sensors. To save allocating one
+            on every time step, this is the same array each time,
+            filled in again. Callers that keep it need to copy it.
         """
         self.action = action.copy().ravel()
         self.action[np.nonzero(self.action)] = 1.
@@ -99,19 +167,50 @@ class World(BaseWorld):
 
         # Assign sensors as zeros or ones.
         # Represent the presence or absence of the current position in the bin.
-        real_sensors = np.zeros(self.num_real_sensors)
-        real_sensors[self.simple_state] = 1
+        self.sensor_buffer[:self.num_real_sensors] = 0.
+        self.sensor_buffer[self.simple_state] = 1.
 
         # Generate a set of noise sensors
-        noise_sensors = np.round(np.random.random_sample(
-            self.num_noise_sensors))
-        sensors = np.hstack((real_sensors, noise_sensors))
+        self.sense_noise()
         reward = -1.
         if self.simple_state == 1:
             reward = 1.
         reward -= energy * self.energy_cost
 
-        return sensors, reward
+        return self.sensors, reward
+
+    def draw_noise_block(self):
+        """
+        Draw the noise flips for the next several time steps.
+        """
+        n_steps = max(1, self.noise_block_size // self.num_noise_groups)
+        if self.noise_flip_fraction == .5:
+            # Random bytes are already eight packed, fair coin flips.
+            self.noise_block = np.random.randint(
+                0, 256, size=(n_steps, self.noise_state.size),
+                dtype=np.uint8)
+        else:
+            # Compare 16 bit random integers against a threshold,
+            # which is much cheaper than drawing random floats
+            # and resolves the flip fraction to within 1 / 65536.
+            threshold = int(round(self.noise_flip_fraction * 2 ** 16))
+            self.noise_block = np.packbits(
+                np.random.randint(0, 2 ** 16, dtype=np.uint16, size=(
+                    n_steps, self.num_noise_groups)) < threshold, axis=1)
+        self.noise_block_index = 0
+
+    def sense_noise(self):
+        """
+        Advance the noise by one time step and fill in the noise sensors.
+        """
+        if self.noise_block_index >= self.noise_block.shape[0]:
+            self.draw_noise_block()
+        np.bitwise_xor(self.noise_state,
+                       self.noise_block[self.noise_block_index],
+                       out=self.noise_state)
+        self.noise_block_index += 1
+        self.noise_groups[:] = np.unpackbits(
+            self.noise_state, count=self.num_noise_groups)[:, np.newaxis]
 
     def visualize(self, brain):
         """
@@ -128,4 +227,5 @@ class World(BaseWorld):
 
 
 if __name__ == "__main__":
+    import becca.brain as becca_brain
     becca_brain.run(World())
@@ -7,8 +7,8 @@ challenging, because can take two actions to reach a reward state.
 """
 import numpy as np
 
-import becca.brain as becca_brain
-from becca.base_world import World as BaseWorld
+from becca_test.base_world import World as BaseWorld
+import becca_test.world_tools as wtools
 
 
 class World(BaseWorld):
@@ -24,7 +24,7 @@ class World(BaseWorld):
     Some of this world's attributes are defined in base_world.py.
     The others are defined below.
     """
-    def __init__(self, lifespan=None):
+    def __init__(self, lifespan=None, world_size=5):
         """
         Initialize the world.
 
@@ -32,6 +32,9 @@ class World(BaseWorld):
         ----------
         lifespan : int
             The number of time steps to continue the world.
+        world_size : int
+            The number of rows and columns in the grid.
+            It needs to be at least 4 to hold the targets and obstacles.
         """
         BaseWorld.__init__(self, lifespan)
         self.name = 'grid_2D'
@@ -41,8 +44,11 @@ class World(BaseWorld):
         # world_size : int
         #     The world consists of a 2D grid of size
         #     world_size by world_size.
-        self.world_size = 5
+        self.world_size = world_size
         self.n_sensors = self.world_size ** 2
+        # sensor_dtype : numpy dtype
+        #     The data type of the sensor array. See world_tools.py.
+        self.sensor_dtype = wtools.sensor_dtype
         # world_state : float
         #     The actual position of the agent in the world.
         #     This can be fractional.
@@ -65,6 +71,20 @@ class World(BaseWorld):
         #     that are punished.
         #     Punish positions (2,4) and (4,2)
         self.obstacles = [(1, 3), (3, 1)]
+        # reward_map : 2D array of floats
+        #     The reward for occupying each (row, column) position,
+        #     precomputed from targets and obstacles so that each step
+        #     only needs a single lookup. Targets take precedence.
+        self.reward_map = np.zeros((self.world_size, self.world_size))
+        for obstacle in self.obstacles:
+            self.reward_map[obstacle] = -1.
+        for target in self.targets:
+            self.reward_map[target] = 1.
+        # sparse_sensors : bool
+        #     If True, step() returns the sensors as a pair of arrays,
+        #     the sorted indices of the active sensors and their values,
+        #     rather than as a dense array. See sense_sparse().
+        self.sparse_sensors = False
 
         # self.visualize_interval = 1e3
 
@@ -106,20 +126,76 @@ class World(BaseWorld):
         # Enforce lower and upper limits on the grid world
         # by looping them around.
         self.world_state = np.remainder(self.world_state, self.world_size)
-        sensors = self.sense()
+        if self.sparse_sensors:
+            sensors = self.sense_sparse()
+        else:
+            sensors = self.sense()
 
         # Assign the reward appropriate to the current state.
-        reward = 0.
-        for obstacle in self.obstacles:
-            if tuple(self.world_state) == obstacle:
-                reward = -1.
-        for target in self.targets:
-            if tuple(self.world_state) == target:
-                reward = 1.
+        reward = self.reward_map[int(self.world_state[0]),
+                                 int(self.world_state[1])]
         reward -= self.energy_cost * energy
 
         return sensors, reward
 
+    def step_many(self, actions):
+        """
+        Advance the world through a whole sequence of actions at once.
+
+        This follows the same rules as step(), but the random numbers
+        are drawn for all the time steps together, so a seeded run
+        doesn't follow the same course as calling step() repeatedly.
+
+        Parameters
+        ----------
+        actions : 2D array of floats
+            One row of action commands per time step.
+
+        Returns
+        -------
+        sensors : 2D array of floats
+            One row of sensor values per time step.
+            These are always dense.
+        rewards : array of floats
+            The reward after each time step.
+        """
+        # Subclasses that step or sense differently
+        # have to be stepped one time step at a time.
+        if (type(self).step is not World.step or
+                type(self).sense is not World.sense):
+            return wtools.step_sequentially(self, actions)
+
+        actions = (np.asarray(actions).reshape(-1, self.n_actions) != 0)
+        actions = actions.astype(float)
+        n_steps = actions.shape[0]
+        if n_steps == 0:
+            return (np.zeros((0, self.n_sensors), dtype=self.sensor_dtype),
+                    np.zeros(0))
+        steps = (actions[:, 0:2] - actions[:, 4:6] +
+                 2 * actions[:, 2:4] - 2 * actions[:, 6:8])
+        energies = (np.sum(actions[:, 0:2], axis=1) +
+                    np.sum(actions[:, 4:6], axis=1) +
+                    np.sum(2 * actions[:, 2:4], axis=1) +
+                    np.sum(2 * actions[:, 6:8], axis=1))
+        jumps = np.random.random_sample(n_steps) < self.jump_fraction
+        jump_positions = np.random.randint(
+            0, self.world_size, size=(n_steps, 2)).astype(float)
+        world_states = np.remainder(wtools.accumulate_with_jumps(
+            self.world_state, steps, jumps, jump_positions), self.world_size)
+
+        rows = world_states[:, 0].astype(int)
+        columns = world_states[:, 1].astype(int)
+        sensors = np.zeros((n_steps, self.n_sensors), dtype=self.sensor_dtype)
+        sensors[np.arange(n_steps),
+                (world_states[:, 0] +
+                 world_states[:, 1] * self.world_size).astype(int)] = 1
+        rewards = self.reward_map[rows, columns] - self.energy_cost * energies
+
+        self.timestep += n_steps
+        self.action = actions[-1]
+        self.world_state = world_states[-1]
+        return sensors, rewards
+
     def sense(self):
         """
         Construct the sensor array from the state information.
@@ -129,11 +205,26 @@ class World(BaseWorld):
         sensors : list of floats
             The current state of the world, reflected in the sensors.
         """
-        sensors = np.zeros(self.n_sensors)
+        sensors = np.zeros(self.n_sensors, dtype=self.sensor_dtype)
         sensors[int(self.world_state[0] +
                     self.world_state[1] * self.world_size)] = 1
         return sensors
 
+    def sense_sparse(self):
+        """
+        Represent the current position as a single active sensor.
+
+        Returns
+        -------
+        indices : array of ints
+            The indices of the active sensors, in increasing order.
+        values : array of floats
+            The values of the active sensors.
+        """
+        return (np.array([int(self.world_state[0] +
+                              self.world_state[1] * self.world_size)]),
+                np.ones(1, dtype=self.sensor_dtype))
+
     def visualize(self):
         """
         Show the state of the world and the brain.
@@ -144,4 +235,5 @@ class World(BaseWorld):
 
 
 if __name__ == "__main__":
+    import becca.brain as becca_brain
     becca_brain.run(World())
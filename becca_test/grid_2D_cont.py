@@ -10,8 +10,8 @@ To run this world from the command line
 
     python3 grid_2D_cont
 """
-import becca.brain as becca_brain
 from becca_test.grid_2D import World as Grid_2D_World
+import becca_test.world_tools as wtools
 
 
 class World(Grid_2D_World):
@@ -35,6 +35,13 @@ class World(Grid_2D_World):
         """
         return self.world_state
 
+    def sense_sparse(self):
+        """
+        Generate the sensor values as active indices and their values.
+        """
+        return wtools.dense_to_sparse(self.sense())
+
 
 if __name__ == "__main__":
+    import becca.brain as becca_brain
     becca_brain.run(World())
@@ -9,7 +9,6 @@ basic sensory data into more complex features in order to do well.
 """
 import numpy as np
 
-import becca.brain as becca_brain
 from becca_test.grid_2D import World as Grid_2D_World
 
 
@@ -27,7 +26,7 @@ class World(Grid_2D_World):
     ----------
     See grid_2D.py for a full description of attributes.
     """
-    def __init__(self, lifespan=None):
+    def __init__(self, lifespan=None, world_size=5):
         """
         Set up the world based on the grid_2D world.
 
@@ -35,8 +34,10 @@ class World(Grid_2D_World):
         ----------
         lifespan : int
             The number of time steps to continue the world.
+        world_size : int
+            The number of rows and columns in the grid.
         """
-        Grid_2D_World.__init__(self, lifespan)
+        Grid_2D_World.__init__(self, lifespan, world_size=world_size)
         self.name = 'grid_2D_dc'
         print(", decoupled")
         self.n_sensors = self.world_size * 2
@@ -50,13 +51,29 @@ class World(Grid_2D_World):
         sensors : list of floats
             The current state of the world, reflected in the sensors.
         """
-        sensors = np.zeros(self.n_sensors)
+        sensors = np.zeros(self.n_sensors, dtype=self.sensor_dtype)
         # Sensors 0-4 represent each of the 5 rows.
         sensors[int(self.world_state[0])] = 1
         # Sensors 5-9 represent each of the 5 columns.
         sensors[int(self.world_state[1] + self.world_size)] = 1
         return sensors
 
+    def sense_sparse(self):
+        """
+        Represent the current row and column as two active sensors.
+
+        Returns
+        -------
+        indices : array of ints
+            The indices of the active sensors, in increasing order.
+        values : array of floats
+            The values of the active sensors.
+        """
+        return (np.array([int(self.world_state[0]),
+                          int(self.world_state[1] + self.world_size)]),
+                np.ones(2, dtype=self.sensor_dtype))
+
 
 if __name__ == "__main__":
+    import becca.brain as becca_brain
     becca_brain.run(World())
@@ -0,0 +1,320 @@
+"""
+Two-dimensional maze task.
+
+This is a scaled-up version of the 2D grid task. Instead of a 5 x 5
+open grid, the agent finds its way around a maze, which can be
+generated procedurally or read from a file. Mazes of 100 x 100
+or more are intended to stress the brain with large numbers of
+sensors and long paths to reward.
+
+Map files can be either text or .npy.
+In a text file, each line is a row of the maze and each character
+is one position:
+    . open
+    # wall
+    T target (rewarded)
+    X trap (punished)
+A .npy file holds a 2D array of integers, using the codes
+OPEN, WALL, TARGET and TRAP defined below.
+
+Usage
+To run this world standalone from the command line
+
+    python3 -m grid_2D_maze
+"""
+import numpy as np
+
+from becca_test.grid_2D import World as Grid_2D_World
+
+# Codes for each type of position in a map.
+OPEN = 0
+WALL = 1
+TARGET = 2
+TRAP = 3
+map_characters = {'.': OPEN, '#': WALL, 'T': TARGET, 'X': TRAP}
+
+
+def generate_maze(world_size, n_targets=2, n_traps=2, seed=None):
+    """
+    Carve out a random maze.
+
+    This uses a randomized depth-first search (recursive backtracker).
+    Open positions sit on odd rows and columns, with walls between them.
+    Every open position can be reached from every other one.
+
+    Parameters
+    ----------
+    world_size : int
+        The number of rows and columns in the maze, including
+        the outer walls.
+    n_targets, n_traps : int
+        The number of rewarded and punished positions to scatter
+        through the maze.
+    seed : int, optional
+        If given, the same seed always generates the same maze.
+        Otherwise the maze's seed is drawn from numpy's global random
+        number generator, so seeding that reproduces the maze too.
+
+    Returns
+    -------
+    maze_map : 2D array of ints
+        The maze, coded as OPEN, WALL, TARGET and TRAP.
+    """
+    if seed is None:
+        seed = np.random.randint(2 ** 31)
+    random_state = np.random.RandomState(seed)
+    maze_map = np.full((world_size, world_size), WALL, dtype=int)
+    n_cells = (world_size - 1) // 2
+    start = (2 * random_state.randint(n_cells) + 1,
+             2 * random_state.randint(n_cells) + 1)
+    maze_map[start] = OPEN
+    stack = [start]
+    while stack:
+        row, col = stack[-1]
+        neighbors = []
+        for row_step, col_step in ((-2, 0), (2, 0), (0, -2), (0, 2)):
+            next_row = row + row_step
+            next_col = col + col_step
+            if (0 < next_row < world_size - 1 and
+                    0 < next_col < world_size - 1 and
+                    maze_map[next_row, next_col] == WALL):
+                neighbors.append((next_row, next_col))
+        if neighbors:
+            next_row, next_col = neighbors[random_state.randint(
+                len(neighbors))]
+            # Knock out the wall between the two cells.
+            maze_map[(row + next_row) // 2, (col + next_col) // 2] = OPEN
+            maze_map[next_row, next_col] = OPEN
+            stack.append((next_row, next_col))
+        else:
+            stack.pop()
+
+    open_rows, open_cols = np.where(maze_map == OPEN)
+    chosen = random_state.choice(
+        open_rows.size, size=n_targets + n_traps, replace=False)
+    maze_map[open_rows[chosen[:n_targets]],
+             open_cols[chosen[:n_targets]]] = TARGET
+    maze_map[open_rows[chosen[n_targets:]],
+             open_cols[chosen[n_targets:]]] = TRAP
+    return maze_map
+
+
+def read_map(filename):
+    """
+    Read a map from a text or .npy file.
+
+    Parameters
+    ----------
+    filename : str
+        The name of the map file, including the path.
+
+    Returns
+    -------
+    maze_map : 2D array of ints
+        The map, coded as OPEN, WALL, TARGET and TRAP.
+    """
+    if filename.endswith('.npy'):
+        return np.load(filename).astype(int)
+    with open(filename, 'r') as map_file:
+        lines = [line.rstrip('\n') for line in map_file if line.strip()]
+    return np.array([[map_characters[character] for character in line]
+                     for line in lines], dtype=int)
+
+
+class World(Grid_2D_World):
+    """
+    Two-dimensional maze world.
+
+    The agent moves just as it does in the grid_2D world, but it can't
+    move onto or through a wall. Each move is taken one position
+    at a time, first along the rows and then along the columns,
+    and it stops at the last open position before a wall.
+    Targets are rewarded and traps are punished, and every step taken
+    costs a little energy.
+
+    Attributes
+    ----------
+    See grid_2D.py for a description of the attributes that
+    are shared with it.
+    """
+    def __init__(self, lifespan=None, world_size=15, map_filename=None,
+                 seed=None):
+        """
+        Set up the world based on the grid_2D world.
+
+        Parameters
+        ----------
+        lifespan : int
+            The number of time steps to continue the world.
+        world_size : int
+            The number of rows and columns in a generated maze.
+            This is ignored when the map is read from a file.
+        map_filename : str, optional
+            If given, read the map from this file rather than
+            generating one.
+        seed : int, optional
+            The seed for generating the maze. This is separate from
+            the random number generator that drives the world,
+            so the same maze can be reused across runs. If it isn't
+            given, the maze follows the global random number generator,
+            like the rest of the world. See generate_maze().
+        """
+        Grid_2D_World.__init__(self, lifespan)
+        self.name = 'grid_2D_maze'
+        print(", in a maze")
+
+        # maze_map : 2D array of ints
+        #     The layout of the maze, coded as OPEN, WALL, TARGET and TRAP.
+        if map_filename is None:
+            self.maze_map = generate_maze(world_size, seed=seed)
+        else:
+            self.maze_map = read_map(map_filename)
+        # n_rows, n_cols : int
+        #     The dimensions of the maze.
+        (self.n_rows, self.n_cols) = self.maze_map.shape
+        self.world_size = max(self.n_rows, self.n_cols)
+        self.n_sensors = self.n_rows * self.n_cols
+
+        # Precompute everything that gets checked on each step,
+        # so that it only takes a single lookup.
+        # reward_map : 2D array of floats
+        #     The reward for occupying each position.
+        self.reward_map = np.zeros(self.maze_map.shape)
+        self.reward_map[self.maze_map == TARGET] = 1.
+        self.reward_map[self.maze_map == TRAP] = -1.
+        # open_map : 2D array of bools
+        #     True for every position that the agent can occupy.
+        self.open_map = self.maze_map != WALL
+        # open_positions : 2D array of floats
+        #     The (row, column) of every position the agent can occupy,
+        #     one per row. Random jumps choose from among these.
+        self.open_positions = np.argwhere(self.open_map).astype(float)
+        # shape : array of floats
+        #     The number of rows and columns, used to wrap positions around.
+        self.shape = np.array(self.maze_map.shape, dtype=float)
+
+        self.targets = [tuple(position) for position in
+                        np.argwhere(self.maze_map == TARGET)]
+        self.obstacles = [tuple(position) for position in
+                          np.argwhere(self.maze_map == TRAP)]
+        self.world_state = self.random_position()
+
+    def random_position(self):
+        """
+        Choose an open position at random.
+
+        Returns
+        -------
+        position : array of floats
+            The (row, column) of the position.
+        """
+        return self.open_positions[
+            np.random.randint(self.open_positions.shape[0])].copy()
+
+    def step(self, action):
+        """
+        Advance the world by one time step.
+
+        Parameters
+        ----------
+        action : array of floats
+            The set of action commands to execute.
+
+        Returns
+        -------
+        reward : float
+            The amount of reward or punishment given by the world.
+        sensors : array of floats
+            The values of each of the sensors.
+        """
+        # Turn the action command into a change in the world.
+        self.action = action.ravel()
+        self.action[np.nonzero(self.action)] = 1.
+        self.timestep += 1
+        position_step = (self.action[0:2] -
+                         self.action[4:6] +
+                         2 * self.action[2:4] -
+                         2 * self.action[6:8]).T
+        energy = (np.sum(self.action[0:2]) +
+                  np.sum(self.action[4:6]) +
+                  np.sum(2 * self.action[2:4]) +
+                  np.sum(2 * self.action[6:8]))
+        self.world_state = self.move(position_step)
+
+        # At random intervals, jump to a random position in the world.
+        if np.random.random_sample() < self.jump_fraction:
+            self.world_state = self.random_position()
+
+        if self.sparse_sensors:
+            sensors = self.sense_sparse()
+        else:
+            sensors = self.sense()
+
+        # Assign the reward appropriate to the current state.
+        reward = self.reward_map[int(self.world_state[0]),
+                                 int(self.world_state[1])]
+        reward -= self.energy_cost * energy
+
+        return sensors, reward
+
+    def move(self, position_step):
+        """
+        Find where a move ends up, with walls blocking the way.
+
+        Parameters
+        ----------
+        position_step : array of floats
+            The number of rows and columns to move.
+
+        Returns
+        -------
+        position : array of floats
+            The (row, column) of the last open position reached,
+            moving one position at a time.
+        """
+        position = self.world_state.copy()
+        for axis in (0, 1):
+            direction = np.sign(position_step[axis])
+            for _ in range(int(abs(position_step[axis]))):
+                next_position = position.copy()
+                next_position[axis] = np.remainder(
+                    position[axis] + direction, self.shape[axis])
+                if not self.open_map[int(next_position[0]),
+                                     int(next_position[1])]:
+                    return position
+                position = next_position
+        return position
+
+    def sense(self):
+        """
+        Construct the sensor array from the state information.
+
+        Returns
+        -------
+        sensors : array of floats
+            The current state of the world, reflected in the sensors.
+        """
+        sensors = np.zeros(self.n_sensors, dtype=self.sensor_dtype)
+        sensors[int(self.world_state[0] * self.n_cols +
+                    self.world_state[1])] = 1
+        return sensors
+
+    def sense_sparse(self):
+        """
+        Represent the current position as a single active sensor.
+
+        Returns
+        -------
+        indices : array of ints
+            The indices of the active sensors, in increasing order.
+        values : array of floats
+            The values of the active sensors.
+        """
+        return (np.array([int(self.world_state[0] * self.n_cols +
+                              self.world_state[1])]),
+                np.ones(1, dtype=self.sensor_dtype))
+
+
+if __name__ == "__main__":
+    import becca.brain as becca_brain
+    becca_brain.run(World())
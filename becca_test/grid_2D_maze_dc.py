@@ -0,0 +1,76 @@
+"""
+Decoupled two-dimensional maze task.
+
+This is just like the maze task, except that the rows and columns
+are sensed separately, as in the decoupled 2D grid task.
+This keeps the number of sensors manageable in very large mazes,
+but it means that the row and column need to be combined
+to know where the walls are.
+"""
+import numpy as np
+
+from becca_test.grid_2D_maze import World as Grid_2D_Maze_World
+
+
+class World(Grid_2D_Maze_World):
+    """
+    Decoupled two-dimensional maze world.
+
+    It's just like the grid_2D_maze world except that the sensors
+    array represents a row and a column separately,
+    rather than coupled together.
+
+    Attributes
+    ----------
+    See grid_2D_maze.py for a full description of attributes.
+    """
+    def __init__(self, lifespan=None, world_size=15, map_filename=None,
+                 seed=None):
+        """
+        Set up the world based on the grid_2D_maze world.
+
+        Parameters
+        ----------
+        See grid_2D_maze.py for a description of the parameters.
+        """
+        Grid_2D_Maze_World.__init__(self, lifespan, world_size=world_size,
+                                    map_filename=map_filename, seed=seed)
+        self.name = 'grid_2D_maze_dc'
+        print(", decoupled")
+        self.n_sensors = self.n_rows + self.n_cols
+
+    def sense(self):
+        """
+        Create an appropriate sensor array
+
+        Returns
+        -------
+        sensors : array of floats
+            The current state of the world, reflected in the sensors.
+        """
+        sensors = np.zeros(self.n_sensors, dtype=self.sensor_dtype)
+        # The first n_rows sensors represent each of the rows.
+        sensors[int(self.world_state[0])] = 1
+        # The rest represent each of the columns.
+        sensors[int(self.world_state[1] + self.n_rows)] = 1
+        return sensors
+
+    def sense_sparse(self):
+        """
+        Represent the current row and column as two active sensors.
+
+        Returns
+        -------
+        indices : array of ints
+            The indices of the active sensors, in increasing order.
+        values : array of floats
+            The values of the active sensors.
+        """
+        return (np.array([int(self.world_state[0]),
+                          int(self.world_state[1] + self.n_rows)]),
+                np.ones(2, dtype=self.sensor_dtype))
+
+
+if __name__ == "__main__":
+    import becca.brain as becca_brain
+    becca_brain.run(World())
@@ -0,0 +1,305 @@
+"""
+Keep a history of benchmark results and check new ones against it.
+
+Every world that test_world() runs appends a record to
+``log/history.jsonl``, one json object per line. Each record holds the
+world's ms per time step and score, along with a fingerprint of
+the machine and software it ran on: the CPU, and the Python, NumPy
+and becca versions. Only runs with the same fingerprint are compared.
+
+compare() checks the latest run against the runs before it and flags
+any world that got significantly slower or scored significantly lower.
+From the command line, it exits with a nonzero status when it finds
+a regression, so it can be used as a gate.
+
+    python3 test compare
+    python3 test compare --runs 10
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import platform
+import time
+
+import numpy as np
+
+import becca_test.result_cache as result_cache
+
+# history_filename : str
+#     The default location of the benchmark history.
+module_path = os.path.dirname(os.path.abspath(__file__))
+history_filename = os.path.join(module_path, 'log', 'history.jsonl')
+# min_slowdown : float
+#     The smallest fractional increase in ms per time step that
+#     counts as a slowdown, however significant it is.
+min_slowdown = .05
+# min_score_drop : float
+#     The smallest drop in score that counts as a regression.
+min_score_drop = .02
+# t_critical : dict of int: float
+#     One-sided 95% critical values of Student's t distribution,
+#     by degrees of freedom. Between entries, the one for fewer
+#     degrees of freedom is used, which is the more cautious.
+t_critical = {
+    1: 6.314, 2: 2.920, 3: 2.353, 4: 2.132, 5: 2.015, 6: 1.943,
+    7: 1.895, 8: 1.860, 9: 1.833, 10: 1.812, 15: 1.753, 20: 1.725,
+    30: 1.697, 60: 1.671, 120: 1.658,
+}
+
+
+def cpu_name():
+    """
+    Find the model name of the CPU.
+
+    Returns
+    -------
+    name : str
+    """
+    try:
+        with open('/proc/cpuinfo', 'r') as cpuinfo:
+            for line in cpuinfo:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def environment():
+    """
+    Describe the machine and software that benchmarks are running on.
+
+    Returns
+    -------
+    environment : dict
+    """
+    return {
+        'cpu': cpu_name(),
+        'n_cpus': multiprocessing.cpu_count(),
+        'system': platform.system(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'becca': result_cache.becca_fingerprint(),
+    }
+
+
+def fingerprint(env):
+    """
+    Summarize an environment in a short string.
+
+    Parameters
+    ----------
+    env : dict
+        See environment().
+
+    Returns
+    -------
+    fingerprint : str
+    """
+    text = json.dumps(env, sort_keys=True)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+def record(run_id, name, ms_per_step, score, lifespan, seed=None,
+           filename=history_filename):
+    """
+    Add the result of running one world to the history.
+
+    Parameters
+    ----------
+    run_id : str
+        The run that the world was part of. Results that share
+        a run ID are compared together.
+    name : str
+        The name of the world.
+    ms_per_step : float
+        The average wall clock time per time step, in milliseconds.
+    score : float
+        The brain's performance on the world.
+    lifespan : int
+        The number of time steps the world was run for. Only results
+        with the same lifespan are compared.
+    seed : int, optional
+        The random seed, if there was one.
+    filename : str
+        The history file.
+    """
+    env = environment()
+    entry = {
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'run_id': run_id,
+        'name': name,
+        'lifespan': int(lifespan),
+        'seed': seed,
+        'ms_per_step': float(ms_per_step),
+        'score': float(score),
+        'fingerprint': fingerprint(env),
+        'environment': env,
+    }
+    directory = os.path.dirname(filename)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    # A single short append, so that interrupted or simultaneous
+    # runs don't leave a half written line in the middle of the file.
+    with open(filename, 'a') as history_file:
+        history_file.write(json.dumps(entry) + '\n')
+
+
+def load(filename=history_filename):
+    """
+    Read the whole history.
+
+    Parameters
+    ----------
+    filename : str
+        The history file.
+
+    Returns
+    -------
+    entries : list of dict
+        In the order they were recorded. Lines that can't be read,
+        such as one cut short by a crash, are skipped.
+    """
+    entries = []
+    try:
+        with open(filename, 'r') as history_file:
+            for line in history_file:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    pass
+    except OSError:
+        pass
+    return entries
+
+
+def critical_value(degrees, table=t_critical):
+    """
+    Look up a critical value of Student's t distribution.
+
+    Parameters
+    ----------
+    degrees : int
+        The degrees of freedom. At least 1.
+    table : dict of int: float
+        Critical values by degrees of freedom, such as t_critical.
+
+    Returns
+    -------
+    t : float
+        The value for the largest number of degrees of freedom in the
+        table that doesn't exceed degrees.
+    """
+    return table[max(key for key in table if key <= degrees)]
+
+
+def is_worse(baseline, latest, min_change):
+    """
+    Test whether a new value is significantly higher than earlier ones.
+
+    The new value is compared against a 95% one-sided prediction
+    interval for one more draw from the same distribution as
+    the earlier ones.
+
+    Parameters
+    ----------
+    baseline : array of floats
+        The earlier values. At least two are needed.
+    latest : float
+        The new value.
+    min_change : float
+        The smallest increase that counts, however significant.
+
+    Returns
+    -------
+    worse : bool
+    """
+    n_baseline = baseline.size
+    if n_baseline < 2:
+        return False
+    mean = np.mean(baseline)
+    if latest - mean < min_change:
+        return False
+    spread = np.std(baseline, ddof=1) * np.sqrt(1. + 1. / n_baseline)
+    if spread == 0:
+        return True
+    return (latest - mean) / spread > critical_value(n_baseline - 1)
+
+
+def compare(n_runs=5, filename=history_filename):
+    """
+    Check the latest run against the ones before it.
+
+    For each world in the latest run, the baseline is that world's
+    results from up to n_runs earlier runs with the same fingerprint
+    and lifespan.
+
+    Parameters
+    ----------
+    n_runs : int
+        The number of earlier runs to compare against.
+    filename : str
+        The history file.
+
+    Returns
+    -------
+    regressions : list of str
+        A description of each slowdown or score drop.
+    """
+    entries = load(filename)
+    if not entries:
+        print('There is no benchmark history in', filename)
+        return []
+    latest_run = entries[-1]['run_id']
+    latest_fingerprint = entries[-1]['fingerprint']
+    latest = [entry for entry in entries if entry['run_id'] == latest_run]
+    print('Comparing run {0} against up to {1} earlier runs.'.format(
+        latest_run, n_runs))
+    print('{0:<26}{1:>22}{2:>10}{3:>18}{4:>9}'.format(
+        'world', 'baseline ms/step', 'latest', 'baseline score', 'latest'))
+
+    regressions = []
+    for entry in latest:
+        earlier = [
+            other for other in entries
+            if other['run_id'] != latest_run and
+            other['fingerprint'] == latest_fingerprint and
+            other['name'] == entry['name'] and
+            other['lifespan'] == entry['lifespan']]
+        earlier_runs = []
+        for other in earlier:
+            if other['run_id'] not in earlier_runs:
+                earlier_runs.append(other['run_id'])
+        earlier_runs = earlier_runs[-n_runs:]
+        baseline = [other for other in earlier
+                    if other['run_id'] in earlier_runs]
+        times = np.array([other['ms_per_step'] for other in baseline])
+        scores = np.array([other['score'] for other in baseline])
+
+        if times.size == 0:
+            print('{0:<26}{1:>22}{2:>10.3}{3:>18}{4:>9.3}'.format(
+                entry['name'], 'none', entry['ms_per_step'], 'none',
+                entry['score']))
+            continue
+        print('{0:<26}{1:>22}{2:>10.3}{3:>18}{4:>9.3}'.format(
+            entry['name'],
+            '{0:.3} +/- {1:.2} ({2})'.format(
+                np.mean(times), np.std(times), times.size),
+            entry['ms_per_step'],
+            '{0:.3} +/- {1:.2}'.format(np.mean(scores), np.std(scores)),
+            entry['score']))
+        if is_worse(times, entry['ms_per_step'],
+                    min_slowdown * np.mean(times)):
+            regressions.append('{0} slowed from {1:.3} to {2:.3} ms/step'
+                               .format(entry['name'], np.mean(times),
+                                       entry['ms_per_step']))
+        if is_worse(-scores, -entry['score'], min_score_drop):
+            regressions.append('{0} scored {1:.3}, down from {2:.3}'.format(
+                entry['name'], entry['score'], np.mean(scores)))
+
+    for regression in regressions:
+        print('Regression:', regression)
+    if not regressions:
+        print('No regressions.')
+    return regressions
@@ -11,8 +11,7 @@ import os
 import matplotlib.pyplot as plt
 import numpy as np
 
-import becca.brain as becca_brain
-from becca.base_world import World as BaseWorld
+from becca_test.base_world import World as BaseWorld
 import becca_test.world_tools as wtools
 
 
@@ -27,7 +26,7 @@ class World(BaseWorld):
     Some of this world's attributes are defined in base_world.py.
     The rest are defined below.
     """
-    def __init__(self, lifespan=None):
+    def __init__(self, lifespan=None, fov_span=5):
         """
         Set up the world
 
@@ -35,6 +34,8 @@ class World(BaseWorld):
         ----------
         lifespan : int
             The number of time steps to continue the world.
+        fov_span : int
+            The number of superpixel rows and columns in the field of view.
         """
         BaseWorld.__init__(self, lifespan)
         self.name = 'image_1D'
@@ -43,7 +44,13 @@ class World(BaseWorld):
         # fov_span : int
         #     The world pixelizes its field of view into a superpixel array
         #     that is fov_span X fov_span.
-        self.fov_span = 5
+        self.fov_span = fov_span
+        # sensor_dtype : numpy dtype
+        #     The data type of the sensor array. See world_tools.py.
+        self.sensor_dtype = wtools.sensor_dtype
+        # image_dtype : numpy dtype
+        #     The data type of the stored image. See world_tools.py.
+        self.image_dtype = wtools.image_dtype
         self.n_sensors = self.fov_span ** 2
         # self.n_sensors = 2 * self.fov_span ** 2
         self.n_actions = 8
@@ -69,13 +76,10 @@ class World(BaseWorld):
         self.image_filename = os.path.join(module_path,
                                            'images',
                                            'bar_test.png')
-        # data : array of floats
-        #     The image, read in and stored as a 2D numpy array.
-        self.data = plt.imread(self.image_filename)
-        # Convert it to grayscale if it's in color
-        if self.data.shape[2] == 3:
-            # Collapse the three RGB matrices into one b/w value matrix
-            self.data = np.sum(self.data, axis=2) / 3.0
+        # data : array of image_dtype
+        #     The image, read in, converted to grayscale
+        #     and stored as a 2D numpy array.
+        self.data = wtools.read_image(self.image_filename, self.image_dtype)
         # Define the size of the field of view, its range of
         # allowable positions, and its initial position
         image_width = self.data.shape[1]
@@ -115,8 +119,13 @@ class World(BaseWorld):
         # block_width : int
         #     The width of each superpixel, in number of columns.
         self.block_width = self.fov_width / (self.fov_span + 2)
-        self.sensors = np.zeros(self.n_sensors)
+        self.sensors = np.zeros(self.n_sensors, dtype=self.sensor_dtype)
         self.action = np.zeros(self.n_actions)
+        # prefetched : tuple or None
+        #     The random numbers for the next time step, and the sensors
+        #     for the position it will jump to, if they have been
+        #     worked out ahead of time by prefetch().
+        self.prefetched = None
         self.reward = 0.
 
     def step(self, action):
@@ -150,9 +159,12 @@ class World(BaseWorld):
                         self.action[5] * self.max_step_size / 4 -
                         self.action[6] * self.max_step_size / 8 -
                         self.action[7] * self.max_step_size / 16)
-        noise_factor = (
-            self.noise_magnitude * np.random.random_sample() * 2.0 -
-            self.noise_magnitude * np.random.random_sample() * 2.0 + 1.)
+        if self.prefetched is None:
+            noise_factor, jump_position = self.draw_random()
+            jump_sensors = None
+        else:
+            noise_factor, jump_position, jump_sensors = self.prefetched
+            self.prefetched = None
         column_step = int(raw_col_step * noise_factor)
         self.column_position = self.column_position + column_step
         self.column_position = max(self.column_position, self.column_min)
@@ -160,18 +172,14 @@ class World(BaseWorld):
         self.column_history.append(self.column_position)
 
         # At random intervals, jump to a random position in the world.
-        if np.random.random_sample() < self.jump_fraction:
-            self.column_position = np.random.random_integers(self.column_min,
-                                                             self.column_max)
+        if jump_position is not None:
+            self.column_position = jump_position
         # Create the sensory input vector.
-        fov = self.data[:, int(self.column_position - self.fov_width / 2):
-                        int(self.column_position + self.fov_width / 2)]
-        # Calculate center surround features for the image.
-        center_surround_pixels = wtools.center_surround(fov,
-                                                        self.fov_span,
-                                                        self.fov_span)
+        if jump_sensors is None:
+            self.sensors = self.sense_position(self.column_position)
+        else:
+            self.sensors = jump_sensors
         # unsplit_sensors = center_surround_pixels.ravel()
-        self.sensors = center_surround_pixels.ravel()
         # These can be positive or negative, so split them into two
         # sets of sensors--one for the positive values and one for the
         # negative ones. Then stack them together for one big sensor array.
@@ -187,6 +195,66 @@ class World(BaseWorld):
                         self.max_step_size * self.step_cost)
         return self.sensors, self.reward
 
+    def draw_random(self):
+        """
+        Draw all the random numbers that one time step needs.
+
+        None of them depend on the action, so they can be drawn
+        ahead of time. They are drawn in the same order either way,
+        so prefetching doesn't change the course of a seeded run.
+
+        Returns
+        -------
+        noise_factor : float
+            The factor by which this time step's movement is off.
+        jump_position : int or None
+            The column to jump to, or None if there's no jump.
+        """
+        noise_factor = (
+            self.noise_magnitude * np.random.random_sample() * 2.0 -
+            self.noise_magnitude * np.random.random_sample() * 2.0 + 1.)
+        jump_position = None
+        if np.random.random_sample() < self.jump_fraction:
+            jump_position = np.random.random_integers(self.column_min,
+                                                      self.column_max)
+        return noise_factor, jump_position
+
+    def prefetch(self):
+        """
+        Do the part of the next time step that doesn't need the action.
+
+        This can run while the brain is choosing the action.
+        When the next step is going to be a jump, the sensors at the
+        new position don't depend on the action either,
+        so they are calculated too.
+        """
+        noise_factor, jump_position = self.draw_random()
+        jump_sensors = None
+        if jump_position is not None:
+            jump_sensors = self.sense_position(jump_position)
+        self.prefetched = (noise_factor, jump_position, jump_sensors)
+
+    def sense_position(self, column_position):
+        """
+        Calculate the sensors for a field of view centered on a column.
+
+        Parameters
+        ----------
+        column_position : int
+            The center of the field of view.
+
+        Returns
+        -------
+        sensors : array of floats
+            The center surround values of the superpixels.
+        """
+        fov = self.data[:, int(column_position - self.fov_width / 2):
+                        int(column_position + self.fov_width / 2)]
+        # Calculate center surround features for the image.
+        center_surround_pixels = wtools.center_surround(
+            fov, self.fov_span, self.fov_span, dtype=self.sensor_dtype)
+        return center_surround_pixels.ravel()
+
     def visualize(self, brain):
         """
         Show what's going on in the world.
@@ -262,4 +330,5 @@ class World(BaseWorld):
 
 
 if __name__ == "__main__":
+    import becca.brain as becca_brain
     becca_brain.run(World())
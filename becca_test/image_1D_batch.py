@@ -0,0 +1,159 @@
+"""
+Many agents in the one-dimensional visual servo task at once.
+
+This is the image_1D task, for n_agents agents, each with its own gaze.
+It is meant for evaluating many agents or seeds together.
+All the agents' superpixels are gathered at once from a summed area
+table of the image, and the center-surround weights are applied to
+all of them together. The cost per agent drops as the number
+of agents grows.
+
+    from becca_test.image_1D_batch import World
+    world = World(n_agents=64)
+    sensors, rewards = world.step(actions)
+
+Here actions is (n_agents, n_actions), sensors is (n_agents, n_sensors)
+and rewards is (n_agents,).
+"""
+import numpy as np
+
+from becca_test.image_1D import World as Image_1D_World
+import becca_test.world_tools as wtools
+
+
+class World(Image_1D_World):
+    """
+    One-dimensional visual servo world, for many agents.
+
+    Attributes
+    ----------
+    See image_1D.py for a description of the attributes that
+    are shared with it. n_sensors and n_actions are per agent.
+    """
+    def __init__(self, lifespan=None, fov_span=5, n_agents=16):
+        """
+        Set up the world based on the image_1D world.
+
+        Parameters
+        ----------
+        lifespan : int
+            The number of time steps to continue the world.
+        fov_span : int
+            The number of superpixel rows and columns in the field of view.
+        n_agents : int
+            The number of agents.
+        """
+        Image_1D_World.__init__(self, lifespan, fov_span=fov_span)
+        self.name = 'image_1D_batch'
+        print(", with", n_agents, "agents")
+
+        # n_agents : int
+        #     The number of agents, each with its own field of view.
+        self.n_agents = n_agents
+        self.column_min = int(self.column_min)
+        self.column_max = int(self.column_max)
+        # column_positions : array of ints
+        #     The current location of the center of each agent's
+        #     field of view.
+        self.column_positions = np.random.random_integers(
+            self.column_min, self.column_max, size=n_agents)
+        # step_sizes : array of floats
+        #     The step of each action, in columns.
+        self.step_sizes = self.max_step_size * np.array(
+            [1 / 2, 1 / 4, 1 / 8, 1 / 16, -1 / 2, -1 / 4, -1 / 8, -1 / 16])
+
+        # summed_area : 2D array of floats
+        #     The summed area table of the image.
+        self.summed_area = wtools.summed_area_table(self.data)
+        # row_edges : 2D array of ints
+        #     The edges of the superpixel rows. The field of view
+        #     covers every row, so these are the same for every agent.
+        block_height = float(self.data.shape[0]) / float(self.fov_span + 2)
+        self.row_edges = np.tile(
+            (np.arange(self.fov_span + 3) * block_height).astype(int),
+            (n_agents, 1))
+        # column_edge_offsets : array of ints
+        #     The edges of the superpixel columns, relative to the center
+        #     of the field of view. These are exactly the edges that
+        #     image_1D slices out. Since positions are whole pixels,
+        #     they are the same wherever the field of view is.
+        start = int(self.column_min - self.fov_width / 2)
+        stop = int(self.column_min + self.fov_width / 2)
+        block_width = float(stop - start) / float(self.fov_span + 2)
+        self.column_edge_offsets = start - self.column_min + (
+            np.arange(self.fov_span + 3) * block_width).astype(int)
+
+        self.sensors = np.zeros((n_agents, self.n_sensors),
+                                dtype=self.sensor_dtype)
+        self.action = np.zeros((n_agents, self.n_actions))
+        self.reward = np.zeros(n_agents)
+
+    def step(self, action):
+        """
+        Advance every agent by one time step.
+
+        Parameters
+        ----------
+        action : 2D array of floats
+            The set of action commands for each agent, one row per agent.
+
+        Returns
+        -------
+        sensors : 2D array of floats
+            The values of each agent's sensors, one row per agent.
+        reward : array of floats
+            The reward for each agent.
+        """
+        self.timestep += 1
+        self.action = (np.asarray(action).reshape(
+            self.n_agents, self.n_actions) != 0).astype(float)
+
+        raw_column_steps = np.dot(self.action, self.step_sizes)
+        noise_factors = (
+            self.noise_magnitude * np.random.random_sample(
+                self.n_agents) * 2.0 -
+            self.noise_magnitude * np.random.random_sample(
+                self.n_agents) * 2.0 + 1.)
+        column_steps = np.trunc(raw_column_steps * noise_factors)
+        self.column_positions = np.clip(
+            self.column_positions + column_steps.astype(int),
+            self.column_min, self.column_max)
+
+        # At random intervals, jump to a random position in the world.
+        jumps = np.where(
+            np.random.random_sample(self.n_agents) < self.jump_fraction)[0]
+        if jumps.size > 0:
+            self.column_positions[jumps] = np.random.random_integers(
+                self.column_min, self.column_max, size=jumps.size)
+
+        self.sensors = self.sense()
+
+        self.reward = (np.abs(self.column_positions - self.target_column) <
+                       self.reward_region_width / 2.0).astype(float)
+        self.reward -= (np.abs(column_steps) /
+                        self.max_step_size * self.step_cost)
+        return self.sensors, self.reward
+
+    def sense(self):
+        """
+        Calculate every agent's sensors in one batch.
+
+        Returns
+        -------
+        sensors : 2D array of floats
+            The center surround values of each agent's superpixels,
+            one row per agent.
+        """
+        column_edges = (self.column_positions[:, np.newaxis] +
+                        self.column_edge_offsets[np.newaxis, :])
+        center_surround_pixels = wtools.center_surround_batch(
+            self.summed_area, self.row_edges, column_edges,
+            dtype=self.sensor_dtype)
+        return center_surround_pixels.reshape(self.n_agents, self.n_sensors)
+
+    def visualize(self, brain=None):
+        """
+        Show where all the agents are looking.
+        """
+        print(' '.join(["world is", str(self.timestep), "timesteps old."]))
+        print('columns:', self.column_positions)
@@ -10,8 +10,7 @@ import os
 import matplotlib.pyplot as plt
 import numpy as np
 
-import becca.brain as becca_brain
-from becca.base_world import World as BaseWorld
+from becca_test.base_world import World as BaseWorld
 import becca_test.world_tools as wtools
 
 
@@ -28,7 +27,7 @@ class World(BaseWorld):
     Some of this world's attributes are defined in base_world.py.
     The rest are defined below.
     """
-    def __init__(self, lifespan=None):
+    def __init__(self, lifespan=None, fov_span=5):
         """
         Set up the world.
 
@@ -36,6 +35,8 @@ class World(BaseWorld):
         ----------
         lifespan : int
             The number of time steps to continue the world.
+        fov_span : int
+            The number of superpixel rows and columns in the field of view.
         """
         BaseWorld.__init__(self, lifespan)
         self.name = 'image_2D'
@@ -44,20 +45,24 @@ class World(BaseWorld):
         # fov_span : int
         #     The world pixelizes its field of view into a superpixel array
         #     that is ``fov_span`` X ``fov_span``.
-        self.fov_span = 5
+        self.fov_span = fov_span
+        # sensor_dtype : numpy dtype
+        #     The data type of the sensor array. See world_tools.py.
+        self.sensor_dtype = wtools.sensor_dtype
+        # image_dtype : numpy dtype
+        #     The data type of the stored image. See world_tools.py.
+        self.image_dtype = wtools.image_dtype
         # Initialize the image_data to be used as the environment.
         module_path = os.path.dirname(os.path.abspath(__file__))
         # image_filename : str
         #     The file name of the image including the relative path.
         self.image_filename = os.path.join(
             module_path, 'images', 'block_test.png')
-        # image_data : array of floats
-        #     The image, read in and stored as a 2D numpy array.
-        self.image_data = plt.imread(self.image_filename)
-        # Convert it to grayscale if it's in color.
-        if self.image_data.shape[2] == 3:
-            # Collapse the three RGB matrices into one b/w value matrix.
-            self.image_data = np.sum(self.image_data, axis=2) / 3.0
+        # image_data : array of image_dtype
+        #     The image, read in, converted to grayscale
+        #     and stored as a 2D numpy array.
+        self.image_data = wtools.read_image(
+            self.image_filename, self.image_dtype)
         # Define the size of the field of view, its range of
         # allowable positions, and its initial position.
         (im_height, im_width) = self.image_data.shape
@@ -104,13 +109,18 @@ class World(BaseWorld):
         # self.n_sensors = 2 * self.fov_span ** 2
         self.n_sensors = self.fov_span ** 2
         self.n_actions = 16
-        self.sensors = np.zeros(self.n_sensors)
+        self.sensors = np.zeros(self.n_sensors, dtype=self.sensor_dtype)
         self.action = np.zeros(self.n_actions)
 
         # jump_fraction : float
         #     The fraction of time steps on which the agent jumps to
         #     a random position.
         self.jump_fraction = .05
+        # prefetched : tuple or None
+        #     The random numbers for the next time step, and the sensors
+        #     for the position it will jump to, if they have been
+        #     worked out ahead of time by prefetch().
+        self.prefetched = None
         self.reward = 0.
         # column_history, row_history : list if ints
         #     A time series of the location (measured in column or row pixels)
@@ -166,10 +176,15 @@ class World(BaseWorld):
                                action[14] * self.max_step_size / 8 -
                                action[15] * self.max_step_size / 16)
 
-        row_step = np.round(row_step * (
-            1. + np.random.normal(scale=self.noise_magnitude)))
-        column_step = np.round(column_step * (
-            1. + np.random.normal(scale=self.noise_magnitude)))
+        if self.prefetched is None:
+            row_noise, column_noise, jump_position = self.draw_random()
+            jump_sensors = None
+        else:
+            (row_noise, column_noise,
+             jump_position, jump_sensors) = self.prefetched
+            self.prefetched = None
+        row_step = np.round(row_step * (1. + row_noise))
+        column_step = np.round(column_step * (1. + column_noise))
         self.row_position = self.row_position + int(row_step)
         self.column_position = self.column_position + int(column_step)
 
@@ -180,24 +195,17 @@ class World(BaseWorld):
         self.column_position = min(self.column_position, self.column_max)
 
         # At random intervals, jump to a random position in the world.
-        if np.random.random_sample() < self.jump_fraction:
-            self.column_position = np.random.random_integers(self.column_min,
-                                                             self.column_max)
-            self.row_position = np.random.random_integers(self.row_min,
-                                                          self.row_max)
+        if jump_position is not None:
+            self.row_position, self.column_position = jump_position
         self.row_history.append(self.row_position)
         self.column_history.append(self.column_position)
 
         # Create the sensory input vector.
-        fov = self.image_data[int(self.row_position - self.fov_height / 2):
-                              int(self.row_position + self.fov_height / 2),
-                              int(self.column_position - self.fov_width / 2):
-                              int(self.column_position + self.fov_width / 2)]
-        # Calculate center surround features for the field of view.
-        center_surround_pixels = wtools.center_surround(fov,
-                                                        self.fov_span,
-                                                        self.fov_span)
-        self.sensors = center_surround_pixels.ravel()
+        if jump_sensors is None:
+            self.sensors = self.sense_position(self.row_position,
+                                                self.column_position)
+        else:
+            self.sensors = jump_sensors
         # Center surround values vary between -1 and 1. One means light
         # surrounded by dark, one means dark surrounded by light.
         # Split them each into
@@ -217,6 +225,71 @@ class World(BaseWorld):
 
         return self.sensors, self.reward
 
+    def draw_random(self):
+        """
+        Draw all the random numbers that one time step needs.
+
+        None of them depend on the action, so they can be drawn
+        ahead of time. They are drawn in the same order either way,
+        so prefetching doesn't change the course of a seeded run.
+
+        Returns
+        -------
+        row_noise, column_noise : float
+            The fractional error in this time step's movement.
+        jump_position : tuple of ints or None
+            The (row, column) to jump to, or None if there's no jump.
+        """
+        row_noise = np.random.normal(scale=self.noise_magnitude)
+        column_noise = np.random.normal(scale=self.noise_magnitude)
+        jump_position = None
+        if np.random.random_sample() < self.jump_fraction:
+            column_position = np.random.random_integers(self.column_min,
+                                                        self.column_max)
+            row_position = np.random.random_integers(self.row_min,
+                                                     self.row_max)
+            jump_position = (row_position, column_position)
+        return row_noise, column_noise, jump_position
+
+    def prefetch(self):
+        """
+        Do the part of the next time step that doesn't need the action.
+
+        This can run while the brain is choosing the action.
+        When the next step is going to be a jump, the sensors at the
+        new position don't depend on the action either,
+        so they are calculated too.
+        """
+        row_noise, column_noise, jump_position = self.draw_random()
+        jump_sensors = None
+        if jump_position is not None:
+            jump_sensors = self.sense_position(*jump_position)
+        self.prefetched = (row_noise, column_noise,
+                           jump_position, jump_sensors)
+
+    def sense_position(self, row_position, column_position):
+        """
+        Calculate the sensors for a field of view centered on a position.
+
+        Parameters
+        ----------
+        row_position, column_position : int
+            The center of the field of view.
+
+        Returns
+        -------
+        sensors : array of floats
+            The center surround values of the superpixels.
+        """
+        fov = self.image_data[int(row_position - self.fov_height / 2):
+                              int(row_position + self.fov_height / 2),
+                              int(column_position - self.fov_width / 2):
+                              int(column_position + self.fov_width / 2)]
+        # Calculate center surround features for the field of view.
+        center_surround_pixels = wtools.center_surround(
+            fov, self.fov_span, self.fov_span, dtype=self.sensor_dtype)
+        return center_surround_pixels.ravel()
+
     def visualize(self, brain):
         """
         Show what is going on in Becca and in the world.
@@ -262,4 +335,5 @@ class World(BaseWorld):
 
 
 if __name__ == "__main__":
+    import becca.brain as becca_brain
     becca_brain.run(World())
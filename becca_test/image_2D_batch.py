@@ -0,0 +1,187 @@
+"""
+Many agents in the two-dimensional visual servo task at once.
+
+This is the image_2D task, for n_agents agents, each with its own gaze.
+It is meant for evaluating many agents or seeds together.
+Rather than slicing out each agent's field of view and averaging
+its superpixels one at a time, all the agents' superpixels are
+gathered at once from a summed area table of the image, and
+the center-surround weights are applied to all of them together.
+The cost per agent drops as the number of agents grows.
+
+    from becca_test.image_2D_batch import World
+    world = World(n_agents=64)
+    sensors, rewards = world.step(actions)
+
+Here actions is (n_agents, n_actions), sensors is (n_agents, n_sensors)
+and rewards is (n_agents,).
+"""
+import numpy as np
+
+from becca_test.image_2D import World as Image_2D_World
+import becca_test.world_tools as wtools
+
+
+class World(Image_2D_World):
+    """
+    Two-dimensional visual servo world, for many agents.
+
+    Attributes
+    ----------
+    See image_2D.py for a description of the attributes that
+    are shared with it. n_sensors and n_actions are per agent.
+    """
+    def __init__(self, lifespan=None, fov_span=5, n_agents=16):
+        """
+        Set up the world based on the image_2D world.
+
+        Parameters
+        ----------
+        lifespan : int
+            The number of time steps to continue the world.
+        fov_span : int
+            The number of superpixel rows and columns in the field of view.
+        n_agents : int
+            The number of agents.
+        """
+        Image_2D_World.__init__(self, lifespan, fov_span=fov_span)
+        self.name = 'image_2D_batch'
+        print(", with", n_agents, "agents")
+
+        # n_agents : int
+        #     The number of agents, each with its own field of view.
+        self.n_agents = n_agents
+        # row_positions, column_positions : array of ints
+        #     The current location of the center of each agent's
+        #     field of view.
+        self.row_positions = np.random.random_integers(
+            self.row_min, self.row_max, size=n_agents)
+        self.column_positions = np.random.random_integers(
+            self.column_min, self.column_max, size=n_agents)
+        # step_sizes : array of floats
+        #     The row (or column) step of each of the eight
+        #     actions that move in that direction.
+        self.step_sizes = self.max_step_size * np.array(
+            [1 / 2, 1 / 4, 1 / 8, 1 / 16, -1 / 2, -1 / 4, -1 / 8, -1 / 16])
+
+        # summed_area : 2D array of floats
+        #     The summed area table of the image.
+        self.summed_area = wtools.summed_area_table(self.image_data)
+        # row_edge_offsets, column_edge_offsets : array of ints
+        #     The edges of the superpixels, relative to the center of the
+        #     field of view. These are exactly the edges that image_2D
+        #     slices out. Since positions are whole pixels,
+        #     they are the same wherever the field of view is.
+        self.row_edge_offsets = self.edge_offsets(
+            self.row_min, self.fov_height)
+        self.column_edge_offsets = self.edge_offsets(
+            self.column_min, self.fov_width)
+
+        self.sensors = np.zeros((n_agents, self.n_sensors),
+                                dtype=self.sensor_dtype)
+        self.action = np.zeros((n_agents, self.n_actions))
+        self.reward = np.zeros(n_agents)
+
+    def edge_offsets(self, min_position, fov_size):
+        """
+        Find the superpixel edges along one direction of the field of view.
+
+        Parameters
+        ----------
+        min_position : int
+            The lowest position the field of view can be centered on.
+        fov_size : float
+            The height or width of the field of view, in pixels.
+
+        Returns
+        -------
+        offsets : array of ints
+            The superpixel edges, relative to the center of the
+            field of view.
+        """
+        start = int(min_position - fov_size / 2)
+        stop = int(min_position + fov_size / 2)
+        block_size = float(stop - start) / float(self.fov_span + 2)
+        edges = (np.arange(self.fov_span + 3) * block_size).astype(int)
+        return start - min_position + edges
+
+    def step(self, action):
+        """
+        Advance every agent by one time step.
+
+        Parameters
+        ----------
+        action : 2D array of floats
+            The set of action commands for each agent, one row per agent.
+
+        Returns
+        -------
+        sensors : 2D array of floats
+            The values of each agent's sensors, one row per agent.
+        reward : array of floats
+            The reward for each agent.
+        """
+        self.timestep += 1
+        self.action = (np.asarray(action).reshape(
+            self.n_agents, self.n_actions) != 0).astype(float)
+
+        # The first eight actions move the field of view along rows,
+        # and the last eight along columns, just as in image_2D.
+        row_steps = np.round(np.dot(self.action[:, :8], self.step_sizes))
+        column_steps = np.round(np.dot(self.action[:, 8:], self.step_sizes))
+        row_steps = np.round(row_steps * (1. + np.random.normal(
+            scale=self.noise_magnitude, size=self.n_agents)))
+        column_steps = np.round(column_steps * (1. + np.random.normal(
+            scale=self.noise_magnitude, size=self.n_agents)))
+        self.row_positions = np.clip(
+            self.row_positions + row_steps.astype(int),
+            self.row_min, self.row_max)
+        self.column_positions = np.clip(
+            self.column_positions + column_steps.astype(int),
+            self.column_min, self.column_max)
+
+        # At random intervals, jump to a random position in the world.
+        jumps = np.where(
+            np.random.random_sample(self.n_agents) < self.jump_fraction)[0]
+        if jumps.size > 0:
+            self.column_positions[jumps] = np.random.random_integers(
+                self.column_min, self.column_max, size=jumps.size)
+            self.row_positions[jumps] = np.random.random_integers(
+                self.row_min, self.row_max, size=jumps.size)
+
+        self.sensors = self.sense()
+
+        rewarded_columns = (np.abs(self.column_positions - self.target_column)
+                            < self.reward_region_width / 2)
+        rewarded_rows = (np.abs(self.row_positions - self.target_row) <
+                         self.reward_region_width / 2)
+        self.reward = np.logical_and(
+            rewarded_columns, rewarded_rows).astype(float)
+        return self.sensors, self.reward
+
+    def sense(self):
+        """
+        Calculate every agent's sensors in one batch.
+
+        Returns
+        -------
+        sensors : 2D array of floats
+            The center surround values of each agent's superpixels,
+            one row per agent.
+        """
+        row_edges = (self.row_positions[:, np.newaxis] +
+                     self.row_edge_offsets[np.newaxis, :])
+        column_edges = (self.column_positions[:, np.newaxis] +
+                        self.column_edge_offsets[np.newaxis, :])
+        center_surround_pixels = wtools.center_surround_batch(
+            self.summed_area, row_edges, column_edges,
+            dtype=self.sensor_dtype)
+        return center_surround_pixels.reshape(self.n_agents, self.n_sensors)
+
+    def visualize(self, brain=None):
+        """
+        Show where all the agents are looking.
+        """
+        print(' '.join(["world is", str(self.timestep), "timesteps old."]))
+        print('rows:', self.row_positions)
+        print('columns:', self.column_positions)
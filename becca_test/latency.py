@@ -0,0 +1,263 @@
+"""
+Record the latency of every time step, and report on its tail.
+
+The mean time per step that test_world() prints hides the occasional
+expensive step, such as when the brain backs itself up or draws its
+visualizations. For running a robot, those are the steps that matter.
+run() steps through the same loop as becca.brain.run(), but times
+the world's step() and the brain's sense_act_learn() separately
+on every time step. Each goes into a LatencyHistogram.
+
+A LatencyHistogram is log-bucketed, in the style of an HDR histogram.
+Each doubling of latency is split into the same number of buckets,
+so every latency is recorded to within a few percent, from
+microseconds to minutes, in a fixed and small amount of memory.
+Recording a latency costs about a microsecond.
+The histogram also keeps the time steps of the slowest few latencies,
+so that they can be matched up with what the brain was doing.
+
+Usage
+
+    python3 -m becca_test.latency grid_1D --lifespan 10000
+        or
+    python3 test -w grid_1D --latency
+"""
+import argparse
+import copy
+import heapq
+import importlib
+import math
+import time
+
+import numpy as np
+
+# report_percentiles : list of float
+#     The percentiles that report() lists.
+report_percentiles = [50., 90., 99., 99.9]
+
+
+class LatencyHistogram(object):
+    """
+    A log-bucketed histogram of latencies, in nanoseconds.
+    """
+    def __init__(self, name, sub_buckets=32, max_octaves=44, n_worst=10):
+        """
+        Set up an empty histogram.
+
+        Parameters
+        ----------
+        name : str
+            What the latencies are of, for reports.
+        sub_buckets : int
+            The number of buckets per doubling of latency. With 32,
+            bucket edges are about 2% apart.
+        max_octaves : int
+            The number of doublings covered, starting from 1 ns.
+            44 reaches past four hours. Longer latencies all go
+            in the last bucket, although the max is still exact.
+        n_worst : int
+            The number of slowest latencies to remember the time steps of.
+        """
+        # name : str
+        #     What the latencies are of.
+        self.name = name
+        # sub_buckets : int
+        #     The number of buckets per doubling of latency.
+        self.sub_buckets = sub_buckets
+        # counts : list of int
+        #     The number of latencies in each bucket. Bucket i holds
+        #     latencies from 2 ** (i / sub_buckets) ns up to the next
+        #     bucket's edge.
+        self.counts = [0] * (sub_buckets * max_octaves)
+        # n_recorded : int
+        #     The total number of latencies recorded.
+        self.n_recorded = 0
+        # max_ns : int
+        #     The largest latency recorded.
+        self.max_ns = 0
+        # n_worst : int
+        #     The number of slowest latencies to keep.
+        self.n_worst = n_worst
+        # worst : list of (int, int)
+        #     A heap of the slowest latencies and their time steps.
+        self.worst = []
+        # first_timestep : int
+        #     The time step of the first latency recorded. The first step
+        #     often includes one-time setup, such as compiling.
+        self.first_timestep = None
+
+    def record(self, latency_ns, timestep):
+        """
+        Add a latency to the histogram.
+
+        Parameters
+        ----------
+        latency_ns : int
+            The latency, in nanoseconds.
+        timestep : int
+            The time step it happened on.
+        """
+        if latency_ns < 1:
+            latency_ns = 1
+        i_bucket = int(math.log2(latency_ns) * self.sub_buckets)
+        if i_bucket >= len(self.counts):
+            i_bucket = len(self.counts) - 1
+        self.counts[i_bucket] += 1
+        if self.n_recorded == 0:
+            self.first_timestep = timestep
+        self.n_recorded += 1
+        if latency_ns > self.max_ns:
+            self.max_ns = latency_ns
+        if len(self.worst) < self.n_worst:
+            heapq.heappush(self.worst, (latency_ns, timestep))
+        elif latency_ns > self.worst[0][0]:
+            heapq.heapreplace(self.worst, (latency_ns, timestep))
+
+    def percentile(self, percent):
+        """
+        Find the latency below which a given percent of latencies fall.
+
+        Parameters
+        ----------
+        percent : float
+            Between 0 and 100.
+
+        Returns
+        -------
+        latency_ns : float
+            The upper edge of the bucket holding that percentile,
+            or the max, if it is smaller.
+        """
+        if self.n_recorded == 0:
+            return 0.
+        target = percent / 100. * self.n_recorded
+        cumulative = 0
+        for i_bucket, count in enumerate(self.counts):
+            cumulative += count
+            if count > 0 and cumulative >= target:
+                return min(2. ** ((i_bucket + 1) / self.sub_buckets),
+                           float(self.max_ns))
+        return float(self.max_ns)
+
+    def worst_steps(self):
+        """
+        List the slowest latencies, slowest first.
+
+        Returns
+        -------
+        worst : list of (int, int)
+            Each latency in nanoseconds, and the time step it happened on.
+        """
+        return sorted(self.worst, reverse=True)
+
+    def report(self, events=None):
+        """
+        Print the percentiles, the max and the slowest time steps.
+
+        Parameters
+        ----------
+        events : dict of str: int, optional
+            Periodic events, and the number of time steps between them,
+            such as {'backup': 1e5}. A slow time step that lands on
+            one of these is labeled with it.
+        """
+        print('{0} latency over {1} time steps, in ms:'.format(
+            self.name, self.n_recorded))
+        print('    ' + ', '.join(
+            ['p{0:g} {1:.3}'.format(percent, self.percentile(percent) / 1e6)
+             for percent in report_percentiles] +
+            ['max {0:.3}'.format(self.max_ns / 1e6)]))
+        print('    Slowest time steps:')
+        for latency_ns, timestep in self.worst_steps():
+            labels = []
+            if timestep == self.first_timestep:
+                labels.append('first')
+            for event, interval in sorted((events or {}).items()):
+                if interval and timestep % int(interval) == 0:
+                    labels.append(event)
+            print('        {0:>10} {1:>10.3} ms  {2}'.format(
+                timestep, latency_ns / 1e6, ', '.join(labels)).rstrip())
+
+
+def brain_events(brain):
+    """
+    Find the brain's periodic events, to label slow time steps with.
+
+    Parameters
+    ----------
+    brain : Brain
+
+    Returns
+    -------
+    events : dict of str: int
+    """
+    return {
+        'backup': getattr(brain, 'backup_interval', None),
+        'report': getattr(brain, 'reporting_interval', None),
+        'visualize': getattr(brain, 'visualize_interval', None),
+    }
+
+
+def run(world, config=None):
+    """
+    Run Becca with a world, timing every step of each.
+
+    This steps through the same sense-act loop as becca.brain.run().
+
+    Parameters
+    ----------
+    world : World
+        The world that Becca will learn.
+    config : dict, optional
+        Configurable brain parameters. See becca.brain.Brain.
+
+    Returns
+    -------
+    performance : float
+        The average reward per time step over the world's lifespan.
+    world_latency, brain_latency : LatencyHistogram
+        The latencies of the world's step() and the brain's
+        sense_act_learn().
+    """
+    import becca.brain as becca_brain
+
+    world_latency = LatencyHistogram('World')
+    brain_latency = LatencyHistogram('Brain')
+    brain = becca_brain.Brain(world, config)
+    clock = time.perf_counter_ns
+
+    # Start at a resting state.
+    actions = np.zeros(world.n_actions)
+    sensors, reward = world.step(actions)
+    while world.is_alive():
+        start_ns = clock()
+        actions = brain.sense_act_learn(copy.deepcopy(sensors), reward)
+        brain_ns = clock()
+        sensors, reward = world.step(copy.copy(actions))
+        world_ns = clock()
+        brain_latency.record(brain_ns - start_ns, brain.timestep)
+        world_latency.record(world_ns - brain_ns, world.timestep)
+
+    try:
+        world.close_world(brain)
+    except AttributeError:
+        print("Closing", world.name)
+    performance = brain.report_performance()
+
+    events = brain_events(brain)
+    brain_latency.report(events)
+    world_latency.report(events)
+    return performance, world_latency, brain_latency
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Report the latency of every time step of a world.')
+    parser.add_argument(
+        'world', help='The name of the world module, such as grid_1D.')
+    parser.add_argument(
+        '-t', '--lifespan', type=float, default=1e4,
+        help='The number of time steps to run the world.')
+    args = parser.parse_args()
+    module = importlib.import_module('becca_test.' + args.world)
+    run(module.World(lifespan=args.lifespan))
@@ -0,0 +1,367 @@
+"""
+Sweep brain settings and world parameters across a process pool.
+
+A sweep is described by a spec, a json file or a dict like this one.
+
+    {
+        "world": "grid_1D",
+        "lifespan": 1000,
+        "seeds": [0, 1],
+        "search": "grid",
+        "brain": {"n_features": [20, 40]},
+        "world_kwargs": {"size": [9, 15]},
+        "world_attributes": {"jump_fraction": [0.05, 0.1, 0.2]}
+    }
+
+"brain" holds arguments for the brain's config. See becca's
+Brain.__init__(). "world_kwargs" holds arguments for the World's
+constructor, such as fov_span. "world_attributes" holds attributes
+that are set on the World after it is created, such as jump_fraction,
+energy_cost or noise_magnitude.
+
+With "search": "grid", every combination of the listed values is run.
+With "search": "random", "n_samples" combinations are drawn, using
+"seed". Each parameter can then also be a range to draw from, such as
+{"uniform": [0.05, 0.2]} or {"log_uniform": [0.001, 0.1]}.
+Either way, each combination is run once for each of the "seeds".
+
+Each point in the sweep runs with a fresh brain in its own process.
+Results are cached by a hash of the point's whole configuration,
+along with the world's source and the becca version (see
+result_cache.py), so a point never has to be run twice. As each point
+finishes, it is added to ``results.csv`` in ``log/sweeps/<spec hash>``.
+Running the same spec again picks up where the last run stopped.
+
+Usage
+
+    python3 -m becca_test.param_sweep spec.json --workers 4
+"""
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+import becca_test.checkpoint as checkpoint
+import becca_test.result_cache as result_cache
+from becca_test.world_tools import world_class
+
+# sweeps_directory : str
+#     The default location of the sweep directories.
+module_path = os.path.dirname(os.path.abspath(__file__))
+sweeps_directory = os.path.join(module_path, 'log', 'sweeps')
+# sections : list of (str, str)
+#     The parts of a spec that hold parameters, and the prefix
+#     each one's parameters get in the results table.
+sections = [
+    ('brain', 'brain.'),
+    ('world_kwargs', 'world.'),
+    ('world_attributes', 'attribute.'),
+]
+# result_columns : list of str
+#     The columns of the results table that come from running a point.
+result_columns = ['score', 'ms_per_step', 'n_sensors', 'n_actions']
+
+
+def spec_hash(spec):
+    """
+    Summarize a spec in a short string, to name its sweep directory.
+    """
+    text = json.dumps(spec, sort_keys=True)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:12]
+
+
+def parameters(spec):
+    """
+    List the parameters that a spec varies.
+
+    Returns
+    -------
+    parameters : list of (str, str, object)
+        The section, name and values (or range) of each parameter.
+    """
+    return [(section, name, values)
+            for section, _ in sections
+            for name, values in sorted(spec.get(section, {}).items())]
+
+
+def draw(values, random_state):
+    """
+    Draw one value for a parameter in a random search.
+
+    Parameters
+    ----------
+    values : list or dict
+        Either a list of values to choose from, or a dict with
+        a single key, 'uniform' or 'log_uniform', holding the
+        lowest and highest values. If both of those are ints,
+        'uniform' draws an int.
+    random_state : RandomState
+
+    Returns
+    -------
+    value : int, float or other json-friendly value
+    """
+    if isinstance(values, dict):
+        if 'uniform' in values:
+            low, high = values['uniform']
+            if isinstance(low, int) and isinstance(high, int):
+                return int(random_state.randint(low, high + 1))
+            return float(random_state.uniform(low, high))
+        if 'log_uniform' in values:
+            low, high = values['log_uniform']
+            return float(np.exp(random_state.uniform(
+                np.log(low), np.log(high))))
+        raise ValueError('Ranges need to be uniform or log_uniform, not {0}'
+                         .format(', '.join(values)))
+    return values[random_state.randint(len(values))]
+
+
+def points(spec):
+    """
+    List every point in a sweep.
+
+    Parameters
+    ----------
+    spec : dict
+        See the top of this module.
+
+    Returns
+    -------
+    configs : list of dict
+        The full configuration of each point, in the order they run.
+    """
+    swept = parameters(spec)
+    search = spec.get('search', 'grid')
+    if search == 'grid':
+        combinations = itertools.product(
+            *[values for _, _, values in swept])
+    elif search == 'random':
+        random_state = np.random.RandomState(spec.get('seed', 0))
+        combinations = [
+            [draw(values, random_state) for _, _, values in swept]
+            for _ in range(int(spec.get('n_samples', 10)))]
+    else:
+        raise ValueError('search needs to be grid or random, not {0}'
+                         .format(search))
+
+    configs = []
+    for combination in combinations:
+        for seed in spec.get('seeds', [0]):
+            config = {
+                'world': spec['world'],
+                'lifespan': int(spec.get('lifespan', 1e4)),
+                'seed': seed,
+            }
+            for section, _ in sections:
+                config[section] = {}
+            for (section, name, _), value in zip(swept, combination):
+                config[section][name] = value
+            configs.append(config)
+    return configs
+
+
+def config_key(config):
+    """
+    Build the cache key for one point of a sweep.
+
+    Like result_cache.cache_key(), this changes whenever the world's
+    source or the installed becca does.
+    """
+    key_parts = [
+        json.dumps(config, sort_keys=True),
+        result_cache.world_fingerprint(world_class(config['world'])),
+        result_cache.becca_fingerprint(),
+    ]
+    return hashlib.sha256('|'.join(key_parts).encode('utf-8')).hexdigest()
+
+
+def run_point(config):
+    """
+    Run one point of a sweep, with a fresh brain.
+
+    The brain neither restores from nor saves into becca's log
+    directory, so points can't affect each other.
+
+    Parameters
+    ----------
+    config : dict
+        One of the configurations from points().
+
+    Returns
+    -------
+    result : dict
+        The values of result_columns.
+    """
+    import becca.brain as becca_brain
+
+    np.random.seed(config['seed'])
+    world = world_class(config['world'])(
+        lifespan=config['lifespan'], **config['world_kwargs'])
+    for name, value in config['world_attributes'].items():
+        if not hasattr(world, name):
+            raise AttributeError('{0} has no attribute {1}'.format(
+                config['world'], name))
+        setattr(world, name, value)
+
+    log_directory = tempfile.mkdtemp()
+    brain_config = {'restore': False, 'log_directory': log_directory}
+    brain_config.update(config['brain'])
+    try:
+        start_time = time.time()
+        performance = becca_brain.run(world, config=brain_config)
+        delta_time = time.time() - start_time
+    finally:
+        shutil.rmtree(log_directory, ignore_errors=True)
+    return {
+        'score': float(performance),
+        'ms_per_step': 1000. * delta_time / config['lifespan'],
+        'n_sensors': world.n_sensors,
+        'n_actions': world.n_actions,
+    }
+
+
+def _run_keyed_point(key_config):
+    """
+    Run a (key, config) pair in a worker process, and say which it was.
+    """
+    key, config = key_config
+    return key, run_point(config)
+
+
+def columns(spec):
+    """
+    Name the columns of a sweep's results table.
+    """
+    prefixes = dict(sections)
+    return (['key', 'seed'] +
+            [prefixes[section] + name for section, name, _ in
+             parameters(spec)] +
+            result_columns)
+
+
+def table_row(spec, key, config, result):
+    """
+    Lay out one point's configuration and result as a table row.
+    """
+    row = [key, config['seed']]
+    for section, name, _ in parameters(spec):
+        row.append(config[section][name])
+    return row + [result[column] for column in result_columns]
+
+
+def sweep(spec, n_workers=None, directory=sweeps_directory):
+    """
+    Run every point of a sweep that hasn't been run already.
+
+    Parameters
+    ----------
+    spec : dict or str
+        The spec, or the name of a json file holding it.
+    n_workers : int, optional
+        The number of points to run at once.
+        Defaults to the number of CPUs.
+    directory : str
+        The location of all the sweep directories.
+
+    Returns
+    -------
+    table_filename : str
+        The results table, with one row for every point.
+    """
+    if not isinstance(spec, dict):
+        with open(spec, 'r') as spec_file:
+            spec = json.load(spec_file)
+    if n_workers is None:
+        n_workers = multiprocessing.cpu_count()
+    sweep_dir = checkpoint.run_directory(spec_hash(spec), directory=directory)
+    checkpoint._write_atomic(os.path.join(sweep_dir, 'spec.json'),
+                             json.dumps(spec, indent=2))
+    table_filename = os.path.join(sweep_dir, 'results.csv')
+
+    done = set()
+    new_table = not os.path.isfile(table_filename)
+    if not new_table:
+        with open(table_filename, 'r', newline='') as table_file:
+            done = set(row['key'] for row in csv.DictReader(table_file))
+
+    keyed_configs = {}
+    for config in points(spec):
+        keyed_configs.setdefault(config_key(config), config)
+    pending = []
+    with open(table_filename, 'a', newline='') as table_file:
+        writer = csv.writer(table_file)
+        if new_table:
+            writer.writerow(columns(spec))
+        for key, config in keyed_configs.items():
+            if key in done:
+                continue
+            result = result_cache.load(key)
+            if result is None:
+                pending.append((key, config))
+            else:
+                writer.writerow(table_row(spec, key, config, result))
+                done.add(key)
+        table_file.flush()
+        print('Sweep {0}: {1} points, {2} done already, {3} to run.'.format(
+            spec_hash(spec), len(keyed_configs), len(done), len(pending)))
+
+        if pending:
+            # A fresh process for every point keeps one brain's memory
+            # from piling up under the next.
+            with multiprocessing.Pool(
+                    processes=min(n_workers, len(pending)),
+                    maxtasksperchild=1) as pool:
+                for key, result in pool.imap_unordered(
+                        _run_keyed_point, pending):
+                    result_cache.store(key, result)
+                    writer.writerow(table_row(
+                        spec, key, keyed_configs[key], result))
+                    table_file.flush()
+                    print('Finished a point: score {0:.3},'.format(
+                        result['score']),
+                        '{0:.3} ms per step'.format(result['ms_per_step']))
+
+    report(table_filename)
+    return table_filename
+
+
+def report(table_filename, n_best=10):
+    """
+    Print the best points of a sweep, by score.
+
+    Parameters
+    ----------
+    table_filename : str
+        The results table written by sweep().
+    n_best : int
+        The number of points to print.
+    """
+    with open(table_filename, 'r', newline='') as table_file:
+        rows = list(csv.DictReader(table_file))
+    rows.sort(key=lambda row: float(row['score']), reverse=True)
+    names = [name for name in (rows[0].keys() if rows else [])
+             if name != 'key']
+    print('Best {0} of {1} points, in {2}'.format(
+        min(n_best, len(rows)), len(rows), table_filename))
+    print('    ' + ', '.join(names))
+    for row in rows[:n_best]:
+        print('    ' + ', '.join(row[name] for name in names))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Sweep brain settings and world parameters.')
+    parser.add_argument('spec', help='The json file describing the sweep.')
+    parser.add_argument(
+        '-j', '--workers', type=int, default=None,
+        help='The number of points to run at once.')
+    args = parser.parse_args()
+    sweep(args.spec, n_workers=args.workers)
@@ -0,0 +1,212 @@
+"""
+An on-disk cache of test world results.
+
+Each result is keyed by a hash of everything that can change it:
+the source of the world (and the worlds it is built on),
+the version and source of the installed becca package,
+the lifespan, the random seed and the number of action repeats.
+If none of those have changed, there is no need to run the world again.
+
+Cached results are stored as small json files in ``log/cache``.
+When the cache grows past its size limit, the least recently
+used results are removed first.
+"""
+import hashlib
+import inspect
+import json
+import os
+import sys
+
+import becca
+import becca_test.action_repeat as action_repeat
+
+# cache_directory : str
+#     The default location of the cached results.
+module_path = os.path.dirname(os.path.abspath(__file__))
+cache_directory = os.path.join(module_path, 'log', 'cache')
+# max_cache_bytes : int
+#     The default limit on the total size of the cache.
+max_cache_bytes = int(1e6)
+
+# Hashing the becca source is slow-ish, so only do it once per session.
+_becca_fingerprint = None
+
+
+def becca_fingerprint():
+    """
+    Summarize the installed version of becca in a single string.
+
+    Returns
+    -------
+    fingerprint : str
+        The becca version number, followed by a hash of its source.
+    """
+    global _becca_fingerprint
+    if _becca_fingerprint is not None:
+        return _becca_fingerprint
+
+    try:
+        from importlib.metadata import version
+        becca_version = version('becca')
+    except Exception:
+        becca_version = getattr(becca, '__version__', 'unknown')
+
+    hasher = hashlib.sha256()
+    becca_path = os.path.dirname(os.path.abspath(becca.__file__))
+    for directory, subdirectories, filenames in os.walk(becca_path):
+        subdirectories.sort()
+        for filename in sorted(filenames):
+            if filename.endswith('.py'):
+                with open(os.path.join(directory, filename), 'rb') as source:
+                    hasher.update(source.read())
+    _becca_fingerprint = '-'.join([becca_version, hasher.hexdigest()])
+    return _becca_fingerprint
+
+
+def world_fingerprint(world_class):
+    """
+    Hash the source code that defines a world.
+
+    This includes the module of the world itself, the modules of any
+    becca_test worlds it inherits from, and the shared world_tools.
+
+    Parameters
+    ----------
+    world_class : World
+        The class of the world to fingerprint.
+
+    Returns
+    -------
+    fingerprint : str
+        A hex digest of the world's source.
+    """
+    module_names = []
+    for cls in inspect.getmro(world_class):
+        if (cls.__module__.startswith('becca_test') and
+                cls.__module__ not in module_names):
+            module_names.append(cls.__module__)
+    module_names.append('becca_test.world_tools')
+
+    hasher = hashlib.sha256()
+    for module_name in module_names:
+        module = sys.modules.get(module_name)
+        if module is None:
+            module = __import__(module_name, fromlist=['_'])
+        with open(inspect.getsourcefile(module), 'rb') as source:
+            hasher.update(source.read())
+    return hasher.hexdigest()
+
+
+def cache_key(world_class, lifespan, seed, repeat=1):
+    """
+    Build the key for a single world run.
+
+    Parameters
+    ----------
+    world_class : World
+        The class of the world being run.
+    lifespan : int
+        The number of time steps the world is run.
+    seed : int or None
+        The seed of the random number generator.
+    repeat : int, optional
+        The number of time steps per brain decision.
+        See action_repeat.py.
+
+    Returns
+    -------
+    key : str
+        A hex digest that changes whenever the result might.
+    """
+    key_parts = [
+        world_fingerprint(world_class),
+        becca_fingerprint(),
+        str(int(lifespan)),
+        str(seed),
+    ]
+    # Leave the keys of runs without repeats as they were.
+    if repeat != 1:
+        key_parts.append('repeat={0}'.format(int(repeat)))
+        key_parts.append(world_fingerprint(action_repeat.ActionRepeat))
+    return hashlib.sha256('|'.join(key_parts).encode('utf-8')).hexdigest()
+
+
+def load(key, directory=cache_directory):
+    """
+    Retrieve a cached result, if there is one.
+
+    Parameters
+    ----------
+    key : str
+        The key returned by ``cache_key()``.
+    directory : str
+        The location of the cache.
+
+    Returns
+    -------
+    result : dict or None
+        The cached result, or None if it is missing or unreadable.
+    """
+    filename = os.path.join(directory, key + '.json')
+    try:
+        with open(filename, 'r') as cache_file:
+            result = json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+    # Mark the result as recently used so that it is evicted last.
+    os.utime(filename, None)
+    return result
+
+
+def store(key, result, directory=cache_directory,
+          max_bytes=max_cache_bytes):
+    """
+    Add a result to the cache, then trim the cache to size.
+
+    Parameters
+    ----------
+    key : str
+        The key returned by ``cache_key()``.
+    result : dict
+        Anything that can be written as json.
+    directory : str
+        The location of the cache.
+    max_bytes : int
+        The limit on the total size of all the cached results.
+    """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    filename = os.path.join(directory, key + '.json')
+    # Write to a temporary file first so that an interrupted run
+    # never leaves a partial result behind.
+    temp_filename = filename + '.tmp'
+    with open(temp_filename, 'w') as cache_file:
+        json.dump(result, cache_file)
+    os.replace(temp_filename, filename)
+    evict(directory, max_bytes)
+
+
+def evict(directory=cache_directory, max_bytes=max_cache_bytes):
+    """
+    Remove the least recently used results until the cache fits.
+
+    Parameters
+    ----------
+    directory : str
+        The location of the cache.
+    max_bytes : int
+        The limit on the total size of all the cached results.
+    """
+    entries = []
+    for filename in os.listdir(directory):
+        if filename.endswith('.json'):
+            full_filename = os.path.join(directory, filename)
+            stats = os.stat(full_filename)
+            entries.append((stats.st_mtime, stats.st_size, full_filename))
+    entries.sort()
+    total_bytes = sum(size for _, size, _ in entries)
+    for _, size, full_filename in entries:
+        if total_bytes <= max_bytes:
+            break
+        os.remove(full_filename)
+        total_bytes -= size
@@ -0,0 +1,444 @@
+"""
+Run a world in another process, handing data back and forth
+through shared memory.
+
+Sending sensors over a pipe means pickling them, copying them through
+the kernel and unpickling them, every time step. Here the world's
+process and the brain's process share a block of memory instead.
+The brain writes its actions into a slot in a ring, the world writes
+its sensors and reward into the matching slot, and the only handoff
+is a pair of counters: the number of actions posted and
+the number of results ready. Nothing is serialized.
+
+    import becca.brain as becca_brain
+    from becca_test.shared_memory_world import SharedMemoryWorld
+    becca_brain.run(SharedMemoryWorld('image_2D', lifespan=1e4))
+
+The ring lets several actions be in flight at once,
+which step_many() uses to keep the world busy.
+
+Compare the latency with a pipe from the command line
+
+    python3 -m becca_test.shared_memory_world grid_1D image_2D
+"""
+import argparse
+import multiprocessing
+from multiprocessing import resource_tracker, shared_memory
+import os
+import time
+
+import numpy as np
+
+from becca_test.base_world import World as BaseWorld
+import becca_test.world_tools as wtools
+from becca_test.world_tools import world_class
+
+# The positions of the counters at the start of the shared block.
+ACTIONS_POSTED = 0
+RESULTS_READY = 1
+CLOSED = 2
+n_counters = 4
+# spin_limit : int
+#     The number of times to check a counter before starting to yield
+#     the processor between checks. Spinning is the fastest way
+#     to notice a change, but it keeps a core busy. On a single core
+#     it only keeps the other process from running, so don't spin there.
+if os.cpu_count() == 1:
+    spin_limit = 0
+else:
+    spin_limit = 10000
+# yield_limit : int
+#     The number of times to yield the processor after spinning,
+#     before starting to sleep between checks. Yielding returns
+#     right away when nothing else wants the core, so on its own
+#     it still keeps a core busy while the other process computes.
+yield_limit = 1000
+# min_sleep, max_sleep : float
+#     The first and the longest sleep between checks, in seconds.
+#     Each sleep is twice as long as the one before, up to max_sleep,
+#     which bounds the extra latency once the wait is over.
+min_sleep = 1e-5
+max_sleep = 1e-4
+
+
+def _layout(n_sensors, n_actions, ring_size):
+    """
+    Work out the size of the shared block and where each part starts.
+
+    Returns
+    -------
+    n_bytes : int
+    actions_offset, results_offset : int
+    """
+    itemsize = np.dtype(np.float64).itemsize
+    actions_offset = n_counters * np.dtype(np.int64).itemsize
+    results_offset = actions_offset + ring_size * n_actions * itemsize
+    n_bytes = results_offset + ring_size * (n_sensors + 1) * itemsize
+    return n_bytes, actions_offset, results_offset
+
+
+def _views(buffer, n_sensors, n_actions, ring_size):
+    """
+    Lay out the counters, actions and results as arrays over the block.
+    """
+    _, actions_offset, results_offset = _layout(
+        n_sensors, n_actions, ring_size)
+    counters = np.ndarray((n_counters,), dtype=np.int64, buffer=buffer)
+    actions = np.ndarray((ring_size, n_actions), dtype=np.float64,
+                         buffer=buffer, offset=actions_offset)
+    results = np.ndarray((ring_size, n_sensors + 1), dtype=np.float64,
+                         buffer=buffer, offset=results_offset)
+    return counters, actions, results
+
+
+def wait_until(counters, index, value, is_alive=None):
+    """
+    Wait for a counter to reach a value.
+
+    Spin for a while, then yield the processor for a while,
+    then sleep between checks, backing off up to max_sleep.
+
+    Returns
+    -------
+    bool
+        False if the counter never got there because the other
+        process has ended or the ring has been closed.
+    """
+    n_checks = 0
+    sleep_seconds = min_sleep
+    while counters[index] < value:
+        if counters[CLOSED]:
+            return False
+        n_checks += 1
+        if n_checks > spin_limit:
+            if is_alive is not None and not is_alive():
+                return False
+            if n_checks > spin_limit + yield_limit:
+                time.sleep(sleep_seconds)
+                sleep_seconds = min(2 * sleep_seconds, max_sleep)
+            else:
+                os.sched_yield()
+    return True
+
+
+def _host(world_name, lifespan, seed, world_kwargs, ring_size, connection):
+    """
+    Create a world and step it whenever an action is posted.
+
+    This runs in the world's own process. It sends the world's
+    dimensions back through the connection, gets the name of the
+    shared block that the other process created for them, and from
+    then on only talks through shared memory. It stops when the ring
+    is closed, or when the process that started it has died without
+    closing it, which shows up as a change of parent process.
+    """
+    parent_pid = os.getppid()
+
+    def parent_is_alive():
+        return os.getppid() == parent_pid
+
+    if seed is not None:
+        np.random.seed(seed)
+    world = world_class(world_name)(lifespan=lifespan, **world_kwargs)
+    connection.send({
+        'name': world.name,
+        'n_sensors': world.n_sensors,
+        'n_actions': world.n_actions,
+        'lifespan': world.lifespan,
+        'timestep': world.timestep,
+    })
+    block = shared_memory.SharedMemory(name=connection.recv())
+    connection.close()
+    counters, actions, results = _views(
+        block.buf, world.n_sensors, world.n_actions, ring_size)
+
+    n_done = 0
+    while wait_until(counters, ACTIONS_POSTED, n_done + 1,
+                     parent_is_alive):
+        slot = n_done % ring_size
+        sensors, reward = world.step(actions[slot].copy())
+        if isinstance(sensors, tuple):
+            sensors = wtools.sparse_to_dense(
+                sensors[0], sensors[1], world.n_sensors)
+        results[slot, 0] = reward
+        results[slot, 1:] = sensors
+        n_done += 1
+        # The results have to be in place before they are announced.
+        counters[RESULTS_READY] = n_done
+
+    del counters, actions, results
+    # The other process owns the block and removes it.
+    block.close()
+
+
+class SharedMemoryWorld(BaseWorld):
+    """
+    A stand-in for a world running in its own process.
+
+    Attributes
+    ----------
+    Most of this world's attributes are defined in base_world.py.
+    name, n_sensors, n_actions and lifespan are copied
+    from the hosted world.
+    """
+    def __init__(self, world_name, lifespan=None, seed=None, ring_size=16,
+                 **world_kwargs):
+        """
+        Start a process to host the world, and connect to it.
+
+        Parameters
+        ----------
+        world_name : str
+            The name of the world module, such as 'grid_1D'.
+        lifespan : int, optional
+            The number of time steps to continue the world.
+        seed : int, optional
+            If given, seed the world process's random number generator
+            before creating the world.
+        ring_size : int, optional
+            The number of slots in the ring, which is the largest
+            number of steps that can be in flight at once.
+        world_kwargs
+            Any other arguments to the world's constructor.
+        """
+        BaseWorld.__init__(self, lifespan)
+        connection, world_connection = multiprocessing.Pipe()
+        # Start the resource tracker before the world process, so that
+        # both processes share it. Otherwise the world process starts
+        # its own when it opens the block, and that one removes the
+        # block as soon as the world process ends.
+        resource_tracker.ensure_running()
+        # process : multiprocessing.Process
+        #     The process hosting the world.
+        self.process = multiprocessing.Process(
+            target=_host, args=(world_name, lifespan, seed, world_kwargs,
+                                ring_size, world_connection),
+            daemon=True)
+        self.process.start()
+        world_connection.close()
+        try:
+            description = connection.recv()
+        except EOFError:
+            self.process.join()
+            raise RuntimeError(
+                "The world process couldn't create {0}.".format(world_name))
+
+        self.name = description['name']
+        self.n_sensors = description['n_sensors']
+        self.n_actions = description['n_actions']
+        self.lifespan = description['lifespan']
+        self.timestep = description['timestep']
+        # ring_size : int
+        #     The number of slots in the ring.
+        self.ring_size = ring_size
+        # block : SharedMemory
+        #     The memory shared with the world process. This process
+        #     creates it and removes it in close_world().
+        n_bytes, _, _ = _layout(self.n_sensors, self.n_actions, ring_size)
+        self.block = shared_memory.SharedMemory(create=True, size=n_bytes)
+        self.counters, self.actions, self.results = _views(
+            self.block.buf, self.n_sensors, self.n_actions, ring_size)
+        self.counters[:] = 0
+        connection.send(self.block.name)
+        connection.close()
+        # n_posted, n_collected : int
+        #     The number of actions sent to the world and the number
+        #     of results read back.
+        self.n_posted = 0
+        self.n_collected = 0
+
+    def post(self, action):
+        """
+        Hand an action to the world without waiting for the result.
+        """
+        if self.n_posted - self.n_collected >= self.ring_size:
+            raise RuntimeError('The ring is full. Collect some results.')
+        self.actions[self.n_posted % self.ring_size] = action
+        self.n_posted += 1
+        # The action has to be in place before it is announced.
+        self.counters[ACTIONS_POSTED] = self.n_posted
+
+    def collect(self):
+        """
+        Wait for the result of the oldest action in flight.
+
+        Returns
+        -------
+        sensors : array of floats
+        reward : float
+        """
+        if not wait_until(self.counters, RESULTS_READY,
+                          self.n_collected + 1, self.process.is_alive):
+            raise RuntimeError('The world process has stopped.')
+        row = self.results[self.n_collected % self.ring_size]
+        sensors = row[1:].copy()
+        reward = float(row[0])
+        self.n_collected += 1
+        self.timestep += 1
+        return sensors, reward
+
+    def step(self, action):
+        """
+        Advance the hosted world by one time step.
+
+        Parameters
+        ----------
+        action : array of floats
+            The set of action commands to execute.
+
+        Returns
+        -------
+        sensors : array of floats
+            The values of each of the sensors.
+        reward : float
+            The amount of reward or punishment given by the world.
+        """
+        self.post(action)
+        return self.collect()
+
+    def step_many(self, actions):
+        """
+        Advance the hosted world through a series of actions.
+
+        Up to ring_size actions are kept in flight, so the world
+        never waits on the brain's process between steps.
+
+        Parameters
+        ----------
+        actions : 2D array of floats
+            One row of action commands per time step.
+
+        Returns
+        -------
+        sensors : 2D array of floats
+            One row of sensor values per time step.
+        rewards : array of floats
+            The reward after each time step.
+        """
+        n_steps = actions.shape[0]
+        sensors = np.zeros((n_steps, self.n_sensors))
+        rewards = np.zeros(n_steps)
+        i_collected = 0
+        for action in actions:
+            if self.n_posted - self.n_collected >= self.ring_size:
+                sensors[i_collected], rewards[i_collected] = self.collect()
+                i_collected += 1
+            self.post(action)
+        while i_collected < n_steps:
+            sensors[i_collected], rewards[i_collected] = self.collect()
+            i_collected += 1
+        return sensors, rewards
+
+    def close_world(self, brain=None):
+        """
+        Stop the world process and remove the shared memory.
+        """
+        self.counters[CLOSED] = 1
+        self.process.join()
+        del self.counters, self.actions, self.results
+        self.block.close()
+        self.block.unlink()
+        print('Closing', self.name)
+
+
+def _pipe_host(world_name, lifespan, seed, world_kwargs, connection):
+    """
+    Host a world that is stepped through a pipe, for comparison.
+    """
+    if seed is not None:
+        np.random.seed(seed)
+    world = world_class(world_name)(lifespan=lifespan, **world_kwargs)
+    connection.send((world.n_sensors, world.n_actions))
+    while True:
+        action = connection.recv()
+        if action is None:
+            break
+        connection.send(world.step(action))
+    connection.close()
+
+
+def benchmark(world_names, n_steps=10000, seed=0):
+    """
+    Compare the time per step through a pipe and through shared memory.
+
+    Each world is stepped with the same random actions three ways:
+    in the same process, through a pipe to another process
+    (pickling actions and sensors each way), and through shared memory.
+
+    Parameters
+    ----------
+    world_names : list of str
+        The names of the world modules to time.
+    n_steps : int
+        The number of time steps to time each way.
+    seed : int
+        The seed for the world and the actions.
+
+    Returns
+    -------
+    timings : dict of str: dict
+        For each world, the microseconds per step for each transport.
+    """
+    timings = {}
+    for world_name in world_names:
+        np.random.seed(seed)
+        local_world = world_class(world_name)()
+        all_actions = (np.random.random_sample(
+            (n_steps, local_world.n_actions)) < .2).astype(float)
+
+        start_time = time.time()
+        for action in all_actions:
+            local_world.step(action.copy())
+        local_time = time.time() - start_time
+
+        connection, world_connection = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=_pipe_host,
+            args=(world_name, None, seed, {}, world_connection))
+        process.start()
+        connection.recv()
+        start_time = time.time()
+        for action in all_actions:
+            connection.send(action)
+            connection.recv()
+        pipe_time = time.time() - start_time
+        connection.send(None)
+        process.join()
+
+        shared_world = SharedMemoryWorld(world_name, seed=seed)
+        start_time = time.time()
+        for action in all_actions:
+            shared_world.step(action)
+        shared_time = time.time() - start_time
+        start_time = time.time()
+        shared_world.step_many(all_actions)
+        batch_time = time.time() - start_time
+        shared_world.close_world()
+
+        timings[world_name] = {
+            'local': 1e6 * local_time / n_steps,
+            'pipe': 1e6 * pipe_time / n_steps,
+            'shared_memory': 1e6 * shared_time / n_steps,
+            'shared_memory_batch': 1e6 * batch_time / n_steps,
+        }
+
+    print('Microseconds per step, over {0} steps:'.format(n_steps))
+    print('    world, in process, pipe, shared memory, shared memory batch')
+    for world_name, timing in timings.items():
+        print('    {0}, {1:.3}, {2:.3}, {3:.3}, {4:.3}'.format(
+            world_name, timing['local'], timing['pipe'],
+            timing['shared_memory'], timing['shared_memory_batch']))
+    return timings
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Time stepping worlds through a pipe and shared memory.')
+    parser.add_argument(
+        'worlds', nargs='*', default=['grid_1D', 'image_2D'],
+        help='The names of the world modules to time.')
+    parser.add_argument(
+        '-n', '--steps', type=int, default=10000,
+        help='The number of time steps to time each way.')
+    args = parser.parse_args()
+    benchmark(args.worlds, n_steps=args.steps)
@@ -0,0 +1,279 @@
+"""
+Generated high-dimensional stress worlds.
+
+These worlds test how the brain behaves with far more sensors than
+any of the hand-built worlds have, thousands to hundreds of thousands.
+The task underneath is deliberately simple, so that the best possible
+performance is known exactly, and the world itself is cheap to step,
+so that nearly all of the time measured is spent in the brain.
+
+There is a ring of hidden states. Each one lights up its own
+random pattern of sensors. Actions move around the ring, and one
+state is rewarded. Every so often the agent is bumped to a random state.
+Some of the active sensors can be random distractors that
+change every time step and carry no information.
+
+Usage
+To run a 10,000 sensor world standalone from the command line
+
+    python3 -m becca_test.synthetic 10000
+
+To get one world of each of the stress sizes
+
+    from becca_test.synthetic import stress_worlds
+    for world in stress_worlds(lifespan=1e4):
+        becca_brain.run(world)
+"""
+import sys
+import time
+
+import numpy as np
+
+from becca_test.base_world import World as BaseWorld
+import becca_test.world_tools as wtools
+
+# stress_sizes : list of int
+#     The numbers of sensors in the standard family of stress worlds.
+stress_sizes = [1000, 10000, 100000]
+
+
+class World(BaseWorld):
+    """
+    A generated world with many sensors and a known optimum.
+
+    The hidden state is one of n_states positions on a ring.
+    There are n_actions // 2 actions that step forward around the
+    ring by 1, 2, 3... positions, and as many that step backward.
+    Actions taken together add up, so a single time step can move
+    as far as 1 + 2 + ... + n_actions // 2 positions.
+    Being in the target state is rewarded with 1. Nothing else is
+    rewarded or punished. See optimal_reward() for the best
+    average reward per time step that any agent can achieve.
+
+    Most of this world's attributes are defined in base_world.py.
+    The few that aren't are defined below.
+    """
+    def __init__(self, lifespan=None, n_sensors=1000, n_actions=8,
+                 n_states=64, sparsity=.01, noise_fraction=0.,
+                 structure_seed=0):
+        """
+        Generate the world.
+
+        Parameters
+        ----------
+        lifespan : int
+            The number of time steps to continue the world.
+        n_sensors : int
+            The number of sensors.
+        n_actions : int
+            The number of actions. This needs to be even and at least 2.
+        n_states : int
+            The number of hidden states around the ring.
+        sparsity : float
+            The fraction of sensors that are active at each time step.
+        noise_fraction : float
+            The fraction of the active sensors that are random distractors.
+            The rest belong to the hidden state's pattern.
+        structure_seed : int
+            Seeds the generation of the sensor patterns, so that the same
+            arguments always make the same world. The global random number
+            generator still drives the jumps, and the distractors.
+        """
+        BaseWorld.__init__(self, lifespan)
+        if n_actions < 2 or n_actions % 2 != 0:
+            raise ValueError(
+                'n_actions needs to be even and at least 2, not {0}'.format(
+                    n_actions))
+        self.n_sensors = int(n_sensors)
+        self.n_actions = int(n_actions)
+        self.name = 'synthetic_{0}'.format(self.n_sensors)
+        print("Entering", self.name)
+
+        # sensor_dtype : numpy dtype
+        #     The data type of the sensor array. See world_tools.py.
+        self.sensor_dtype = wtools.sensor_dtype
+        # n_states : int
+        #     The number of hidden states around the ring.
+        self.n_states = int(n_states)
+        # max_step : int
+        #     The largest number of states that a single action can
+        #     move the agent. Actions taken together add up.
+        self.max_step = self.n_actions // 2
+        steps = np.arange(1., self.max_step + 1.)
+        # action_steps : array of floats
+        #     Each action's contribution to the step around the ring.
+        self.action_steps = np.concatenate((steps, -steps))
+        # target_state : int
+        #     The state that is rewarded.
+        self.target_state = 0
+        # state : int
+        #     The current hidden state.
+        self.state = self.n_states // 2
+        # jump_fraction : float
+        #     The fraction of time steps on which the agent jumps to
+        #     a random state.
+        self.jump_fraction = 0.1
+
+        n_active = max(1, int(round(sparsity * self.n_sensors)))
+        # n_noise : int
+        #     The number of distractor sensors active at each time step.
+        self.n_noise = int(round(noise_fraction * n_active))
+        # patterns : 2D array of ints
+        #     The sensors that each hidden state lights up, one sorted row
+        #     per state. Rows may repeat an index, which does no harm.
+        structure = np.random.RandomState(structure_seed)
+        self.patterns = np.sort(structure.randint(
+            self.n_sensors,
+            size=(self.n_states, max(1, n_active - self.n_noise))), axis=1)
+        # sparse_sensors : bool
+        #     If True, step() returns the sensors as a pair of arrays,
+        #     the sorted indices of the active sensors and their values,
+        #     rather than as a dense array.
+        self.sparse_sensors = False
+        # sensors : array of floats
+        #     The dense sensor array. It is reused from step to step,
+        #     clearing only the sensors that were active,
+        #     so that the cost of a step doesn't grow with n_sensors.
+        self.sensors = np.zeros(self.n_sensors, dtype=self.sensor_dtype)
+        # active : array of ints
+        #     The sensors that are currently set in the dense array.
+        self.active = np.zeros(0, dtype=int)
+        self.action = np.zeros(self.n_actions)
+        # world_seconds : float
+        #     The total time spent in step(), for comparing against
+        #     the time spent in the brain.
+        self.world_seconds = 0.
+
+        self.visualize_interval = 1e6
+
+    def step(self, action):
+        """
+        Advance the world one time step.
+
+        Parameters
+        ----------
+        action : array of floats
+            The set of action commands to execute.
+
+        Returns
+        -------
+        sensors : array of floats
+            The values of each of the sensors.
+        reward : float
+            The amount of reward or punishment given by the world.
+        """
+        start_time = time.perf_counter()
+        self.timestep += 1
+        self.action = np.round(action)
+        step_size = int(np.dot(self.action, self.action_steps))
+        self.state = (self.state + step_size) % self.n_states
+
+        # At random intervals, jump to a random state.
+        if np.random.random_sample() < self.jump_fraction:
+            self.state = np.random.randint(self.n_states)
+
+        active = self.patterns[self.state]
+        if self.n_noise > 0:
+            active = np.concatenate((active, np.random.randint(
+                self.n_sensors, size=self.n_noise)))
+        if self.sparse_sensors:
+            indices = np.unique(active)
+            sensors = (indices, np.ones(indices.size,
+                                        dtype=self.sensor_dtype))
+        else:
+            self.sensors[self.active] = 0
+            self.sensors[active] = 1
+            self.active = active
+            sensors = self.sensors
+
+        reward = float(self.state == self.target_state)
+        self.world_seconds += time.perf_counter() - start_time
+        return sensors, reward
+
+    def optimal_action(self):
+        """
+        Choose the action that heads most directly for the target.
+
+        Returns
+        -------
+        action : array of floats
+            The action commands.
+        """
+        return wtools.ring_action(self.state, self.target_state,
+                                  self.n_states, self.max_step)
+
+    def optimal_reward(self):
+        """
+        Find the best average reward per time step any agent can get.
+
+        The best an agent can do is head straight for the target,
+        as fast as possible, and stay there. Taking every forward (or
+        every backward) action at once moves it
+        reach = max_step * (max_step + 1) / 2 states, and any smaller
+        number of states can be moved by taking some of them.
+        If the last jump was a time steps ago, the agent has been able
+        to cover a * reach states in either direction, so the chance
+        that it's on target is min(1, (2 * a * reach + 1) / n_states).
+        Jumps happen
+        on each time step with probability jump_fraction, so the
+        number of time steps since the last one is geometric.
+
+        Returns
+        -------
+        reward : float
+            The long-run average reward per time step of the optimal
+            agent.
+        """
+        p = self.jump_fraction
+        reach = self.max_step * (self.max_step + 1) // 2
+        # The number of time steps after a jump
+        # by which every state can reach the target.
+        n_reach = int(np.ceil((self.n_states - 1) / (2. * reach)))
+        ages = np.arange(n_reach)
+        reachable = (2. * ages * reach + 1.) / self.n_states
+        return float(np.sum(p * (1. - p) ** ages * reachable) +
+                     (1. - p) ** n_reach)
+
+    def visualize(self, brain=None):
+        """
+        Show what's going on in the world.
+        """
+        print(' '.join(['state', str(self.state), 'of', str(self.n_states),
+                        'at time step', str(self.timestep)]))
+
+
+def stress_worlds(lifespan=None, sizes=None, **kwargs):
+    """
+    Generate one synthetic world for each number of sensors.
+
+    Parameters
+    ----------
+    lifespan : int
+        The number of time steps to continue each world.
+    sizes : list of int, optional
+        The numbers of sensors. Defaults to stress_sizes.
+    Any other keyword arguments are passed on to each World.
+
+    Returns
+    -------
+    worlds : list of World
+    """
+    if sizes is None:
+        sizes = stress_sizes
+    return [World(lifespan=lifespan, n_sensors=size, **kwargs)
+            for size in sizes]
+
+
+if __name__ == "__main__":
+    import becca.brain as becca_brain
+    n_sensors_arg = 1000
+    if len(sys.argv) > 1:
+        n_sensors_arg = int(sys.argv[1])
+    world_arg = World(n_sensors=n_sensors_arg)
+    run_start = time.time()
+    performance_out = becca_brain.run(world_arg)
+    run_seconds = time.time() - run_start
+    print('performance:', performance_out)
+    print('optimal:', world_arg.optimal_reward())
+    print('The world took {0:.1%} of the run time.'.format(
+        world_arg.world_seconds / run_seconds))
@@ -14,6 +14,30 @@ Test Becca on the suite of all test worlds.
         or
     python3 test -w all
 
+Fit the whole suite into a 30 minute budget.
+    python3 test --budget 1800
+
+Split the suite across three machines, then combine the results.
+    python3 test --shard 1/3    (on the first machine)
+    python3 test --shard 2/3    (on the second machine)
+    python3 test --shard 3/3    (on the third machine)
+    python3 test merge shard1/results.json shard2/results.json ...
+
+Let the brain decide only every 4th time step of image_2D,
+and every 2nd time step of every other world in the suite.
+    python3 test --repeat image_2D=4 --repeat 2
+
+Check the latest suite run for slowdowns or lower scores than
+the five runs before it on the same machine. Exits with 1 if there are.
+    python3 test compare --runs 5
+
+Report the tail latency of every world and brain step of grid_1D.
+    python3 test -w grid_1D --latency
+
+Measure how Becca's time per step grows as grid_1D grows
+from 9 to 36 positions.
+    python3 test -w grid_1D --sweep 9 36
+
 Profile Becca on the image2D.py world.
     python3 test -w image2D --profile
         or
@@ -22,7 +46,13 @@ Profile Becca on the image2D.py world.
 
 import argparse
 import cProfile
+import json
+import multiprocessing
 import pstats
+import resource
+import shutil
+import sys
+import tempfile
 import time
 
 import numpy as np
@@ -41,68 +71,386 @@ from becca_test.grid_1D_noise import World as World_grid_1D_noise
 from becca_test.grid_2D import World as World_grid_2D
 from becca_test.grid_2D_dc import World as World_grid_2D_dc
 from becca_test.grid_2D_cont import World as World_grid_2D_cont
+from becca_test.grid_2D_maze import World as World_grid_2D_maze
+from becca_test.grid_2D_maze_dc import World as World_grid_2D_maze_dc
 from becca_test.image_1D import World as World_image_1D
 from becca_test.image_2D import World as World_image_2D
 from becca_test.fruit import World as World_fruit
+from becca_test.action_repeat import ActionRepeat
+import becca_test.checkpoint as checkpoint
+import becca_test.history as history
+import becca_test.latency as latency
+import becca_test.result_cache as result_cache
 
 default_test_lifespan = 3e4
+# calibration_lifespan : int
+#     The number of time steps each world is run to measure its
+#     throughput before a time-budgeted suite run.
+calibration_lifespan = 300
+
+# suite_worlds : list of (World, int)
+#     All the worlds in the benchmark, in the order they are run.
+#     Some tests are harder than others. Each is paired with
+#     the weight it carries in the suite score.
+suite_worlds = [
+    (World_grid_1D, 1),
+    (World_grid_1D_cont, 1),
+    (World_grid_1D_chase, 1),
+    (World_grid_1D_chase_cont, 1),
+    (World_grid_1D_delay, 1),
+    (World_grid_1D_delay_cont, 1),
+    (World_grid_1D_ms, 1),
+    (World_grid_1D_ms_cont, 1),
+    (World_grid_1D_noise, 1),
+    (World_grid_2D, 3),
+    (World_grid_2D_dc, 4),
+    (World_grid_2D_cont, 4),
+    (World_image_1D, 5),
+    (World_image_2D, 10),
+    (World_fruit, 3),
+]
+
 
-def suite(lifespan=1e4):
+# sweep_arguments : dict of World: str
+#     The worlds that can be swept with ``sweep()``, and the name of the
+#     constructor argument that sets their size.
+sweep_arguments = {
+    World_grid_1D: 'size',
+    World_grid_1D_chase: 'size',
+    World_grid_1D_noise: 'num_noise_sensors',
+    World_grid_2D: 'world_size',
+    World_grid_2D_dc: 'world_size',
+    World_grid_2D_maze: 'world_size',
+    World_grid_2D_maze_dc: 'world_size',
+    World_image_1D: 'fov_span',
+    World_image_2D: 'fov_span',
+}
+
+
+def suite(lifespan=1e4, budget_seconds=None, seed=None, use_cache=True,
+          run_id=None, shard=None, repeats=None):
     """
     Run all the worlds in the benchmark and tabulate their performance.
+
+    Results are cached in ``log/cache``. A world whose source,
+    becca version, lifespan and seed all match a cached result
+    is not run again. See result_cache.py for details.
+
+    Progress is saved in ``log/runs/<run_id>`` as the suite runs.
+    Passing that ``run_id`` back in resumes an interrupted suite.
+    See checkpoint.py for details. When the suite is finished,
+    all of its results are written to ``results.json`` in the same
+    directory.
+
+    Parameters
+    ----------
+    lifespan : int, optional
+        The number of time steps to run each world.
+    budget_seconds : float, optional
+        If given, ignore ``lifespan`` and instead choose a lifespan
+        for each world so that the whole suite runs in about
+        this many seconds. See ``budget_lifespans()``.
+    seed : int, optional
+        If given, seed the random number generator before each world.
+    use_cache : bool, optional
+        If False, run every world, even those with cached results.
+        The fresh results still replace the cached ones.
+    run_id : str, optional
+        The ID of an interrupted run to resume. Its saved settings
+        are used in place of the ones passed in.
+    shard : tuple of ints, optional
+        A pair ``(i, n)``. If given, only run the i-th of n shards
+        of the suite, counting from 1. See ``shard_indices()``.
+        The partial results from all the shards are combined
+        with ``merge()``.
+    repeats : dict of str: int, optional
+        The number of time steps per brain decision for each world.
+        See ``world_repeat()``.
     """
     start_time = time.time()
-    performance = []
-    performance.append(test_world(World_grid_1D, lifespan=lifespan))
-    performance.append(test_world(World_grid_1D_cont, lifespan=lifespan))
-    performance.append(test_world(World_grid_1D_chase, lifespan=lifespan))
-    performance.append(test_world(World_grid_1D_chase_cont, lifespan=lifespan))
-    performance.append(test_world(World_grid_1D_delay, lifespan=lifespan))
-    performance.append(test_world(World_grid_1D_delay_cont, lifespan=lifespan))
-    performance.append(test_world(World_grid_1D_ms, lifespan=lifespan))
-    performance.append(test_world(World_grid_1D_ms_cont, lifespan=lifespan))
-    performance.append(test_world(World_grid_1D_noise, lifespan=lifespan))
-    performance.append(test_world(World_grid_2D, lifespan=lifespan))
-    performance.append(test_world(World_grid_2D_dc, lifespan=lifespan))
-    performance.append(test_world(World_grid_2D_cont, lifespan=lifespan))
-    performance.append(test_world(World_image_1D, lifespan=lifespan))
-    performance.append(test_world(World_image_2D, lifespan=lifespan))
-    performance.append(test_world(World_fruit, lifespan=lifespan))
+    world_classes = [world_class for world_class, _ in suite_worlds]
+    weights = np.array([weight for _, weight in suite_worlds])
+    if run_id is None:
+        run_id = checkpoint.new_run_id()
+        run_dir = checkpoint.run_directory(run_id)
+        if budget_seconds is None:
+            lifespans = [lifespan] * len(world_classes)
+        else:
+            lifespans = budget_lifespans(
+                world_classes, weights, budget_seconds, repeats=repeats)
+        settings = {
+            'worlds': [world_class.__module__
+                       for world_class in world_classes],
+            'lifespan': int(lifespan),
+            'budget_seconds': budget_seconds,
+            'lifespans': [int(world_lifespan) for world_lifespan in lifespans],
+            'seed': seed,
+            'shard': shard,
+            'repeats': repeats,
+        }
+        checkpoint.save_settings(run_dir, settings)
+    else:
+        run_dir = checkpoint.run_directory(run_id)
+        settings = checkpoint.load_settings(run_dir)
+        if settings is None:
+            print("Couldn't find the settings for run", run_id)
+            return
+        lifespans = settings['lifespans']
+        seed = settings['seed']
+        shard = settings['shard']
+        repeats = settings.get('repeats')
+    print('Saving progress to run {0}. Resume with --resume {0}'.format(
+        run_id))
+
+    if shard is None:
+        indices = range(len(world_classes))
+    else:
+        indices = shard_indices(weights, shard[0], shard[1])
+
+    results = []
+    for index in indices:
+        world_class = world_classes[index]
+        world_lifespan = lifespans[index]
+        repeat = world_repeat(world_class, repeats)
+        result = checkpoint.load_result(run_dir, index)
+        if result is not None:
+            print('Already finished', result['name'])
+        else:
+            key = result_cache.cache_key(
+                world_class, world_lifespan, seed, repeat=repeat)
+            if use_cache:
+                result = result_cache.load(key)
+            if result is not None:
+                print('Using cached result for', result['name'])
+            else:
+                score, name = test_world(
+                    world_class, lifespan=world_lifespan, seed=seed,
+                    checkpoint_file=checkpoint.checkpoint_filename(
+                        run_dir, index),
+                    repeat=repeat, run_id=run_id)
+                result = {
+                    'performance': float(score),
+                    'name': name,
+                    'lifespan': int(world_lifespan),
+                    'seed': seed,
+                    'repeat': repeat,
+                }
+                result_cache.store(key, result)
+            checkpoint.save_result(run_dir, index, result)
+        result = dict(result, index=index, module=world_class.__module__)
+        results.append(result)
     finish_time = time.time()
 
-    # Some tests are harder than others. Weight them accordingly.
-    weights = np.array([
-        1,  # grid_1D
-        1,  # grid_1D_cont
-        1,  # grid_1D_chase
-        1,  # grid_1D_chase_cont
-        1,  # grid_1D_delay
-        1,  # grid_1D_delay_cont
-        1,  # grid_1D_ms
-        1,  # grid_1D_ms_cont
-        1,  # grid_1D_noise
-        3,  # grid_2D
-        4,  # grid_2D_dc
-        4,  # grid_2D_cont
-        5,  # image_1D
-        10,  # image_2D
-        3,  # fruit
-        ])
+    results_filename = checkpoint.save_results(
+        run_dir, dict(settings, run_time=finish_time - start_time,
+                      results=results))
+    if shard is None:
+        report(results, finish_time - start_time)
+    else:
+        print('Results for shard {0} of {1} written to {2}'.format(
+            shard[0], shard[1], results_filename))
+        print('Combine all the shards with')
+        print(' > python -m test merge <results files>')
+    return
+
+
+def world_repeat(world_class, repeats):
+    """
+    Look up how many time steps each brain decision lasts in a world.
+
+    Parameters
+    ----------
+    world_class : World
+        The world to look up.
+    repeats : dict of str: int, or None
+        The number of time steps per decision, keyed by the name of the
+        world's module, such as 'image_2D'. The key 'all' covers every
+        world that isn't named.
+
+    Returns
+    -------
+    repeat : int
+        1 unless the world's actions are to be repeated.
+    """
+    if not repeats:
+        return 1
+    name = world_class.__module__.split('.')[-1]
+    return int(repeats.get(name, repeats.get('all', 1)))
+
+
+def shard_indices(weights, shard_index, n_shards):
+    """
+    Choose which worlds belong to one shard of the suite.
+
+    Worlds are dealt out heaviest first, each to the shard with the
+    least total weight so far. Ties go to the lower numbered world
+    and the lower numbered shard, so every machine arrives at the same
+    split without having to talk to the others.
+
+    Parameters
+    ----------
+    weights : array of floats
+        The weight of each world in the suite, used as a stand-in
+        for how long it takes to run.
+    shard_index : int
+        Which shard to choose, counting from 1.
+    n_shards : int
+        The total number of shards.
+
+    Returns
+    -------
+    indices : list of ints
+        The positions in the suite of the worlds in this shard,
+        in the order they appear in the suite.
+    """
+    shard_weights = np.zeros(n_shards)
+    assignments = [[] for _ in range(n_shards)]
+    # A stable sort keeps equal weights in suite order.
+    for index in np.argsort(-np.asarray(weights), kind='mergesort'):
+        lightest = int(np.argmin(shard_weights))
+        assignments[lightest].append(int(index))
+        shard_weights[lightest] += weights[index]
+    return sorted(assignments[shard_index - 1])
+
+
+def merge(filenames):
+    """
+    Combine the results of several suite shards into one report.
+
+    Parameters
+    ----------
+    filenames : list of str
+        The ``results.json`` files written by each shard.
+
+    Raises
+    ------
+    ValueError
+        If any world is missing or repeated, if the shards don't match
+        the worlds in this suite, or if they weren't all run with
+        the same lifespan, seed and repeats.
+    """
+    summaries = []
+    for filename in filenames:
+        with open(filename, 'r') as results_file:
+            summaries.append(json.load(results_file))
+
+    # All the settings that change a result need to agree.
+    for setting in ['worlds', 'lifespan', 'budget_seconds', 'seed',
+                    'repeats']:
+        values = set(json.dumps(summary.get(setting))
+                     for summary in summaries)
+        if len(values) > 1:
+            raise ValueError(
+                'The shards were run with different {0} settings: {1}'.format(
+                    setting, ', '.join(sorted(values))))
+    expected_worlds = [world_class.__module__
+                       for world_class, _ in suite_worlds]
+    if summaries[0]['worlds'] != expected_worlds:
+        raise ValueError(
+            "The shards were run on a different set of worlds than this suite.")
+
+    results_by_index = {}
+    for summary in summaries:
+        for result in summary['results']:
+            if result['index'] in results_by_index:
+                raise ValueError('{0} appears in more than one shard.'.format(
+                    result['name']))
+            results_by_index[result['index']] = result
+    missing = [world for index, world in enumerate(expected_worlds)
+               if index not in results_by_index]
+    if missing:
+        raise ValueError('No results for {0}.'.format(', '.join(missing)))
+
+    results = [results_by_index[index]
+               for index in range(len(expected_worlds))]
+    run_time = max(summary['run_time'] for summary in summaries)
+    report(results, run_time)
+
+
+def report(results, run_time):
+    """
+    Print the scores from a complete run of the suite.
 
+    Parameters
+    ----------
+    results : list of dict
+        The result from each world, in suite order.
+    run_time : float
+        The number of seconds it took to run the suite.
+    """
+    weights = np.array([weight for _, weight in suite_worlds])
     print('Individual test world scores:')
     scores = []
-    for score in performance:
-        print('    {0:.2}, {1}'.format(score[0], score[1]))
-        scores.append(score[0])
+    for result in results:
+        print('    {0:.2}, {1}'.format(result['performance'], result['name']))
+        scores.append(result['performance'])
     mean_score = np.sum(np.array(scores) * weights) / np.sum(weights)
     print('Weighted test suite score: {0:.2}'.format(mean_score))
     print('Test suite completed in {0:.2} seconds ({1:.2} minutes)'.format(
-        finish_time - start_time, (finish_time - start_time) / 60.))
+        run_time, run_time / 60.))
 
-    return
 
+def budget_lifespans(world_classes, weights, budget_seconds, repeats=None):
+    """
+    Choose a lifespan for each world so that the suite fits a time budget.
+
+    Each world is run briefly to measure how long a time step takes.
+    Time steps are then handed out in proportion to each world's weight,
+    scaled so that the expected run times of all the worlds add up to
+    whatever is left of the budget after calibration.
 
-def test_world(world_class, lifespan=1e4):
+    Parameters
+    ----------
+    world_classes : list of World
+        The worlds to be run.
+    weights : array of floats
+        The relative importance of each world.
+    budget_seconds : float
+        The total wall clock time available, including calibration.
+    repeats : dict of str: int, optional
+        The number of time steps per brain decision for each world.
+        See ``world_repeat()``.
+
+    Returns
+    -------
+    lifespans : list of ints
+        The number of time steps to run each world.
+    """
+    start_time = time.time()
+    names = []
+    seconds_per_step = []
+    for world_class in world_classes:
+        world = world_class(lifespan=calibration_lifespan)
+        repeat = world_repeat(world_class, repeats)
+        if repeat != 1:
+            world = ActionRepeat(world, repeat)
+        calibration_start = time.time()
+        becca_brain.run(world)
+        names.append(world.name)
+        seconds_per_step.append(
+            (time.time() - calibration_start) / calibration_lifespan)
+    seconds_per_step = np.array(seconds_per_step)
+
+    remaining_seconds = budget_seconds - (time.time() - start_time)
+    if remaining_seconds <= 0:
+        print('Calibration used up the time budget.',
+              'Running each world for a single time step.')
+        remaining_seconds = 0.
+    steps_per_weight = remaining_seconds / np.sum(weights * seconds_per_step)
+    lifespans = [int(max(np.floor(weight * steps_per_weight), 1))
+                 for weight in weights]
+
+    print('Lifespans chosen for a {0:.3} second budget:'.format(
+        float(budget_seconds)))
+    for name, step_time, world_lifespan in zip(
+            names, seconds_per_step, lifespans):
+        print('    {0}, {1:.3} ms per step, {2} time steps'.format(
+            name, 1000. * step_time, world_lifespan))
+    return lifespans
+
+
+def test_world(world_class, lifespan=1e4, seed=None, checkpoint_file=None,
+               repeat=1, run_id=None):
     """
     Test the brain's performance on a world.
 
@@ -115,6 +463,18 @@ def test_world(world_class, lifespan=1e4):
     lifespan : int, optional
         The number of time steps to test the brain
         on the current world.
+    seed : int, optional
+        If given, seed the random number generator first,
+        making the run repeatable.
+    checkpoint_file : str, optional
+        If given, save a checkpoint of the world and brain here
+        every so often, and resume from it if it already exists.
+    repeat : int, optional
+        The number of time steps per brain decision.
+        See action_repeat.py.
+    run_id : str, optional
+        The run that this is part of, for the benchmark history.
+        See history.py.
 
     Returns
     -------
@@ -123,19 +483,169 @@ def test_world(world_class, lifespan=1e4):
     world.name : str
         The name of the world that was run.
     """
+    if seed is not None:
+        np.random.seed(seed)
     start_time = time.time()
-    world = world_class(lifespan=lifespan)
-    performance = becca_brain.run(world)
+    if checkpoint_file is None:
+        world = world_class(lifespan=lifespan)
+        if repeat != 1:
+            world = ActionRepeat(world, repeat)
+        performance = becca_brain.run(world)
+        n_steps = lifespan
+    else:
+        performance, world, n_steps = checkpoint.run(
+            world_class, lifespan, checkpoint_file, repeat=repeat)
     finish_time = time.time()
     delta_time = finish_time - start_time
     print('Performance is: {0:.3}'.format(performance))
-    print(world.name, 'ran in {0:.2} seconds ({1:.2} minutes),'.format(
-        delta_time, delta_time / 60.))
+    print(world.name, 'ran {0} time steps in {1:.2} seconds'.format(
+        int(n_steps), delta_time),
+        '({0:.2} minutes),'.format(delta_time / 60.))
     print('an average of {0:.2} seconds ({1:.2} ms) per time step.'.format(
-        delta_time / lifespan, 1000. * delta_time / lifespan))
+        delta_time / n_steps, 1000. * delta_time / n_steps))
+    if repeat != 1:
+        print('Each brain decision lasted {0} time steps,'.format(repeat),
+              'an average of {0:.2} ms per decision.'.format(
+                  1000. * delta_time * repeat / n_steps))
+    if run_id is None:
+        run_id = checkpoint.new_run_id()
+    history.record(run_id, world.name, 1000. * delta_time / n_steps,
+                   performance, lifespan, seed=seed)
     return performance, world.name
 
 
+def sweep(world_class, min_size, max_size, lifespan=1e4, ratio=2.):
+    """
+    Measure how the brain's cost grows with the size of a world.
+
+    The world is run at a geometric series of sizes, each in a fresh
+    process so that one point's brain can't affect the next one's
+    timing or memory. A straight line is fit to log(ms per step) against
+    log(number of sensors and actions). Its slope is the empirical
+    scaling exponent, about 1 for O(n) and about 2 for O(n^2).
+
+    Parameters
+    ----------
+    world_class : World
+        The world to run. It must be one of those in ``sweep_arguments``.
+    min_size, max_size : int
+        The smallest and largest sizes to run.
+    lifespan : int, optional
+        The number of time steps to run at each size.
+    ratio : float, optional
+        The ratio between successive sizes.
+
+    Returns
+    -------
+    points : list of dict
+        The size, number of sensors and actions, ms per step,
+        peak memory and performance at each point in the sweep.
+    """
+    if world_class not in sweep_arguments:
+        print("Can't sweep {0}. Choose one of {1}.".format(
+            world_class.__module__, ', '.join(sorted(
+                swept_class.__module__ for swept_class in sweep_arguments))))
+        return None
+
+    sizes = []
+    size = int(min_size)
+    while size <= max_size:
+        sizes.append(size)
+        size = int(np.ceil(size * ratio))
+
+    points = []
+    for size in sizes:
+        with multiprocessing.Pool(processes=1) as pool:
+            point = pool.apply(_sweep_point, (
+                world_class, {sweep_arguments[world_class]: size}, lifespan))
+        points.append(point)
+
+    print('Sweep of {0} over {1}:'.format(
+        world_class.__module__, sweep_arguments[world_class]))
+    print('    size, sensors, actions, ms per step, peak MB, performance')
+    for point in points:
+        print('    {0}, {1}, {2}, {3:.3}, {4:.3}, {5:.3}'.format(
+            point['size'], point['n_sensors'], point['n_actions'],
+            point['ms_per_step'], point['peak_memory_mb'],
+            point['performance']))
+
+    if len(points) > 1:
+        channels = np.array([point['n_sensors'] + point['n_actions']
+                             for point in points])
+        ms_per_step = np.array([point['ms_per_step'] for point in points])
+        exponent = np.polyfit(np.log(channels), np.log(ms_per_step), 1)[0]
+        print('Time per step grows as O(n^{0:.2})'.format(exponent),
+              'in the number of sensors and actions, n.')
+        peak_memory = np.array([point['peak_memory_mb'] for point in points])
+        if np.all(peak_memory > 0):
+            exponent = np.polyfit(np.log(channels), np.log(peak_memory), 1)[0]
+            print('Peak memory grows as O(n^{0:.2}).'.format(exponent))
+    return points
+
+
+def _sweep_point(world_class, world_kwargs, lifespan):
+    """
+    Run one point of a sweep.
+
+    This is run in its own process, so the growth in peak resident
+    memory during the run is the memory used by this world and brain.
+    The brain neither restores from nor saves into becca's log
+    directory, so it always starts fresh and leaves the suite's
+    saved brains alone.
+    """
+    # ru_maxrss is in kilobytes on Linux.
+    start_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    world = world_class(lifespan=lifespan, **world_kwargs)
+    log_directory = tempfile.mkdtemp()
+    try:
+        start_time = time.time()
+        performance = becca_brain.run(world, config={
+            'restore': False, 'log_directory': log_directory})
+        finish_time = time.time()
+    finally:
+        shutil.rmtree(log_directory, ignore_errors=True)
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        'size': list(world_kwargs.values())[0],
+        'n_sensors': world.n_sensors,
+        'n_actions': world.n_actions,
+        'ms_per_step': 1000. * (finish_time - start_time) / lifespan,
+        'peak_memory_mb': (peak_memory - start_memory) / 1024.,
+        'performance': float(performance),
+    }
+
+
+def parse_repeat(text):
+    """
+    Interpret a repeat written as "k" or "world=k" on the command line.
+    """
+    name, _, count = text.rpartition('=')
+    try:
+        count = int(count)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            'Repeats look like 4 or image_2D=4, not {0}'.format(text))
+    if count < 1:
+        raise argparse.ArgumentTypeError(
+            'Repeats need to be at least 1, not {0}'.format(count))
+    return (name or 'all', count)
+
+
+def parse_shard(text):
+    """
+    Interpret a shard written as "i/n" on the command line.
+    """
+    try:
+        shard_index, n_shards = [int(part) for part in text.split('/')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            'Shards look like 2/5, not {0}'.format(text))
+    if not 1 <= shard_index <= n_shards:
+        raise argparse.ArgumentTypeError(
+            'Shard {0} is not between 1 and {1}'.format(shard_index, n_shards))
+    return (shard_index, n_shards)
+
+
 def profile(World, lifespan=1e4):
     """
     Profile the brain's performance on the selected world.
@@ -167,6 +677,8 @@ if __name__ == '__main__':
                                        '8) image_1D,',
                                        '9) image_2D,',
                                        '10) fruit,',
+                                       '11) grid_2D_maze,',
+                                       '12) grid_2D_maze_dc,',
                                        '0) all',
                                        'Default value is all.']))
     parser.add_argument(
@@ -175,7 +687,54 @@ if __name__ == '__main__':
     parser.add_argument(
         '-t', '--lifespan', type=int,
         help='The number of time steps (in thousands) to run the world.')
+    parser.add_argument(
+        '-b', '--budget', type=float,
+        help=' '.join(['A wall clock budget, in seconds, for the whole suite.',
+                       'Overrides the lifespan.']))
+    parser.add_argument(
+        '-s', '--seed', type=int,
+        help='Seed the random number generator before each world.')
+    parser.add_argument(
+        '--no-cache', action='store_true',
+        help='Rerun every world in the suite, ignoring cached results.')
+    parser.add_argument(
+        '--resume', metavar='RUN_ID',
+        help='Pick up an interrupted suite run where it left off.')
+    parser.add_argument(
+        '--shard', type=parse_shard, metavar='i/n',
+        help='Run only the i-th of n balanced shards of the suite.')
+    parser.add_argument(
+        '--sweep', type=int, nargs=2, metavar=('MIN', 'MAX'),
+        help=' '.join(['Rerun the world at sizes doubling from MIN to MAX',
+                       'and report how its cost scales.']))
+    parser.add_argument(
+        '--latency', action='store_true',
+        help=' '.join(['Time every world and brain step, and report',
+                       'percentiles and the slowest time steps.']))
+    parser.add_argument(
+        '-r', '--repeat', type=parse_repeat, action='append',
+        metavar='[WORLD=]K',
+        help=' '.join(['Let the brain decide only every K time steps,',
+                       'repeating its action in between.',
+                       'Name a world to set K for just that world.',
+                       'Can be given more than once.']))
+    subparsers = parser.add_subparsers(dest='command')
+    merge_parser = subparsers.add_parser(
+        'merge', help='Combine the results of several shards into one report.')
+    merge_parser.add_argument(
+        'filenames', nargs='+', help='The results.json file from each shard.')
+    compare_parser = subparsers.add_parser(
+        'compare', help=' '.join([
+            'Check the latest run for slowdowns and lower scores',
+            'than earlier runs. Exits with 1 if there are any.']))
+    compare_parser.add_argument(
+        '--runs', type=int, default=5,
+        help='The number of earlier runs to compare against.')
     args = parser.parse_args()
+    if args.shard is not None and args.budget is not None:
+        parser.error(' '.join([
+            'Shards on different machines would choose different',
+            'lifespans from a budget. Use --lifespan with --shard.']))
 
     if args.world is None:
         args.world = 'all'
@@ -199,19 +758,48 @@ if __name__ == '__main__':
         World = World_image_2D
     elif args.world == 'fruit' or args.world == '10':
         World = World_fruit
+    elif args.world == 'grid_2D_maze' or args.world == '11':
+        World = World_grid_2D_maze
+    elif args.world == 'grid_2D_maze_dc' or args.world == '12':
+        World = World_grid_2D_maze_dc
     else:
         args.world = 'all'
+    if args.world == 'all' and args.command is None:
+        if args.sweep is not None:
+            parser.error('--sweep needs a single world. Name it with -w.')
+        if args.latency:
+            parser.error('--latency needs a single world. Name it with -w.')
 
     if args.lifespan is None:
         lifespan_arg = default_test_lifespan
     else:
         lifespan_arg = args.lifespan * 1000
         print('Lifespan set to {0} time steps.'.format(lifespan_arg))
+    if args.repeat is None:
+        repeats_arg = None
+    else:
+        repeats_arg = dict(args.repeat)
 
-    if args.world == 'all':
-        suite(lifespan=lifespan_arg)
+    if args.command == 'merge':
+        merge(args.filenames)
+    elif args.command == 'compare':
+        if history.compare(n_runs=args.runs):
+            sys.exit(1)
+    elif args.world == 'all':
+        suite(lifespan=lifespan_arg, budget_seconds=args.budget,
+              seed=args.seed, use_cache=not args.no_cache,
+              run_id=args.resume, shard=args.shard, repeats=repeats_arg)
+    elif args.sweep is not None:
+        sweep(World, args.sweep[0], args.sweep[1], lifespan=lifespan_arg)
     elif args.profile:
         profile(World, lifespan=lifespan_arg)
     else:
-        performance_out = becca_brain.run(World(lifespan=lifespan_arg))
+        world_arg = World(lifespan=lifespan_arg)
+        repeat_arg = world_repeat(World, repeats_arg)
+        if repeat_arg != 1:
+            world_arg = ActionRepeat(world_arg, repeat_arg)
+        if args.latency:
+            performance_out = latency.run(world_arg)[0]
+        else:
+            performance_out = becca_brain.run(world_arg)
         print('performance:', performance_out)
@@ -13,8 +13,8 @@ To run this world standalone from the command line
 """
 import numpy as np
 
-import becca.brain as becca_brain
-from becca.base_world import World as BaseWorld
+from becca_test.base_world import World as BaseWorld
+import becca_test.world_tools as wtools
 
 
 class World(BaseWorld):
@@ -50,6 +50,9 @@ class World(BaseWorld):
         print("Entering", self.name)
 
         self.n_sensors = 2
+        # sensor_dtype : numpy dtype
+        #     The data type of the sensor array. See world_tools.py.
+        self.sensor_dtype = wtools.sensor_dtype
         self.n_positions = self.n_sensors
         self.n_actions = 2
         # Left: 0
@@ -59,6 +62,11 @@ class World(BaseWorld):
         # Room A: 0
         # Room B: 1
         self.state = 0
+        # sparse_sensors : bool
+        #     If True, step() returns the sensors as a pair of arrays,
+        #     the sorted indices of the active sensors and their values,
+        #     rather than as a dense array. See sense_sparse().
+        self.sparse_sensors = False
 
         self.visualize_interval = 1e3
 
@@ -100,11 +108,27 @@ class World(BaseWorld):
         if np.abs(self.state - old_state) == 1:
             reward = 1
 
-        sensors = np.zeros(self.n_sensors)
+        if self.sparse_sensors:
+            return self.sense_sparse(), reward
+        sensors = np.zeros(self.n_sensors, dtype=self.sensor_dtype)
         sensors[int(self.state)] = 1
 
         return sensors, reward
 
+    def sense_sparse(self):
+        """
+        Represent the current room as a single active sensor.
+
+        Returns
+        -------
+        indices : array of ints
+            The indices of the active sensors, in increasing order.
+        values : array of floats
+            The values of the active sensors.
+        """
+        return (np.array([int(self.state)]),
+                np.ones(1, dtype=self.sensor_dtype))
+
     def visualize(self):
         """
         Show what's going on in the world.
@@ -120,4 +144,5 @@ class World(BaseWorld):
 
 
 if __name__ == "__main__":
+    import becca.brain as becca_brain
     becca_brain.run(World())
@@ -0,0 +1,334 @@
+"""
+Step many copies of a world at once, spread across worker processes.
+
+This is for running lots of instances of a world, like image_2D,
+for multi-seed evaluations, when the world can't be vectorized itself.
+Each worker process hosts a contiguous block of the worlds.
+All the actions go into one block of shared memory, each worker steps
+its own worlds, and all the sensors and rewards come back through
+the same block, stacked into arrays. Nothing is pickled.
+
+    from becca_test.vector_world import SubprocVectorWorld
+    worlds = SubprocVectorWorld('image_2D', n_worlds=32, seed=1)
+    sensors, rewards = worlds.step(actions)
+
+Here actions is an (n_worlds, n_actions) array, sensors is
+(n_worlds, n_sensors) and rewards is (n_worlds,).
+
+For a handful of worlds, the handoff costs more than it saves,
+so they are stepped in this process instead.
+
+The shared block starts with the counters that coordinate the
+workers, as laid out in shared_memory_world.py. The CLOSED counter
+is shared by all of them. After the first n_counters,
+each worker has a pair: the number of steps requested,
+and the number it has finished.
+"""
+import multiprocessing
+from multiprocessing import resource_tracker, shared_memory
+import os
+
+import numpy as np
+
+import becca_test.world_tools as wtools
+from becca_test.shared_memory_world import CLOSED, n_counters, wait_until
+from becca_test.world_tools import world_class
+
+# in_process_limit : int
+#     The largest number of worlds to step in this process,
+#     rather than in workers.
+in_process_limit = 4
+
+
+def _views(buffer, n_workers, n_worlds, n_sensors, n_actions):
+    """
+    Lay out the counters, actions and results as arrays over the block.
+
+    Returns
+    -------
+    n_bytes : int
+        The size of the block.
+    counters, actions, results : arrays or None
+        Views into the buffer, or None if there is no buffer yet.
+    """
+    n_all_counters = n_counters + 2 * n_workers
+    actions_offset = n_all_counters * 8
+    results_offset = actions_offset + n_worlds * n_actions * 8
+    n_bytes = results_offset + n_worlds * (n_sensors + 1) * 8
+    if buffer is None:
+        return n_bytes, None, None, None
+    counters = np.ndarray((n_all_counters,), dtype=np.int64, buffer=buffer)
+    actions = np.ndarray((n_worlds, n_actions), dtype=np.float64,
+                         buffer=buffer, offset=actions_offset)
+    results = np.ndarray((n_worlds, n_sensors + 1), dtype=np.float64,
+                         buffer=buffer, offset=results_offset)
+    return n_bytes, counters, actions, results
+
+
+def _make_worlds(world_name, world_indices, lifespan, seed, world_kwargs):
+    """
+    Create some of the worlds, each with its own random number stream.
+
+    Returns
+    -------
+    worlds : list of World
+    random_states : list of tuple or None
+        If seed is given, the state of each world's random number
+        generator. World i is seeded with seed + i, wherever it runs.
+    """
+    worlds = []
+    random_states = None if seed is None else []
+    for i_world in world_indices:
+        if seed is not None:
+            np.random.seed(seed + i_world)
+        worlds.append(world_class(world_name)(
+            lifespan=lifespan, **world_kwargs))
+        if seed is not None:
+            random_states.append(np.random.get_state())
+    return worlds, random_states
+
+
+def _step_worlds(worlds, random_states, actions, sensors, rewards):
+    """
+    Step each world with its row of actions, filling in its results.
+
+    The worlds draw from numpy's global random number generator.
+    If they are seeded, each world's own state is swapped in
+    while it steps, and saved again afterward.
+    """
+    for i_world, world in enumerate(worlds):
+        if random_states is not None:
+            np.random.set_state(random_states[i_world])
+        world_sensors, rewards[i_world] = world.step(
+            np.array(actions[i_world], dtype=float))
+        if random_states is not None:
+            random_states[i_world] = np.random.get_state()
+        if isinstance(world_sensors, tuple):
+            world_sensors = wtools.sparse_to_dense(
+                world_sensors[0], world_sensors[1], world.n_sensors)
+        sensors[i_world] = world_sensors
+
+
+def _worker(i_worker, n_workers, first, last, n_worlds, world_name,
+            lifespan, seed, world_kwargs, connection):
+    """
+    Host worlds first through last - 1, and step them on request.
+    """
+    worlds, random_states = _make_worlds(
+        world_name, range(first, last), lifespan, seed, world_kwargs)
+    connection.send({
+        'name': worlds[0].name,
+        'n_sensors': worlds[0].n_sensors,
+        'n_actions': worlds[0].n_actions,
+        'lifespan': worlds[0].lifespan,
+        'timestep': worlds[0].timestep,
+    })
+    block_name = connection.recv()
+    connection.close()
+    block = shared_memory.SharedMemory(name=block_name)
+    _, counters, actions, results = _views(
+        block.buf, n_workers, n_worlds,
+        worlds[0].n_sensors, worlds[0].n_actions)
+
+    requested = n_counters + 2 * i_worker
+    finished = requested + 1
+    n_done = 0
+    while wait_until(counters, requested, n_done + 1):
+        _step_worlds(worlds, random_states, actions[first:last],
+                     results[first:last, 1:], results[first:last, 0])
+        n_done += 1
+        # The results have to be in place before they are announced.
+        counters[finished] = n_done
+
+    for world in worlds:
+        print('Closing', world.name)
+    del counters, actions, results
+    block.close()
+
+
+class SubprocVectorWorld(object):
+    """
+    Many copies of one world, stepped together.
+
+    Attributes
+    ----------
+    name : str
+        The name of the individual worlds.
+    n_worlds : int
+        The number of copies.
+    n_sensors, n_actions : int
+        The number of sensors and actions of each copy.
+    lifespan : int
+        The number of time steps each copy continues.
+    timestep : int
+        The number of time steps the copies have been through.
+    worlds : list of World or None
+        The copies, if they are being stepped in this process.
+    processes : list of Process
+        The worker processes, if the copies are stepped in workers.
+    """
+    def __init__(self, world_name, n_worlds, n_workers=None, lifespan=None,
+                 seed=None, **world_kwargs):
+        """
+        Create the worlds, in workers if there are enough of them.
+
+        Parameters
+        ----------
+        world_name : str
+            The name of the world module, such as 'image_2D'.
+        n_worlds : int
+            The number of copies of the world to create.
+        n_workers : int, optional
+            The number of worker processes. By default,
+            one per processor, but never more than the number of worlds.
+            If n_worlds is no more than ``in_process_limit``,
+            or n_workers is 0, all the worlds run in this process.
+        lifespan : int, optional
+            The number of time steps to continue each world.
+        seed : int, optional
+            If given, give each world its own random number stream,
+            seeded with seed plus the world's number, counting from 0.
+            The results then don't depend on how the worlds are split
+            across workers, and the caller's random state is left alone.
+        world_kwargs
+            Any other arguments to the world's constructor.
+        """
+        self.n_worlds = n_worlds
+        if n_workers is None:
+            n_workers = min(os.cpu_count() or 1, n_worlds)
+        if n_worlds <= in_process_limit:
+            n_workers = 0
+        self.n_workers = n_workers
+        self.worlds = None
+        self.processes = []
+
+        # random_states : list of tuple or None
+        #     The state of each world's random number generator,
+        #     if they are seeded and stepped in this process.
+        self.random_states = None
+        if n_workers == 0:
+            caller_state = np.random.get_state()
+            self.worlds, self.random_states = _make_worlds(
+                world_name, range(n_worlds), lifespan, seed, world_kwargs)
+            np.random.set_state(caller_state)
+            description = {
+                'name': self.worlds[0].name,
+                'n_sensors': self.worlds[0].n_sensors,
+                'n_actions': self.worlds[0].n_actions,
+                'lifespan': self.worlds[0].lifespan,
+                'timestep': self.worlds[0].timestep,
+            }
+        else:
+            # Split the worlds as evenly as possible across the workers.
+            boundaries = np.linspace(0, n_worlds, n_workers + 1).astype(int)
+            connections = []
+            # Have the workers share this process's resource tracker,
+            # so the shared block is only cleaned up once, from here.
+            resource_tracker.ensure_running()
+            for i_worker in range(n_workers):
+                connection, worker_connection = multiprocessing.Pipe()
+                process = multiprocessing.Process(
+                    target=_worker,
+                    args=(i_worker, n_workers, boundaries[i_worker],
+                          boundaries[i_worker + 1], n_worlds, world_name,
+                          lifespan, seed, world_kwargs, worker_connection),
+                    daemon=True)
+                process.start()
+                worker_connection.close()
+                connections.append(connection)
+                self.processes.append(process)
+            try:
+                descriptions = [connection.recv()
+                                for connection in connections]
+            except EOFError:
+                for process in self.processes:
+                    process.terminate()
+                raise RuntimeError(
+                    "A worker couldn't create {0}.".format(world_name))
+            description = descriptions[0]
+
+        self.name = description['name']
+        self.n_sensors = description['n_sensors']
+        self.n_actions = description['n_actions']
+        self.lifespan = description['lifespan']
+        self.timestep = description['timestep']
+
+        if n_workers > 0:
+            n_bytes, _, _, _ = _views(None, n_workers, n_worlds,
+                                      self.n_sensors, self.n_actions)
+            # block : SharedMemory
+            #     The memory shared with the workers.
+            self.block = shared_memory.SharedMemory(create=True, size=n_bytes)
+            _, self.counters, self.actions, self.results = _views(
+                self.block.buf, n_workers, n_worlds,
+                self.n_sensors, self.n_actions)
+            self.counters[:] = 0
+            for connection in connections:
+                connection.send(self.block.name)
+                connection.close()
+
+    def is_alive(self):
+        """
+        Check whether the worlds are alive.
+        """
+        return self.timestep < self.lifespan
+
+    def workers_alive(self):
+        """
+        Check whether all the worker processes are still running.
+        """
+        return all(process.is_alive() for process in self.processes)
+
+    def step(self, actions):
+        """
+        Advance every world by one time step.
+
+        Parameters
+        ----------
+        actions : 2D array of floats
+            One row of action commands for each world.
+
+        Returns
+        -------
+        sensors : 2D array of floats
+            One row of sensor values for each world.
+        rewards : array of floats
+            The reward from each world.
+        """
+        self.timestep += 1
+        if self.worlds is not None:
+            sensors = np.zeros((self.n_worlds, self.n_sensors))
+            rewards = np.zeros(self.n_worlds)
+            if self.random_states is None:
+                _step_worlds(self.worlds, None, actions, sensors, rewards)
+            else:
+                caller_state = np.random.get_state()
+                _step_worlds(self.worlds, self.random_states, actions,
+                             sensors, rewards)
+                np.random.set_state(caller_state)
+            return sensors, rewards
+
+        self.actions[:] = actions
+        n_requested = self.counters[n_counters] + 1
+        # The actions have to be in place before they are requested.
+        self.counters[n_counters:-1:2] = n_requested
+        for i_worker in range(self.n_workers):
+            if not wait_until(self.counters, n_counters + 2 * i_worker + 1,
+                              n_requested, self.workers_alive):
+                raise RuntimeError('A worker process has stopped.')
+        return self.results[:, 1:].copy(), self.results[:, 0].copy()
+
+    def close_world(self, brain=None):
+        """
+        Stop the workers and let go of the shared memory.
+        """
+        if self.worlds is not None:
+            for world in self.worlds:
+                print('Closing', world.name)
+            return
+        self.counters[CLOSED] = 1
+        for process in self.processes:
+            process.join()
+        del self.counters, self.actions, self.results
+        self.block.close()
+        self.block.unlink()
@@ -0,0 +1,438 @@
+"""
+Host a world in one process and run the brain in another.
+
+The server holds the world, and the brain talks to it through
+a RemoteWorld, which looks to the brain like any other world.
+They connect over a Unix domain socket or a localhost TCP socket.
+The server has no authentication and builds whatever world a client
+asks for, so it only listens on loopback addresses (localhost,
+127.0.0.0/8 or [::1]) unless it is started with --allow-remote.
+
+Start a server with
+
+    python3 -m becca_test.world_server /tmp/becca_world.sock
+        or
+    python3 -m becca_test.world_server localhost:8642
+
+then connect a brain to it from anywhere on the same machine
+
+    import becca.brain as becca_brain
+    from becca_test.world_server import RemoteWorld
+    world = RemoteWorld('/tmp/becca_world.sock', 'grid_1D', lifespan=1e4)
+    becca_brain.run(world)
+
+Each connection gets its own freshly forked server process and
+its own world, so one server can host many brains at once.
+
+Protocol
+--------
+Every message is a 5 byte header followed by a payload.
+The header is the message type (unsigned char) and the length
+of the payload in bytes (little endian unsigned int).
+All numbers in payloads are little endian.
+
+OPEN
+    Client to server: a json object with the name of the world module,
+    and optionally its "lifespan", a "seed" for the random number
+    generator, and "kwargs" for its constructor.
+    Server to client: a json object with the world's
+    "name", "n_sensors", "n_actions", "lifespan" and "timestep".
+STEP
+    Client to server: the number of steps, T (unsigned int),
+    followed by T x n_actions actions (doubles).
+    Server to client: T rows of (reward, sensors), each 1 + n_sensors
+    doubles. The world takes all T steps before replying,
+    so a batch of steps costs a single round trip.
+CLOSE
+    Client to server, with no payload. The server closes the world
+    and hangs up.
+ERROR
+    Server to client: a message (utf-8) describing what went wrong.
+"""
+import argparse
+import ipaddress
+import json
+import os
+import socket
+import socketserver
+import struct
+
+import numpy as np
+
+from becca_test.base_world import World as BaseWorld
+import becca_test.world_tools as wtools
+from becca_test.world_tools import world_class
+
+# The message types.
+OPEN = 1
+STEP = 2
+CLOSE = 3
+ERROR = 4
+header_format = struct.Struct('<BI')
+count_format = struct.Struct('<I')
+# wire_dtype : numpy dtype
+#     The data type of actions, rewards and sensors on the wire.
+wire_dtype = np.dtype('<f8')
+
+
+def parse_address(address):
+    """
+    Work out which kind of socket an address refers to.
+
+    Parameters
+    ----------
+    address : str
+        Either "host:port" for a TCP socket, with an IPv6 host in
+        brackets as in "[::1]:8642", or the path of a Unix domain socket.
+
+    Returns
+    -------
+    family : int
+        socket.AF_INET, socket.AF_INET6 or socket.AF_UNIX.
+    address : str or tuple
+        The address in the form that socket functions expect.
+    """
+    host, separator, port = address.rpartition(':')
+    if separator and port.isdigit() and '/' not in address:
+        if host.startswith('[') and host.endswith(']'):
+            return socket.AF_INET6, (host[1:-1], int(port))
+        return socket.AF_INET, (host, int(port))
+    return socket.AF_UNIX, address
+
+
+def is_loopback(host):
+    """
+    Check whether a TCP host can only be reached from this machine.
+
+    Parameters
+    ----------
+    host : str
+        A host name or IP address. An empty host means every interface.
+
+    Returns
+    -------
+    bool
+        True for localhost, 127.0.0.0/8 and ::1.
+    """
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def send_message(sock, message_type, payload=b''):
+    """
+    Frame a message and send all of it.
+    """
+    sock.sendall(header_format.pack(message_type, len(payload)) + payload)
+
+
+def receive_message(sock):
+    """
+    Receive one whole message.
+
+    Returns
+    -------
+    message_type : int or None
+        None if the other end has hung up.
+    payload : bytearray
+    """
+    header = _receive_exactly(sock, header_format.size)
+    if header is None:
+        return None, bytearray()
+    message_type, length = header_format.unpack(header)
+    payload = _receive_exactly(sock, length)
+    if payload is None:
+        return None, bytearray()
+    return message_type, payload
+
+
+def _receive_exactly(sock, n_bytes):
+    """
+    Keep reading until n_bytes have arrived, or None if the socket closes.
+    """
+    buffer = bytearray(n_bytes)
+    view = memoryview(buffer)
+    n_received = 0
+    while n_received < n_bytes:
+        n_new = sock.recv_into(view[n_received:])
+        if n_new == 0:
+            return None
+        n_received += n_new
+    return buffer
+
+
+class WorldHandler(socketserver.BaseRequestHandler):
+    """
+    Serve one world to one client, for as long as it stays connected.
+    """
+    def handle(self):
+        if self.request.family == socket.AF_INET:
+            self.request.setsockopt(
+                socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        world = None
+        while True:
+            message_type, payload = receive_message(self.request)
+            if message_type is None:
+                break
+            try:
+                if message_type == OPEN:
+                    world = self.open_world(
+                        json.loads(payload.decode('utf-8')))
+                elif message_type == STEP:
+                    if world is None:
+                        raise ValueError('STEP before OPEN.')
+                    self.step_world(world, payload)
+                elif message_type == CLOSE:
+                    break
+                else:
+                    raise ValueError(
+                        'Unknown message type {0}.'.format(message_type))
+            except Exception as error:
+                send_message(self.request, ERROR, '{0}: {1}'.format(
+                    type(error).__name__, error).encode('utf-8'))
+        if world is not None:
+            print('Closing', world.name)
+
+    def open_world(self, request):
+        """
+        Create the world that a client asked for, and describe it.
+        """
+        if request.get('seed') is not None:
+            np.random.seed(request['seed'])
+        world = world_class(request['world'])(
+            lifespan=request.get('lifespan'), **request.get('kwargs', {}))
+        description = {
+            'name': world.name,
+            'n_sensors': int(world.n_sensors),
+            'n_actions': int(world.n_actions),
+            'lifespan': world.lifespan,
+            'timestep': world.timestep,
+        }
+        send_message(self.request, OPEN,
+                     json.dumps(description).encode('utf-8'))
+        return world
+
+    def step_world(self, world, payload):
+        """
+        Run a batch of steps and send back all their results at once.
+        """
+        (n_steps,) = count_format.unpack_from(payload)
+        actions = np.frombuffer(
+            payload, dtype=wire_dtype, offset=count_format.size).reshape(
+                n_steps, world.n_actions)
+        results = np.zeros((n_steps, world.n_sensors + 1), dtype=wire_dtype)
+        for i_step in range(n_steps):
+            sensors, reward = world.step(actions[i_step].copy())
+            if isinstance(sensors, tuple):
+                sensors = wtools.sparse_to_dense(
+                    sensors[0], sensors[1], world.n_sensors)
+            results[i_step, 0] = reward
+            results[i_step, 1:] = sensors
+        send_message(self.request, STEP, results.tobytes())
+
+
+class ForkingUnixServer(socketserver.ForkingMixIn,
+                        socketserver.UnixStreamServer):
+    pass
+
+
+class ForkingTCPServer(socketserver.ForkingMixIn, socketserver.TCPServer):
+    allow_reuse_address = True
+
+
+class ForkingTCP6Server(ForkingTCPServer):
+    address_family = socket.AF_INET6
+
+
+def serve(address, allow_remote=False):
+    """
+    Host worlds at an address until interrupted.
+
+    Parameters
+    ----------
+    address : str
+        Either "host:port" or the path of a Unix domain socket.
+    allow_remote : bool
+        If False, only loopback TCP hosts are accepted. Anyone who
+        can reach the server can have it build worlds, with any
+        constructor arguments, and fork a process for each one.
+    """
+    family, socket_address = parse_address(address)
+    if (family != socket.AF_UNIX and not allow_remote and
+            not is_loopback(socket_address[0])):
+        raise ValueError(' '.join([
+            "{0} isn't a loopback address.".format(
+                socket_address[0] or 'An empty host'),
+            'Use localhost, 127.0.0.1 or [::1], or allow_remote',
+            '(--allow-remote) to listen beyond this machine.']))
+    if family == socket.AF_UNIX:
+        if os.path.exists(socket_address):
+            os.remove(socket_address)
+        server = ForkingUnixServer(socket_address, WorldHandler)
+    elif family == socket.AF_INET6:
+        server = ForkingTCP6Server(socket_address, WorldHandler)
+    else:
+        server = ForkingTCPServer(socket_address, WorldHandler)
+    print('Serving worlds at', address)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if family == socket.AF_UNIX and os.path.exists(socket_address):
+            os.remove(socket_address)
+
+
+class RemoteWorld(BaseWorld):
+    """
+    A stand-in for a world that is running in a world server.
+
+    Attributes
+    ----------
+    Most of this world's attributes are defined in base_world.py.
+    name, n_sensors, n_actions and lifespan are copied
+    from the remote world.
+    """
+    def __init__(self, address, world_name, lifespan=None, seed=None,
+                 **world_kwargs):
+        """
+        Connect to a world server and have it create a world.
+
+        Parameters
+        ----------
+        address : str
+            Either "host:port" or the path of a Unix domain socket.
+        world_name : str
+            The name of the world module, such as 'grid_1D'.
+        lifespan : int, optional
+            The number of time steps to continue the world.
+        seed : int, optional
+            If given, seed the server's random number generator
+            before creating the world.
+        world_kwargs
+            Any other arguments to the world's constructor.
+        """
+        BaseWorld.__init__(self, lifespan)
+        family, socket_address = parse_address(address)
+        # connection : socket
+        #     The connection to the world server.
+        self.connection = socket.socket(family, socket.SOCK_STREAM)
+        self.connection.connect(socket_address)
+        if family != socket.AF_UNIX:
+            self.connection.setsockopt(
+                socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        request = {'world': world_name, 'lifespan': lifespan, 'seed': seed,
+                   'kwargs': world_kwargs}
+        send_message(self.connection, OPEN,
+                     json.dumps(request).encode('utf-8'))
+        try:
+            description = json.loads(self.receive(OPEN).decode('utf-8'))
+        except Exception:
+            self.connection.close()
+            raise
+        self.name = description['name']
+        self.n_sensors = description['n_sensors']
+        self.n_actions = description['n_actions']
+        self.lifespan = description['lifespan']
+        self.timestep = description['timestep']
+        print('Connected to', self.name, 'at', address)
+
+    def receive(self, message_type):
+        """
+        Wait for a reply from the server.
+        """
+        reply_type, payload = receive_message(self.connection)
+        if reply_type is None:
+            raise ConnectionError('The world server hung up.')
+        if reply_type == ERROR:
+            raise RuntimeError('The world server reported ' +
+                               payload.decode('utf-8'))
+        if reply_type != message_type:
+            raise RuntimeError(
+                'Expected message type {0} from the world server, got {1}.'
+                .format(message_type, reply_type))
+        return payload
+
+    def step(self, action):
+        """
+        Advance the remote world by one time step.
+
+        Parameters
+        ----------
+        action : array of floats
+            The set of action commands to execute.
+
+        Returns
+        -------
+        sensors : array of floats
+            The values of each of the sensors.
+        reward : float
+            The amount of reward or punishment given by the world.
+        """
+        sensors, rewards = self.step_many(
+            np.asarray(action, dtype=wire_dtype)[np.newaxis, :])
+        return sensors[0], rewards[0]
+
+    def step_many(self, actions):
+        """
+        Advance the remote world by several time steps in one round trip.
+
+        The actions have to be chosen in advance, so this is for
+        scripted or open loop stretches, rather than for a brain that
+        responds to each set of sensors.
+
+        Parameters
+        ----------
+        actions : 2D array of floats
+            One row of action commands per time step.
+
+        Returns
+        -------
+        sensors : 2D array of floats
+            One row of sensor values per time step.
+        rewards : array of floats
+            The reward after each time step.
+        """
+        actions = np.ascontiguousarray(actions, dtype=wire_dtype).reshape(
+            -1, self.n_actions)
+        n_steps = actions.shape[0]
+        send_message(self.connection, STEP,
+                     count_format.pack(n_steps) + actions.tobytes())
+        results = np.frombuffer(
+            self.receive(STEP), dtype=wire_dtype).reshape(
+                n_steps, self.n_sensors + 1)
+        self.timestep += n_steps
+        return results[:, 1:], results[:, 0]
+
+    def close_world(self, brain=None):
+        """
+        Close the remote world and hang up.
+        """
+        try:
+            send_message(self.connection, CLOSE)
+        except OSError:
+            pass
+        self.connection.close()
+        print('Closing', self.name)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Host Becca test worlds for brains in other processes.')
+    parser.add_argument(
+        'address',
+        help='Either host:port or the path of a Unix domain socket.')
+    parser.add_argument(
+        '--allow-remote', action='store_true',
+        help=' '.join(['Listen on a TCP host that other machines can',
+                       'reach. There is no authentication.']))
+    args = parser.parse_args()
+    try:
+        serve(args.address, allow_remote=args.allow_remote)
+    except ValueError as error:
+        parser.error(str(error))
@@ -1,44 +1,150 @@
 """
 A few functions that are useful to multiple worlds
+
+The data types that worlds use for their sensors and images are set
+here, for the whole package. Worlds read them when they are initialized.
+To trade a little precision for less memory traffic, call
+
+    world_tools.set_dtypes(sensors=np.float32, images=np.uint8)
+
+before creating any worlds.
 """
+import importlib
 import os
 
-import matplotlib.pyplot as plt
 import numpy as np
 
-import becca.tools as tools
+# Only reading images and drawing need matplotlib, and only drawing
+# features needs Becca's tools. Without them the other worlds still run,
+# as in bench.py.
+try:
+    import matplotlib.pyplot as plt
+except ImportError:
+    plt = None
+try:
+    import becca.tools as tools
+except ImportError:
+    tools = None
+
+# sensor_dtype : numpy dtype
+#     The data type of the sensor arrays that worlds create.
+sensor_dtype = np.float64
+# image_dtype : numpy dtype
+#     The data type in which worlds store image data.
+#     Floating point images hold brightness values from 0 to 1.
+#     Integer images, such as uint8, hold them from 0 to the largest
+#     value the type can hold. float32 is what matplotlib reads
+#     images as, so that is the default.
+image_dtype = np.float32
+
+
+def world_class(name):
+    """
+    Find the World in one of the becca_test world modules.
+
+    Parameters
+    ----------
+    name : str
+        The name of the module, such as 'grid_1D' or 'image_2D'.
+
+    Returns
+    -------
+    World
+        The class of the world.
+    """
+    module = importlib.import_module('becca_test.' + name)
+    return module.World
 
 
-def center_surround(fov, fov_horz_span, fov_vert_span, verbose=False):
+def set_dtypes(sensors=None, images=None):
+    """
+    Choose the data types for all worlds created from now on.
+
+    Parameters
+    ----------
+    sensors : numpy dtype, optional
+        The data type of sensor arrays.
+    images : numpy dtype, optional
+        The data type of stored image data.
+    """
+    global sensor_dtype, image_dtype
+    if sensors is not None:
+        sensor_dtype = sensors
+    if images is not None:
+        image_dtype = images
+
+
+def read_image(filename, dtype=None):
+    """
+    Read an image from a file as a 2D array of b/w pixel values.
+
+    Parameters
+    ----------
+    filename : str
+        The name of the image file, including the path.
+    dtype : numpy dtype, optional
+        The data type to store the image in.
+        The default is ``image_dtype``.
+
+    Returns
+    -------
+    image : 2D array of dtype
+        The brightness of each pixel. See ``image_dtype`` for the range.
+    """
+    if dtype is None:
+        dtype = image_dtype
+    image = plt.imread(filename)
+    # Convert it to grayscale if it's in color.
+    if image.ndim == 3 and image.shape[2] == 3:
+        # Collapse the three RGB matrices into one b/w value matrix.
+        image = np.sum(image, axis=2) / 3.0
+    if np.issubdtype(dtype, np.integer):
+        return np.round(image * np.iinfo(dtype).max).astype(dtype)
+    return image.astype(dtype)
+
+
+def center_surround(fov, fov_horz_span, fov_vert_span, verbose=False,
+                    dtype=None):
     """
     Convert a 2D array of b/w pixel values to center-surround
 
     Parameters
     ----------
-    fov : 2D array of floats
-         Pixel values from the field of view.
+    fov : 2D array
+         Pixel values from the field of view. If these are integers,
+         they are scaled so that the largest possible value is 1.
     fov_horz_span : int
         Desired number of center-surround superpixel columns.
     fov_vert_span: int
         Desired number of center-surround superpixel rows.
     verbose : bool
         If True, print more information to the console.
+    dtype : numpy dtype, optional
+        The data type of the results. The default is ``sensor_dtype``.
 
     Returns
     -------
     center_surround_pixels :  2D array of floats
         The center surround values corresponding to the inputs.
     """
+    if dtype is None:
+        dtype = sensor_dtype
+    if np.issubdtype(fov.dtype, np.integer):
+        scale = 1. / np.iinfo(fov.dtype).max
+    else:
+        scale = 1.
     fov_height = fov.shape[0]
     fov_width = fov.shape[1]
     block_width = float(fov_width) / float(fov_horz_span + 2)
     block_height = float(fov_height) / float(fov_vert_span + 2)
-    super_pixels = np.zeros((fov_vert_span + 2, fov_horz_span + 2))
-    center_surround_pixels = np.zeros((fov_vert_span, fov_horz_span))
+    super_pixels = np.zeros((fov_vert_span + 2, fov_horz_span + 2),
+                            dtype=dtype)
+    center_surround_pixels = np.zeros((fov_vert_span, fov_horz_span),
+                                      dtype=dtype)
     # Create the superpixels by averaging pixel blocks
     for row in range(fov_vert_span + 2):
         for col in range(fov_horz_span + 2):
-            super_pixels[row][col] = np.mean(
+            super_pixels[row][col] = scale * np.mean(
                 fov[int(float(row) * block_height):
                     int(float(row + 1) * block_height),
                     int(float(col) * block_width):
@@ -87,6 +193,277 @@ def center_surround(fov, fov_horz_span, fov_vert_span, verbose=False):
     return center_surround_pixels
 
 
+def summed_area_table(image):
+    """
+    Find the sum of every rectangle of pixels with a top left corner at 0, 0.
+
+    With this table, the sum of any block of pixels takes four lookups.
+    See ``center_surround_batch()``.
+
+    Parameters
+    ----------
+    image : 2D array
+        Pixel values. If these are integers, they are scaled so that
+        the largest possible value is 1.
+
+    Returns
+    -------
+    table : 2D array of floats
+        One row and one column bigger than the image.
+        table[i, j] is the sum of image[:i, :j].
+    """
+    if np.issubdtype(image.dtype, np.integer):
+        scale = 1. / np.iinfo(image.dtype).max
+    else:
+        scale = 1.
+    table = np.zeros((image.shape[0] + 1, image.shape[1] + 1))
+    table[1:, 1:] = np.cumsum(np.cumsum(
+        image.astype(np.float64) * scale, axis=0), axis=1)
+    return table
+
+
+def center_surround_batch(table, row_edges, column_edges, dtype=None):
+    """
+    Find center-surround values for many fields of view at once.
+
+    This gives the same values as ``center_surround()`` on each
+    field of view, but the superpixels of all of them come from
+    a single gather out of the summed area table, and the center-surround
+    weights are applied to all of them together.
+
+    Parameters
+    ----------
+    table : 2D array of floats
+        The summed area table of the image, from ``summed_area_table()``.
+    row_edges : 2D array of ints
+        For each field of view, the image rows at which the superpixel
+        rows start, followed by the row at which the last one ends.
+        For fov_vert_span center-surround rows, this has
+        fov_vert_span + 3 columns.
+    column_edges : 2D array of ints
+        The same for the image columns.
+    dtype : numpy dtype, optional
+        The data type of the results. The default is ``sensor_dtype``.
+
+    Returns
+    -------
+    center_surround_pixels : 3D array of floats
+        The center surround values for each field of view,
+        one (fov_vert_span, fov_horz_span) array after another.
+    """
+    if dtype is None:
+        dtype = sensor_dtype
+    # Gather the table at every superpixel corner of every field of view.
+    # Differencing the corners along rows and then columns leaves the sum
+    # of the pixels in each superpixel.
+    corners = table[row_edges[:, :, np.newaxis],
+                    column_edges[:, np.newaxis, :]]
+    block_sums = np.diff(np.diff(corners, axis=1), axis=2)
+    block_areas = (np.diff(row_edges, axis=1)[:, :, np.newaxis] *
+                   np.diff(column_edges, axis=1)[:, np.newaxis, :])
+    super_pixels = block_sums / block_areas
+    # Weight the N, S, E, and W superpixels by 1/6 and
+    # the NW, NE, SW, and SE superpixels by 1/12, and
+    # subtract from the center.
+    center_surround_pixels = (
+        super_pixels[:, 1:-1, 1:-1] -
+        (super_pixels[:, :-2, 1:-1] + super_pixels[:, 2:, 1:-1] +
+         super_pixels[:, 1:-1, :-2] + super_pixels[:, 1:-1, 2:]) / 6 -
+        (super_pixels[:, :-2, :-2] + super_pixels[:, 2:, :-2] +
+         super_pixels[:, :-2, 2:] + super_pixels[:, 2:, 2:]) / 12)
+    return center_surround_pixels.astype(dtype)
+
+
+def dense_to_sparse(sensors):
+    """
+    Convert a dense array of sensors to active indices and values.
+
+    Worlds that can find their active sensors directly do so in their
+    sense_sparse() method. This is the fallback for those that can't.
+
+    Parameters
+    ----------
+    sensors : array of floats
+        The value of every sensor.
+
+    Returns
+    -------
+    indices : array of ints
+        The indices of the nonzero sensors, in increasing order.
+    values : array of floats
+        The values of those sensors.
+    """
+    sensors = np.asarray(sensors).ravel()
+    if not np.issubdtype(sensors.dtype, np.floating):
+        sensors = sensors.astype(sensor_dtype)
+    indices = np.nonzero(sensors)[0]
+    return indices, sensors[indices]
+
+
+def sparse_to_dense(indices, values, n_sensors):
+    """
+    Convert active sensor indices and values to a dense array.
+
+    Parameters
+    ----------
+    indices : array of ints
+        The indices of the nonzero sensors.
+    values : array of floats
+        The values of those sensors.
+    n_sensors : int
+        The total number of sensors.
+
+    Returns
+    -------
+    sensors : array of floats
+        The value of every sensor, with the same data type as ``values``.
+    """
+    sensors = np.zeros(n_sensors, dtype=np.asarray(values).dtype)
+    sensors[indices] = values
+    return sensors
+
+
+def step_many(world, actions):
+    """
+    Step a world through a whole sequence of actions in one call.
+
+    Worlds whose dynamics can be vectorized have a step_many() method
+    of their own, and this uses it. Others are stepped one time step
+    at a time with ``step_sequentially()``. Either way, the sensors
+    come back dense, even if the world's sparse_sensors is set.
+
+    Parameters
+    ----------
+    world : World
+        The world to step.
+    actions : 2D array of floats
+        One row of action commands per time step.
+
+    Returns
+    -------
+    sensors : 2D array of floats
+        One row of sensor values per time step.
+    rewards : array of floats
+        The reward after each time step.
+    """
+    world_step_many = getattr(world, 'step_many', None)
+    if world_step_many is not None:
+        return world_step_many(actions)
+    return step_sequentially(world, actions)
+
+
+def accumulate_with_jumps(start, steps, jumps, jump_positions):
+    """
+    Add up a series of steps, starting over after every jump.
+
+    This is the path of an agent that takes a step each time step,
+    except on the time steps where it jumps somewhere else instead.
+    It lets worlds with random jumps work out a whole sequence of
+    positions at once in their step_many().
+
+    Parameters
+    ----------
+    start : float or array of floats
+        The position before the first step.
+    steps : array of floats
+        The step taken on each time step, one row per time step.
+    jumps : array of bools
+        True on the time steps where the agent jumps.
+    jump_positions : array of floats
+        Where the agent lands on each time step that it jumps.
+        The same shape as steps. Rows without a jump are ignored.
+
+    Returns
+    -------
+    positions : array of floats
+        The position after each time step, the same shape as steps.
+    """
+    cumulative_steps = np.cumsum(steps, axis=0)
+    n_steps = steps.shape[0]
+    # last_jump is the most recent time step with a jump, or -1 if none.
+    last_jump = np.maximum.accumulate(
+        np.where(jumps, np.arange(n_steps), -1))
+    # After a jump, positions count from the landing spot,
+    # less the steps that had already been taken.
+    origins = (jump_positions - cumulative_steps)[np.maximum(last_jump, 0)]
+    before_jumps = (last_jump < 0).reshape((-1,) + (1,) * (steps.ndim - 1))
+    origins = np.where(before_jumps, start, origins)
+    return origins + cumulative_steps
+
+
+def step_sequentially(world, actions):
+    """
+    Step a world through a sequence of actions, one time step at a time.
+
+    Parameters
+    ----------
+    world : World
+        The world to step.
+    actions : 2D array of floats
+        One row of action commands per time step.
+
+    Returns
+    -------
+    sensors : 2D array of floats
+        One row of sensor values per time step.
+    rewards : array of floats
+        The reward after each time step.
+    """
+    actions = np.asarray(actions, dtype=float).reshape(-1, world.n_actions)
+    n_steps = actions.shape[0]
+    sensors = np.zeros((n_steps, world.n_sensors),
+                       dtype=getattr(world, 'sensor_dtype', np.float64))
+    rewards = np.zeros(n_steps)
+    for i_step in range(n_steps):
+        step_sensors, rewards[i_step] = world.step(actions[i_step].copy())
+        if isinstance(step_sensors, tuple):
+            step_sensors = sparse_to_dense(
+                step_sensors[0], step_sensors[1], world.n_sensors)
+        sensors[i_step] = step_sensors
+    return sensors, rewards
+
+
+def ring_action(position, target, n_positions, max_step):
+    """
+    Choose the actions that head most directly for a target on a ring.
+
+    This is for worlds where the first max_step actions step forward
+    1, 2, 3... positions and the next max_step step backward,
+    and where actions taken together add up, such as grid_1D and
+    synthetic. It's what an agent that knows the whole state of
+    the world would do. Together, the forward actions can cover up to
+    max_step * (max_step + 1) / 2 positions in a single time step.
+    The fewest actions that cover the distance are used, so that
+    when one action will do, only one is set.
+
+    Parameters
+    ----------
+    position, target : int
+        The current and target positions.
+    n_positions : int
+        The number of positions around the ring.
+    max_step : int
+        The largest step a single action can take.
+
+    Returns
+    -------
+    action : array of floats
+        The action commands.
+    """
+    action = np.zeros(2 * max_step)
+    distance = (target - position) % n_positions
+    offset = 0
+    if distance > n_positions // 2:
+        distance = n_positions - distance
+        offset = max_step
+    remaining = min(distance, max_step * (max_step + 1) // 2)
+    for step in range(max_step, 0, -1):
+        if step <= remaining:
+            action[offset + step - 1] = 1
+            remaining -= step
+    return action
+
+
 def print_pixel_array_features(projections,
                                num_pixels_x2,
                                start_index,